@@ -16,7 +16,7 @@ if config.config_file_name is not None:
 
 # add your model's MetaData object here
 # for 'autogenerate' support
-from app.database import BaseModel, Model
+from app.database import BaseModel, Model, ChatCacheEntry, SemanticCacheEntry, UsageRecord, BatchJob, VectorCollection, VectorDocument
 target_metadata = BaseModel.metadata
 
 # other values from the config, defined by the needs of env.py,
@@ -0,0 +1,41 @@
+"""add: chat_cache table for exact-match chat responses
+
+Revision ID: 9b1f4c2d7e10
+Revises: 68e680c2214c
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1f4c2d7e10'
+down_revision: Union[str, Sequence[str], None] = '68e680c2214c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'chat_cache',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('model_id', sa.String(length=255), nullable=False),
+        sa.Column('response', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('ix_chat_cache_expires_at', 'chat_cache', ['expires_at'], unique=False)
+    op.create_index('ix_chat_cache_model_id', 'chat_cache', ['model_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chat_cache_model_id', table_name='chat_cache')
+    op.drop_index('ix_chat_cache_expires_at', table_name='chat_cache')
+    op.drop_table('chat_cache')
@@ -0,0 +1,52 @@
+"""add: models lookup and listing indexes, unique (model_id, provider)
+
+Revision ID: a7d3e9c5b180
+Revises: f2c9a7e1d064
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e9c5b180'
+down_revision: Union[str, Sequence[str], None] = 'f2c9a7e1d064'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Fails, naming them, if a (model_id, provider) pair is registered twice:
+    which row to keep is for an operator to decide.
+    """
+    if not context.is_offline_mode():
+        duplicates = op.get_bind().execute(sa.text(
+            "SELECT model_id, provider, array_agg(id ORDER BY id) FROM models "
+            "GROUP BY model_id, provider HAVING count(*) > 1 ORDER BY model_id, provider"
+        )).all()
+        if duplicates:
+            listed = "; ".join(
+                f"'{model_id}' from '{provider}' (ids {', '.join(map(str, ids))})"
+                for model_id, provider, ids in duplicates
+            )
+            raise RuntimeError(
+                "Cannot add the unique (model_id, provider) constraint to models, "
+                f"delete or rename the duplicate rows first: {listed}"
+            )
+    op.create_unique_constraint('uq_models_model_id_provider', 'models', ['model_id', 'provider'])
+    op.create_index('ix_models_name', 'models', ['name'], unique=False)
+    op.create_index('ix_models_provider_type_id', 'models', ['provider', 'model_type', 'id'], unique=False)
+    op.create_index('ix_models_type_active_id', 'models', ['model_type', 'is_active', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_models_type_active_id', table_name='models')
+    op.drop_index('ix_models_provider_type_id', table_name='models')
+    op.drop_index('ix_models_name', table_name='models')
+    op.drop_constraint('uq_models_model_id_provider', 'models', type_='unique')
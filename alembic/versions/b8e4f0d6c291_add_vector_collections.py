@@ -0,0 +1,68 @@
+"""add: vector_collections and vector_documents tables
+
+Revision ID: b8e4f0d6c291
+Revises: a7d3e9c5b180
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.database.types import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4f0d6c291'
+down_revision: Union[str, Sequence[str], None] = 'a7d3e9c5b180'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS vector')
+    op.create_table(
+        'vector_collections',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('embedding_model_id', sa.String(length=255), nullable=False),
+        sa.Column('dimension', sa.Integer(), nullable=False),
+        sa.Column('metric', sa.String(length=20), nullable=False),
+        sa.Column('index_type', sa.String(length=20), nullable=False),
+        sa.Column('hnsw_m', sa.Integer(), nullable=True),
+        sa.Column('hnsw_ef_construction', sa.Integer(), nullable=True),
+        sa.Column('ivfflat_lists', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    op.create_table(
+        'vector_documents',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('collection_id', sa.Integer(), nullable=False),
+        sa.Column('external_id', sa.String(length=255), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('embedding', Vector(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['collection_id'], ['vector_collections.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('collection_id', 'external_id', name='uq_vector_documents_collection_external_id')
+    )
+    op.create_index(
+        'ix_vector_documents_metadata', 'vector_documents', ['metadata'], unique=False,
+        postgresql_using='gin', postgresql_ops={'metadata': 'jsonb_path_ops'}
+    )
+    # Vector indexes need a fixed dimension and operator class; one partial
+    # index per collection is created with it (see VectorRepository.rebuild_index).
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_vector_documents_metadata', table_name='vector_documents')
+    op.drop_table('vector_documents')
+    op.drop_table('vector_collections')
@@ -0,0 +1,59 @@
+"""add: semantic_cache table with pgvector embeddings
+
+Revision ID: c3a8e5f1b242
+Revises: 9b1f4c2d7e10
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.database.types import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a8e5f1b242'
+down_revision: Union[str, Sequence[str], None] = '9b1f4c2d7e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS vector')
+    op.create_table(
+        'semantic_cache',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('scope', sa.String(length=64), nullable=False),
+        sa.Column('model_id', sa.String(length=255), nullable=False),
+        sa.Column('embedding_model_id', sa.String(length=255), nullable=False),
+        sa.Column('prompt', sa.Text(), nullable=False),
+        sa.Column('dimension', sa.Integer(), nullable=False),
+        sa.Column('embedding', Vector(), nullable=False),
+        sa.Column('response', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_semantic_cache_scope', 'semantic_cache', ['scope'], unique=False)
+    op.create_index('ix_semantic_cache_expires_at', 'semantic_cache', ['expires_at'], unique=False)
+    # HNSW indexes need a fixed dimension: index the output size of the
+    # configured embedding model. Changing that model needs a new index.
+    dimension = int(settings.semantic_cache_dimension)
+    op.execute(
+        f"CREATE INDEX ix_semantic_cache_embedding_{dimension} "
+        f"ON semantic_cache USING hnsw ((embedding::vector({dimension})) vector_cosine_ops) "
+        f"WHERE dimension = {dimension}"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(f"DROP INDEX IF EXISTS ix_semantic_cache_embedding_{int(settings.semantic_cache_dimension)}")
+    op.drop_index('ix_semantic_cache_expires_at', table_name='semantic_cache')
+    op.drop_index('ix_semantic_cache_scope', table_name='semantic_cache')
+    op.drop_table('semantic_cache')
@@ -0,0 +1,47 @@
+"""add: usage_records table for the usage and cost ledger
+
+Revision ID: d71e2a9c4b53
+Revises: c3a8e5f1b242
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd71e2a9c4b53'
+down_revision: Union[str, Sequence[str], None] = 'c3a8e5f1b242'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'usage_records',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('request_type', sa.String(length=20), nullable=False),
+        sa.Column('model', sa.String(length=255), nullable=False),
+        sa.Column('provider', sa.String(length=100), nullable=False),
+        sa.Column('model_id', sa.String(length=255), nullable=False),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+        sa.Column('completion_tokens', sa.Integer(), nullable=False),
+        sa.Column('total_tokens', sa.Integer(), nullable=False),
+        sa.Column('cost', sa.Float(), nullable=True),
+        sa.Column('latency_ms', sa.Float(), nullable=True),
+        sa.Column('cached', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_usage_records_created_at', 'usage_records', ['created_at'], unique=False)
+    op.create_index('ix_usage_records_model_created_at', 'usage_records', ['model', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_usage_records_model_created_at', table_name='usage_records')
+    op.drop_index('ix_usage_records_created_at', table_name='usage_records')
+    op.drop_table('usage_records')
@@ -0,0 +1,32 @@
+"""add: admission limits of models
+
+Revision ID: e4b6d0a8f317
+Revises: d71e2a9c4b53
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b6d0a8f317'
+down_revision: Union[str, Sequence[str], None] = 'd71e2a9c4b53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('models', sa.Column('requests_per_second', sa.Float(), nullable=True))
+    op.add_column('models', sa.Column('tokens_per_minute', sa.Integer(), nullable=True))
+    op.add_column('models', sa.Column('max_concurrency', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('models', 'max_concurrency')
+    op.drop_column('models', 'tokens_per_minute')
+    op.drop_column('models', 'requests_per_second')
@@ -0,0 +1,54 @@
+"""add: batch_jobs table for offline chat batches
+
+Revision ID: f2c9a7e1d064
+Revises: e4b6d0a8f317
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c9a7e1d064'
+down_revision: Union[str, Sequence[str], None] = 'e4b6d0a8f317'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'batch_jobs',
+        sa.Column('id', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('input_path', sa.Text(), nullable=False),
+        sa.Column('output_path', sa.Text(), nullable=False),
+        sa.Column('concurrency', sa.Integer(), nullable=False),
+        sa.Column('max_retries', sa.Integer(), nullable=False),
+        sa.Column('requests_per_second', sa.Float(), nullable=True),
+        sa.Column('total_items', sa.Integer(), nullable=False),
+        sa.Column('checkpoint', sa.Integer(), nullable=False),
+        sa.Column('output_offset', sa.BigInteger(), nullable=False),
+        sa.Column('succeeded_items', sa.Integer(), nullable=False),
+        sa.Column('failed_items', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('owner', sa.String(length=255), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_batch_jobs_status', 'batch_jobs', ['status'], unique=False)
+    op.create_index('ix_batch_jobs_created_at', 'batch_jobs', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_batch_jobs_created_at', table_name='batch_jobs')
+    op.drop_index('ix_batch_jobs_status', table_name='batch_jobs')
+    op.drop_table('batch_jobs')
@@ -1,14 +1,246 @@
-from app.services.ai import LLMModel, EmbeddingModel
+from app.services.ai import LLMModel, EmbeddingModel, ProcessEmbeddingModel
+from app.services.ai.cache import EmbeddingCache
+from app.services.ai.chat_cache import ChatResponseCache
+from app.services.ai.semantic_cache import SemanticCache
+from app.services.ai.singleflight import SingleFlight
+from app.services.ai.policy import LLMPolicyEngine
+from app.services.ai.router import LLMRouter
+from app.services.admission import AdmissionController
+from app.services.batch import BatchRunner
+from app.services.catalog import ModelCatalog
+from app.services.usage import UsageLedger
+from app.services.vectors import VectorStore
+from fastapi import Request
 from functools import lru_cache
-from app.core.config import settings
+from sqlalchemy.engine import make_url
+from typing import Optional
+from app.core.config import LLMPolicyConfig, settings
+from app.core.metrics import metrics
 
 @lru_cache()
 def get_llm_model() -> LLMModel:
-    return LLMModel(
+    model = LLMModel(
         base_url=settings.openrouter_base_url,
-        api_key=settings.openrouter_api_key
+        api_key=settings.openrouter_api_key,
+        timeout=settings.llm_timeout,
+        connect_timeout=settings.llm_connect_timeout,
+        read_timeout=settings.llm_read_timeout,
+        pool_timeout=settings.llm_pool_timeout,
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_keepalive_connections,
+        keepalive_expiry=settings.llm_keepalive_expiry,
+        http2=settings.llm_http2
     )
+    metrics.register("llm.pool", model.pool_stats)
+    return model
+
+@lru_cache()
+def get_model_catalog() -> ModelCatalog:
+    dsn = None
+    if settings.catalog_listen:
+        dsn = make_url(settings.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+    catalog = ModelCatalog(dsn=dsn, ttl=settings.catalog_ttl)
+    metrics.register("catalog", catalog.stats)
+    return catalog
+
+@lru_cache()
+def get_usage_ledger() -> Optional[UsageLedger]:
+    if not settings.usage_ledger_enabled:
+        return None
+    ledger = UsageLedger(
+        max_queue_size=settings.usage_ledger_max_queue_size,
+        batch_size=settings.usage_ledger_batch_size,
+        flush_interval=settings.usage_ledger_flush_interval
+    )
+    metrics.register("usage.ledger", ledger.stats)
+    return ledger
+
+@lru_cache()
+def get_llm_router() -> LLMRouter:
+    clients = {settings.llm_default_provider: get_llm_model()}
+    for provider, config in settings.llm_providers.items():
+        if provider in clients:
+            continue
+        clients[provider] = LLMModel(
+            base_url=config.base_url,
+            api_key=config.api_key,
+            timeout=settings.llm_timeout,
+            connect_timeout=settings.llm_connect_timeout,
+            read_timeout=settings.llm_read_timeout,
+            pool_timeout=settings.llm_pool_timeout,
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry,
+            http2=config.http2
+        )
+    router = LLMRouter(
+        clients,
+        default_provider=settings.llm_default_provider,
+        resolve_endpoints=get_model_catalog().resolve_model_endpoints,
+        ewma_alpha=settings.llm_router_ewma_alpha,
+        error_penalty=settings.llm_router_error_penalty,
+        cost_weight=settings.llm_router_cost_weight,
+        catalog_ttl=settings.llm_router_catalog_ttl,
+        failure_threshold=settings.llm_breaker_failure_threshold,
+        error_rate_threshold=settings.llm_breaker_error_rate,
+        min_requests=settings.llm_breaker_min_requests,
+        cooldown=settings.llm_breaker_cooldown,
+        ledger=get_usage_ledger()
+    )
+    metrics.register("llm.router", router.stats)
+    return router
+
+@lru_cache()
+def get_llm_policy_engine() -> LLMPolicyEngine:
+    return LLMPolicyEngine(
+        get_llm_router(),
+        default_policy=settings.llm_default_policy,
+        policies=settings.llm_policies,
+        resolve_fallbacks=get_model_catalog().resolve_fallback_models
+    )
+
+@lru_cache()
+def get_admission_controller() -> Optional[AdmissionController]:
+    if not settings.rate_limit_enabled:
+        return None
+    controller = AdmissionController(
+        resolve_limits=get_model_catalog().resolve_model_limits,
+        default_model=settings.rate_limit_default_model,
+        models=settings.rate_limit_models,
+        default_key=settings.rate_limit_default_key,
+        keys=settings.rate_limit_keys,
+        mode=settings.rate_limit_mode,
+        queue_timeout=settings.rate_limit_queue_timeout,
+        catalog_ttl=settings.rate_limit_catalog_ttl
+    )
+    metrics.register("admission", controller.stats)
+    return controller
+
+def get_client_key(request: Request) -> str:
+    """The client admission limits of a request are counted against.
+
+    That is its API key when RATE_LIMIT_TRUST_API_KEYS says keys were verified
+    upstream, else its client address: an unverified key would let clients
+    pick the limits they get, or dodge them with a fresh key per request.
+    """
+    if settings.rate_limit_trust_api_keys:
+        authorization = request.headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            return authorization[len("bearer "):].strip()
+        api_key = request.headers.get("x-api-key")
+        if api_key:
+            return api_key
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+def _batch_llm(max_retries: int) -> LLMPolicyEngine:
+    # Batches trade latency for throughput: no hedging, and the job sets the retry budget.
+    overrides = {"max_retries": max_retries, "hedge": False}
+    policies: dict[str, LLMPolicyConfig] = {
+        model: policy.model_copy(update=overrides) for model, policy in settings.llm_policies.items()
+    }
+    return LLMPolicyEngine(
+        get_llm_router(),
+        default_policy=settings.llm_default_policy.model_copy(update=overrides),
+        policies=policies,
+        resolve_fallbacks=get_model_catalog().resolve_fallback_models
+    )
+
+@lru_cache()
+def get_batch_runner() -> BatchRunner:
+    runner = BatchRunner(
+        _batch_llm,
+        jobs_dir=settings.batch_jobs_dir,
+        max_running_jobs=settings.batch_max_running_jobs,
+        checkpoint_items=settings.batch_checkpoint_items,
+        checkpoint_interval=settings.batch_checkpoint_interval,
+        lease_seconds=settings.batch_lease_seconds,
+        admission=get_admission_controller()
+    )
+    metrics.register("batch", runner.stats)
+    return runner
+
+@lru_cache()
+def get_chat_singleflight() -> SingleFlight:
+    flight = SingleFlight("chat")
+    metrics.register("chat.singleflight", flight.stats)
+    return flight
+
+@lru_cache()
+def get_chat_cache() -> Optional[ChatResponseCache]:
+    if not settings.chat_cache_enabled:
+        return None
+    cache = ChatResponseCache(
+        max_entries=settings.chat_cache_max_entries,
+        ttl_seconds=settings.chat_cache_ttl_seconds,
+        persistent=settings.chat_cache_persistent
+    )
+    metrics.register("chat.cache", cache.stats)
+    return cache
 
 @lru_cache()
 def get_embedding_model() -> EmbeddingModel:
-    return EmbeddingModel()
+    cache = None
+    if settings.embedding_cache_enabled:
+        cache = EmbeddingCache(
+            max_entries=settings.embedding_cache_max_entries,
+            path=settings.embedding_cache_path,
+        )
+        metrics.register("embedding.cache", cache.stats)
+
+    options = dict(
+        models_dir=settings.embedding_models_dir,
+        memory_budget_bytes=settings.embedding_memory_budget_mb * 1024 ** 2,
+        max_batch_size=settings.embedding_max_batch_size,
+        max_wait_ms=settings.embedding_max_wait_ms,
+        max_queue_size=settings.embedding_max_queue_size,
+        max_batch_tokens=settings.embedding_max_batch_tokens,
+        default_backend=settings.embedding_backend,
+        backends=settings.embedding_model_backends,
+        onnx_int8_file=settings.embedding_onnx_int8_file,
+        cache=cache,
+        executor_workers=settings.embedding_executor_workers,
+        executor_max_pending=settings.embedding_executor_max_pending,
+        torch_num_threads=settings.torch_num_threads,
+    )
+    if settings.embedding_execution_mode == "process":
+        model = ProcessEmbeddingModel(
+            num_workers=settings.embedding_process_workers,
+            timeout=settings.embedding_process_timeout,
+            start_timeout=settings.embedding_process_start_timeout,
+            **options
+        )
+    else:
+        model = EmbeddingModel(**options)
+    metrics.register("embedding.registry", model.registry.stats)
+    metrics.register("embedding.inference", model.stats)
+    return model
+
+@lru_cache()
+def get_semantic_cache() -> Optional[SemanticCache]:
+    if not settings.semantic_cache_enabled:
+        return None
+    cache = SemanticCache(
+        get_embedding_model(),
+        embedding_model_id=settings.semantic_cache_embedding_model,
+        dimension=settings.semantic_cache_dimension,
+        threshold=settings.semantic_cache_threshold,
+        ttl_seconds=settings.semantic_cache_ttl_seconds,
+        ef_search=settings.semantic_cache_ef_search
+    )
+    metrics.register("chat.semantic_cache", cache.stats)
+    return cache
+
+@lru_cache()
+def get_vector_store() -> VectorStore:
+    store = VectorStore(
+        get_embedding_model(),
+        get_model_catalog(),
+        ef_search=settings.vector_ef_search,
+        probes=settings.vector_probes,
+        hnsw_m=settings.vector_hnsw_m,
+        hnsw_ef_construction=settings.vector_hnsw_ef_construction,
+        ingest_batch_size=settings.vector_ingest_batch_size,
+        admission=get_admission_controller()
+    )
+    metrics.register("vectors", store.stats)
+    return store
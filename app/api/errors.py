@@ -1,16 +1,43 @@
+from typing import Optional
 from fastapi import HTTPException, status
 
 class APIError(HTTPException):
     
     def __init__(self, 
         status_code: int = status.HTTP_500_INTERNAL_SERVER_ERROR, 
-        detail: str = "An internal server error occurred."
+        detail: str = "An internal server error occurred.",
+        headers: Optional[dict[str, str]] = None
     ):
         super().__init__(
             status_code=status_code, 
-            detail=detail
+            detail=detail,
+            headers=headers
         )
 
 class NotFoundError(APIError):
     def __init__(self, detail: str = "Resource not found."):
-        super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
\ No newline at end of file
+        super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+
+class ServiceUnavailableError(APIError):
+    def __init__(self, detail: str = "Service is overloaded, retry later.", retry_after: float = 1.0):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(max(1, round(retry_after)))}
+        )
+
+class RateLimitedError(APIError):
+    def __init__(self, detail: str = "Rate limit exceeded, retry later.", retry_after: Optional[float] = None):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(max(1, round(retry_after)))} if retry_after is not None else None
+        )
+
+class BadGatewayError(APIError):
+    def __init__(self, detail: str = "Upstream provider returned an error."):
+        super().__init__(status_code=status.HTTP_502_BAD_GATEWAY, detail=detail)
+
+class GatewayTimeoutError(APIError):
+    def __init__(self, detail: str = "Upstream provider timed out."):
+        super().__init__(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=detail)
@@ -0,0 +1,90 @@
+import asyncio
+from typing import Any, AsyncIterator
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from starlette.types import Receive, Scope, Send
+
+from app.core.metrics import metrics
+
+
+class PassthroughStreamingResponse(StreamingResponse):
+    """StreamingResponse relaying an upstream stream chunk by chunk.
+
+    Chunks are sent as they arrive, and the next one is only pulled once the
+    previous ``send`` returned, so a slow client slows the upstream read
+    instead of growing a buffer. The request is watched for ``http.disconnect``
+    whatever the ASGI spec version, and a disconnect closes the body iterator
+    right away, releasing the upstream request instead of reading it to the end.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        streaming = asyncio.create_task(self.stream_response(send))
+        disconnect = asyncio.create_task(self._wait_for_disconnect(receive))
+        try:
+            await asyncio.wait({streaming, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (streaming, disconnect):
+                task.cancel()
+            await asyncio.gather(streaming, disconnect, return_exceptions=True)
+            if hasattr(self.body_iterator, "aclose"):
+                await self.body_iterator.aclose()
+
+        if streaming.cancelled():
+            metrics.counter("http.stream.client_disconnects").inc()
+            return
+        streaming.result()
+        if self.background is not None:
+            await self.background()
+
+    async def _wait_for_disconnect(self, receive: Receive) -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+
+class RequestBody:
+    """Request body stream that records when its last message has been received.
+
+    ``read`` is set as soon as the final body message arrives, before its
+    bytes are consumed, so disconnects can be watched while they are processed.
+    """
+
+    def __init__(self, request: Request):
+        self.request = request
+        self.read = asyncio.Event()
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while not self.read.is_set():
+            message = await self.request.receive()
+            if message["type"] == "http.disconnect":
+                raise ClientDisconnect()
+            if not message.get("more_body", False):
+                self.read.set()
+            if message.get("body"):
+                yield message["body"]
+
+
+class DuplexStreamingResponse(PassthroughStreamingResponse):
+    """Streaming response whose body iterator keeps reading the request body.
+
+    Watching ``receive`` for ``http.disconnect`` while the body is uploaded
+    would compete with ``request.stream()`` for body messages. Until ``body``
+    has been read to the end, a disconnect surfaces as ``ClientDisconnect``
+    from the body iterator instead. After that, ``receive`` is watched as in
+    ``PassthroughStreamingResponse``.
+    """
+
+    def __init__(self, content: Any, body: RequestBody, **kwargs: Any):
+        super().__init__(content, **kwargs)
+        self.body = body
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        except ClientDisconnect:
+            metrics.counter("http.stream.client_disconnects").inc()
+
+    async def _wait_for_disconnect(self, receive: Receive) -> None:
+        await self.body.read.wait()
+        await super()._wait_for_disconnect(receive)
@@ -1,3 +1,33 @@
-from .model import ModelCreate, ModelUpdate, ModelResponse, ModelListResponse
+from .model import ModelCreate, ModelUpdate, ModelResponse, ModelListResponse, ModelImportResponse
+from .usage import UsageSummaryItem, UsageSummaryResponse
+from .batch import BatchJobResponse, BatchJobListResponse
+from .vector import (
+    CollectionCreate,
+    CollectionResponse,
+    CollectionListResponse,
+    DocumentUpsertRequest,
+    DocumentUpsertResponse,
+    DocumentDeleteRequest,
+    SearchRequest,
+    SearchResponse
+)
 
-__all__ = ["ModelCreate", "ModelUpdate", "ModelResponse", "ModelListResponse"]
\ No newline at end of file
+__all__ = [
+    "ModelCreate",
+    "ModelUpdate",
+    "ModelResponse",
+    "ModelListResponse",
+    "ModelImportResponse",
+    "UsageSummaryItem",
+    "UsageSummaryResponse",
+    "BatchJobResponse",
+    "BatchJobListResponse",
+    "CollectionCreate",
+    "CollectionResponse",
+    "CollectionListResponse",
+    "DocumentUpsertRequest",
+    "DocumentUpsertResponse",
+    "DocumentDeleteRequest",
+    "SearchRequest",
+    "SearchResponse"
+]
@@ -0,0 +1,28 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class BatchJobResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    status: str
+    concurrency: int
+    max_retries: int
+    requests_per_second: Optional[float] = None
+    total_items: int
+    completed_items: int = Field(validation_alias="checkpoint")
+    succeeded_items: int
+    failed_items: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class BatchJobListResponse(BaseModel):
+    items: list[BatchJobResponse]
+    page: int
+    size: int
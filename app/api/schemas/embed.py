@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Literal, Optional
 
 
 class EmbeddingRequest(BaseModel):
@@ -13,20 +13,35 @@ class EmbeddingRequest(BaseModel):
         example=["Your text string goes here", "Another text string"],
         description="Input text(s) to generate embeddings for.",
     )
+    encoding_format: Literal["float", "base64", "base64_float16", "base64_int8"] = Field(
+        "float",
+        example="float",
+        description=(
+            "Format of the returned embeddings: a list of floats, or the base64 "
+            "encoded little-endian float32, float16 or int8 buffer of each vector."
+        ),
+    )
 
 
 class EmbeddingItem(BaseModel):
     object: str = Field(
         "embedding", example="embedding", description="The type of object returned."
     )
-    embedding: List[float] = Field(
-        ..., example=[0.1, 0.2, 0.3, 0.4], description="The generated embedding vector."
+    embedding: List[float] | str = Field(
+        ...,
+        example=[0.1, 0.2, 0.3, 0.4],
+        description="The generated embedding vector, base64 encoded for binary formats.",
     )
     index: int = Field(
         ...,
         example=0,
         description="The index of the input text corresponding to this embedding.",
     )
+    scale: Optional[float] = Field(
+        None,
+        example=0.0078,
+        description="Dequantization scale of base64_int8 vectors (value = int8 * scale).",
+    )
 
 
 class Usage(BaseModel):
@@ -49,3 +64,30 @@ class EmbeddingResponse(BaseModel):
         description="The model used for generating embeddings.",
     )
     usage: Usage = Field(..., description="Token usage information.")
+
+
+class ParityRequest(BaseModel):
+    model: str = Field(
+        ..., example="all-MiniLM-L6-v2", description="The model to check."
+    )
+    backend: Literal["torch", "int8", "onnx", "onnx_int8"] = Field(
+        ..., example="onnx_int8", description="The backend compared against fp32 PyTorch."
+    )
+    inputs: Optional[List[str]] = Field(
+        None,
+        example=["Your text string goes here"],
+        description="Probe texts, defaults to a built-in sample.",
+    )
+
+
+class ParityResponse(BaseModel):
+    model: str = Field(..., example="all-MiniLM-L6-v2")
+    backend: str = Field(..., example="onnx_int8")
+    reference_backend: str = Field(..., example="torch")
+    samples: int = Field(..., example=8)
+    mean_cosine: float = Field(..., example=0.9991, description="Mean cosine similarity to the reference.")
+    min_cosine: float = Field(..., example=0.9968, description="Worst cosine similarity to the reference.")
+    max_drift: float = Field(..., example=0.0032, description="1 - min_cosine.")
+    reference_seconds: float = Field(..., example=0.041)
+    candidate_seconds: float = Field(..., example=0.015)
+    speedup: float = Field(..., example=2.7)
@@ -14,6 +14,9 @@ class ModelBase(BaseModel):
     output_cost_per_token: Optional[float] = None
     context_window: Optional[int] = None
     dimension: Optional[int] = None
+    requests_per_second: Optional[float] = None
+    tokens_per_minute: Optional[int] = None
+    max_concurrency: Optional[int] = None
     is_active: bool = True
 
 
@@ -32,6 +35,9 @@ class ModelUpdate(BaseModel):
     output_cost_per_token: Optional[float] = None
     context_window: Optional[int] = None
     dimension: Optional[int] = None
+    requests_per_second: Optional[float] = None
+    tokens_per_minute: Optional[int] = None
+    max_concurrency: Optional[int] = None
     is_active: Optional[bool] = None
 
 
@@ -45,7 +51,15 @@ class ModelResponse(ModelBase):
 
 class ModelListResponse(BaseModel):
     items: list[ModelResponse]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     size: int
-    pages: int
\ No newline at end of file
+    pages: Optional[int] = None
+    next_cursor: Optional[int] = None
+
+
+class ModelImportResponse(BaseModel):
+    created: int
+    updated: int
+    unchanged: int
+    deactivated: int
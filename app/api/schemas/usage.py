@@ -0,0 +1,26 @@
+from typing import Literal, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class UsageSummaryItem(BaseModel):
+    key: str
+    bucket: Optional[datetime] = None
+    requests: int
+    cached_requests: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    cost: float
+    avg_latency_ms: Optional[float] = None
+
+
+class UsageSummaryResponse(BaseModel):
+    start: datetime
+    end: datetime
+    group_by: Literal["model", "provider"]
+    bucket: Optional[str] = None
+    items: list[UsageSummaryItem]
+    total_requests: int
+    total_tokens: int
+    total_cost: float
@@ -0,0 +1,95 @@
+from typing import Any, Literal, Optional
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+
+class CollectionCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100, pattern=r"^[A-Za-z0-9_.-]+$")
+    embedding_model: str = Field(
+        ..., example="all-MiniLM-L6-v2", description="Name or model_id of an active embedding model."
+    )
+    metric: Literal["cosine", "inner_product"] = "cosine"
+    index_type: Literal["hnsw", "ivfflat"] = "hnsw"
+    lists: Optional[int] = Field(None, ge=1, description="IVFFlat lists; ignored for HNSW.")
+    description: Optional[str] = None
+
+
+class CollectionResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    description: Optional[str] = None
+    embedding_model_id: str
+    dimension: int
+    metric: str
+    index_type: str
+    hnsw_m: Optional[int] = None
+    hnsw_ef_construction: Optional[int] = None
+    ivfflat_lists: Optional[int] = None
+    created_at: datetime
+
+
+class CollectionListResponse(BaseModel):
+    items: list[CollectionResponse]
+
+
+class DocumentIn(BaseModel):
+    id: str = Field(..., min_length=1, max_length=255, description="Document ID, replaced if it exists.")
+    content: str = Field(..., description="Text to embed and store.")
+    metadata: dict[str, Any] = Field(default_factory=dict)
+
+
+class DocumentUpsertRequest(BaseModel):
+    documents: list[DocumentIn] = Field(..., min_length=1)
+
+
+class DocumentUpsertResponse(BaseModel):
+    created: int
+    updated: int
+    embedding_ms: float
+    write_ms: float
+
+
+class DocumentDeleteRequest(BaseModel):
+    ids: list[str] = Field(..., min_length=1)
+
+
+class SearchRequest(BaseModel):
+    query: Optional[str] = Field(None, description="Text to embed and search with.")
+    vector: Optional[list[float]] = Field(None, description="Query vector, instead of a text.")
+    top_k: int = Field(10, ge=1, le=1000)
+    filter: dict[str, Any] = Field(
+        default_factory=dict, description="Only documents whose metadata contains this object."
+    )
+    ef_search: Optional[int] = Field(None, ge=1, le=1000, description="HNSW candidate list size.")
+    probes: Optional[int] = Field(None, ge=1, description="IVFFlat lists scanned.")
+
+    @model_validator(mode="after")
+    def _one_query(self) -> "SearchRequest":
+        if (self.query is None) == (self.vector is None):
+            raise ValueError("Exactly one of query and vector must be given")
+        return self
+
+
+class SearchHit(BaseModel):
+    id: str
+    content: str
+    metadata: dict[str, Any]
+    score: float = Field(..., description="Cosine similarity or inner product; higher is closer.")
+
+
+class SearchLatency(BaseModel):
+    embedding: float
+    search: float
+    total: float
+
+
+class SearchResponse(BaseModel):
+    collection: str
+    metric: str
+    index_type: str
+    ef_search: Optional[int] = None
+    probes: Optional[int] = None
+    results: list[SearchHit]
+    latency_ms: SearchLatency
@@ -1,10 +1,16 @@
 from .chat import router as chat_router
 from .embed import router as embed_router
 from .model import router as models_router
+from .usage import router as usage_router
+from .batch import router as batch_router
+from .vectors import router as vectors_router
 from fastapi import (
     APIRouter
 )
 router_v1 = APIRouter(prefix="/v1")
 router_v1.include_router(chat_router)
 router_v1.include_router(embed_router)
-router_v1.include_router(models_router)
\ No newline at end of file
+router_v1.include_router(models_router)
+router_v1.include_router(usage_router)
+router_v1.include_router(batch_router)
+router_v1.include_router(vectors_router)
\ No newline at end of file
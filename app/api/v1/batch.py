@@ -0,0 +1,100 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_batch_runner
+from app.api.errors import APIError, NotFoundError
+from app.api.schemas import BatchJobListResponse, BatchJobResponse
+from app.core.config import settings
+from app.database import get_db
+from app.repositories import BatchJobRepository
+from app.services.batch import BatchInputError, BatchRunner
+
+router = APIRouter(prefix="/batches", tags=["Batch"])
+
+
+def get_batch_repository(db: Session = Depends(get_db)) -> BatchJobRepository:
+    return BatchJobRepository(db)
+
+
+@router.post("", response_model=BatchJobResponse, status_code=201)
+async def create_batch(
+    request: Request,
+    concurrency: int = Query(
+        settings.batch_default_concurrency, ge=1, le=settings.batch_max_concurrency,
+        description="Requests of the batch in flight at once"
+    ),
+    max_retries: int = Query(
+        settings.batch_default_max_retries, ge=0, le=10, description="Retries of each failing item"
+    ),
+    requests_per_second: Optional[float] = Query(None, gt=0, description="Throughput cap of the batch"),
+    runner: BatchRunner = Depends(get_batch_runner)
+):
+    """Queue a JSONL body of chat requests, one ``LLMRequest`` per line with an optional ``custom_id``"""
+    try:
+        return await runner.create(
+            request.stream(),
+            concurrency=concurrency,
+            max_retries=max_retries,
+            requests_per_second=requests_per_second
+        )
+    except BatchInputError as e:
+        raise APIError(status_code=422, detail=str(e))
+
+
+@router.get("", response_model=BatchJobListResponse)
+def list_batches(
+    page: int = Query(1, ge=1, description="Page number"),
+    size: int = Query(50, ge=1, le=100, description="Page size"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    repository: BatchJobRepository = Depends(get_batch_repository)
+):
+    """List batch jobs, newest first"""
+    jobs = repository.get_all(skip=(page - 1) * size, limit=size, status=status)
+    return BatchJobListResponse(items=jobs, page=page, size=size)
+
+
+@router.get("/{job_id}", response_model=BatchJobResponse)
+def get_batch(
+    job_id: str,
+    repository: BatchJobRepository = Depends(get_batch_repository)
+):
+    """Get the status and progress of a batch job"""
+    job = repository.get(job_id)
+    if not job:
+        raise NotFoundError("Batch job not found")
+    return job
+
+
+@router.get(
+    "/{job_id}/results",
+    responses={200: {"description": "Results as JSONL, in input order", "content": {"application/x-ndjson": {}}}}
+)
+async def get_batch_results(
+    job_id: str,
+    runner: BatchRunner = Depends(get_batch_runner)
+) -> StreamingResponse:
+    """Stream the results written so far, one line per input line with its ``response`` or ``error``"""
+    job = await runner.get(job_id)
+    if not job:
+        raise NotFoundError("Batch job not found")
+    return StreamingResponse(
+        runner.stream_results(job),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Status": job.status, "X-Batch-Completed-Items": str(job.checkpoint)}
+    )
+
+
+@router.post("/{job_id}/cancel", response_model=BatchJobResponse)
+async def cancel_batch(
+    job_id: str,
+    runner: BatchRunner = Depends(get_batch_runner)
+):
+    """Cancel a queued or running batch job, keeping the results written so far"""
+    job = await runner.get(job_id)
+    if not job:
+        raise NotFoundError("Batch job not found")
+    if not await runner.cancel(job_id):
+        raise APIError(status_code=409, detail=f"Batch job is already {job.status}")
+    return await runner.get(job_id)
@@ -1,14 +1,52 @@
-from fastapi import APIRouter, Depends
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from ..schemas.llm import (
     LLMRequest, 
     LLMResponse
 )
 from app.api.errors import (
-    APIError
+    APIError,
+    BadGatewayError,
+    GatewayTimeoutError,
+    NotFoundError,
+    RateLimitedError
 )
-from app.api.deps import get_llm_model, LLMModel
-from typing import Union
+from app.api.deps import (
+    get_admission_controller,
+    get_chat_cache,
+    get_chat_singleflight,
+    get_client_key,
+    get_llm_policy_engine,
+    get_model_catalog,
+    get_semantic_cache,
+    get_usage_ledger
+)
+from app.services.admission import (
+    AdmissionController,
+    Permit,
+    RateLimitExceeded,
+    estimate_chat_tokens,
+    estimate_tokens
+)
+from app.services.ai.chat_cache import (
+    ChatResponseCache,
+    StreamAccumulator,
+    chat_cache_key,
+    is_cacheable,
+    replay_as_sse
+)
+from app.services.ai.policy import LLMPolicyEngine, retry_after_seconds
+from app.services.ai.semantic_cache import SemanticCache
+from app.services.ai.singleflight import SingleFlight
+from app.services.catalog import ModelCatalog
+from app.services.usage import UsageEvent, UsageLedger
+from app.api.responses import PassthroughStreamingResponse
+from app.core.config import settings
+from contextlib import aclosing
+from functools import partial
+from typing import AsyncGenerator, Awaitable, Callable, Optional, Union
+import httpx
+import time
 
 router = APIRouter(tags=["Chat"])
 
@@ -34,20 +72,222 @@ router = APIRouter(tags=["Chat"])
     })
 async def chat(
     payload: LLMRequest, 
-    llm_model: LLMModel = Depends(get_llm_model)
+    response: Response,
+    llm_model: LLMPolicyEngine = Depends(get_llm_policy_engine),
+    chat_cache: Optional[ChatResponseCache] = Depends(get_chat_cache),
+    semantic_cache: Optional[SemanticCache] = Depends(get_semantic_cache),
+    chat_flight: SingleFlight = Depends(get_chat_singleflight),
+    ledger: Optional[UsageLedger] = Depends(get_usage_ledger),
+    admission: Optional[AdmissionController] = Depends(get_admission_controller),
+    catalog: ModelCatalog = Depends(get_model_catalog),
+    client_key: str = Depends(get_client_key)
 ) -> Union[LLMResponse, StreamingResponse]:
     
+    if settings.catalog_require_registered and not await catalog.find_active(payload.model):
+        raise NotFoundError(f"Model '{payload.model}' is not registered or not active")
+
+    started = time.perf_counter()
+    permit: Optional[Permit] = None
     try:
         payload_dict = payload.model_dump(exclude_none=True)
 
+        # Callbacks storing the upstream completion in every cache that missed.
+        stores: list[Callable[[dict], Awaitable[None]]] = []
+        cache_headers = {}
+        if chat_cache is not None:
+            if is_cacheable(payload_dict):
+                cache_key = chat_cache_key(payload_dict)
+                cached = await chat_cache.get(cache_key)
+                if cached is not None:
+                    _record_cache_hit(ledger, payload.model, cached, started)
+                    return _cached_response(cached, payload.stream, {"X-Cache": "HIT"})
+                cache_headers["X-Cache"] = "MISS"
+                stores.append(partial(chat_cache.put, cache_key, payload.model))
+            else:
+                cache_headers["X-Cache"] = "BYPASS"
+
+        if semantic_cache is not None:
+            lookup = await semantic_cache.lookup(payload_dict)
+            if lookup is None:
+                cache_headers["X-Semantic-Cache"] = "BYPASS"
+            elif lookup.response is not None:
+                _record_cache_hit(ledger, payload.model, lookup.response, started)
+                return _cached_response(lookup.response, payload.stream, {
+                    **cache_headers,
+                    "X-Semantic-Cache": "HIT",
+                    "X-Semantic-Cache-Similarity": f"{lookup.similarity:.4f}"
+                })
+            else:
+                cache_headers["X-Semantic-Cache"] = "MISS"
+                stores.append(partial(semantic_cache.store, lookup, payload.model))
+
+        # Cache hits are served above without using upstream capacity.
+        if admission is not None:
+            permit = await admission.acquire(payload.model, client_key, estimate_chat_tokens(payload_dict))
+
         if payload.stream:
-            return StreamingResponse(
-                llm_model.infer(payload_dict),
-                media_type="text/event-stream"
+            # Wait for the first chunk so upstream failures still map to a status code.
+            stream = llm_model.infer(payload_dict)
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                first = None
+            body = _prepend(first, stream)
+            if stores:
+                body = _store_stream(body, stores)
+            if permit is not None:
+                # The stream holds on to its admission until it ends.
+                prompt_tokens = estimate_chat_tokens({**payload_dict, "max_tokens": 0})
+                body, permit = _ReleaseAfter(body, permit, prompt_tokens), None
+            return PassthroughStreamingResponse(
+                body,
+                media_type="text/event-stream",
+                headers=cache_headers
             )
         
-        return await llm_model.infer(payload_dict)
+        if is_cacheable(payload_dict):
+            # Identical deterministic requests in flight share one upstream call;
+            # only the first one's caches are filled.
+            result = await chat_flight.do(
+                chat_cache_key(payload_dict), partial(_complete, llm_model, payload_dict, stores)
+            )
+        else:
+            result = await _complete(llm_model, payload_dict, stores)
+        if permit is not None:
+            permit.settle((result.get("usage") or {}).get("total_tokens"))
+        response.headers.update(cache_headers)
+        return result
+    except APIError:
+        raise
+    except RateLimitExceeded as e:
+        raise RateLimitedError(detail=str(e), retry_after=e.retry_after)
     except Exception as e:
-        raise APIError(detail=str(e))
+        raise _upstream_error(e)
+    finally:
+        if permit is not None:
+            permit.release()
+
+
+async def _complete(
+    llm_model: LLMPolicyEngine,
+    payload: dict,
+    stores: list[Callable[[dict], Awaitable[None]]]
+) -> dict:
+    result = await llm_model.infer(payload)
+    for store in stores:
+        await store(result)
+    return result
+
+
+def _record_cache_hit(ledger: Optional[UsageLedger], model: str, cached: dict, started: float) -> None:
+    if ledger is None:
+        return
+    usage = cached.get("usage") or {}
+    # Tokens are those of the original completion; serving them again costs nothing.
+    ledger.record(UsageEvent(
+        request_type="chat",
+        model=model,
+        provider="cache",
+        model_id=cached.get("model") or model,
+        prompt_tokens=usage.get("prompt_tokens") or 0,
+        completion_tokens=usage.get("completion_tokens") or 0,
+        total_tokens=usage.get("total_tokens") or 0,
+        cost=0.0,
+        latency_ms=(time.perf_counter() - started) * 1000,
+        cached=True
+    ))
+
+
+def _cached_response(cached: dict, stream: bool, headers: dict[str, str]) -> Response:
+    if stream:
+        return StreamingResponse(
+            iter(replay_as_sse(cached)),
+            media_type="text/event-stream",
+            headers=headers
+        )
+    return JSONResponse(content=cached, headers=headers)
+
+
+async def _store_stream(
+    stream: AsyncGenerator[bytes, None],
+    stores: list[Callable[[dict], Awaitable[None]]]
+) -> AsyncGenerator[bytes, None]:
+    accumulator = StreamAccumulator()
+    async with aclosing(stream):
+        async for chunk in stream:
+            accumulator.feed(chunk)
+            yield chunk
+    result = accumulator.result()
+    if result is not None:
+        for store in stores:
+            await store(result)
+
+
+class _ReleaseAfter:
+    """Settle and release an admission permit once the stream ends or is closed, even before it started.
+
+    The permit is settled with the usage the stream reports, or else with the
+    estimated prompt plus the tokens of the text streamed so far.
+    """
+
+    def __init__(self, stream: AsyncGenerator[bytes, None], permit: Permit, prompt_tokens: int):
+        self._stream = stream
+        self._permit = permit
+        self._prompt_tokens = prompt_tokens
+        self._accumulator = StreamAccumulator()
+
+    def __aiter__(self) -> "_ReleaseAfter":
+        return self
+
+    async def __anext__(self) -> bytes:
+        try:
+            chunk = await self._stream.__anext__()
+        except BaseException:
+            self._finish()
+            raise
+        self._accumulator.feed(chunk)
+        return chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._finish()
+
+    def _finish(self) -> None:
+        usage = self._accumulator.usage or {}
+        tokens = usage.get("total_tokens") or self._prompt_tokens + estimate_tokens([self._accumulator.content])
+        self._permit.settle(tokens)
+        self._permit.release()
+
+
+async def _prepend(first: bytes | None, stream: AsyncGenerator[bytes, None]) -> AsyncGenerator[bytes, None]:
+    async with aclosing(stream):
+        if first is None:
+            return
+        yield first
+        async for chunk in stream:
+            yield chunk
+
 
+def _upstream_error(error: Exception) -> APIError:
+    if isinstance(error, httpx.HTTPStatusError):
+        response = error.response
+        if response.status_code == 429:
+            return RateLimitedError(retry_after=retry_after_seconds(response))
+        if response.status_code >= 500:
+            return BadGatewayError(detail=f"Upstream provider returned HTTP {response.status_code}.")
+        if response.status_code in (401, 403):
+            # The gateway's own upstream credentials were refused, not the client's.
+            return BadGatewayError(detail=f"Upstream provider rejected the gateway's credentials (HTTP {response.status_code}).")
+        try:
+            detail = response.text
+        except httpx.ResponseNotRead:
+            detail = str(error)
+        return APIError(status_code=response.status_code, detail=detail or str(error))
+    if isinstance(error, httpx.TimeoutException):
+        return GatewayTimeoutError()
+    if isinstance(error, httpx.TransportError):
+        return BadGatewayError(detail=f"Upstream provider unreachable: {error}")
+    return APIError(detail=str(error))
 
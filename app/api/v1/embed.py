@@ -1,52 +1,317 @@
-from fastapi import APIRouter
+from typing import Any, AsyncIterator, Literal, Optional
+import struct
+import time
+from fastapi import APIRouter, Query, Request
+from starlette.requests import ClientDisconnect
+from fastapi.responses import JSONResponse
 from app.api.schemas.embed import (
-    EmbeddingRequest, 
+    EmbeddingRequest,
     EmbeddingResponse,
-    EmbeddingItem,
+    ParityRequest,
+    ParityResponse,
+)
+from app.api.deps import (
+    get_admission_controller,
+    get_client_key,
+    get_embedding_model,
+    get_model_catalog,
+    get_usage_ledger,
+    EmbeddingModel
 )
-from app.api.deps import get_embedding_model, EmbeddingModel
 from fastapi import Depends
+from app.api.responses import DuplexStreamingResponse, RequestBody
 from app.api.errors import (
-    NotFoundError, 
-    APIError
+    NotFoundError,
+    APIError,
+    RateLimitedError,
+    ServiceUnavailableError
 )
+from app.core.config import settings
+from app.core.ndjson import aiter_ndjson, dumps_line
+from app.services.admission import AdmissionController, RateLimitExceeded, estimate_tokens
+from app.services.ai.embedded import EmbeddingResult
+from app.services.ai.encoding import EncodingFormat, encode_embeddings
+from app.services.ai.errors import OverloadedError
+from app.services.catalog import ModelCatalog
+from app.services.usage import UsageEvent, UsageLedger
 
 
 router = APIRouter(tags=["Embedding"])
 
+# Binary bulk frame: start index (uint64), rows (uint32), dimension (uint32),
+# followed by rows * dimension little-endian float32 values. An error frame has
+# dimension 0: its start index is the offset to resume from and it is followed
+# by rows bytes of UTF-8 JSON, the same error object as the NDJSON output.
+BULK_FRAME_HEADER = struct.Struct("<QII")
+
 @router.post("/embeddings", response_model=EmbeddingResponse)
 async def embed(
-    payload: EmbeddingRequest, 
-    embedding_model: EmbeddingModel = Depends(get_embedding_model)
-) -> EmbeddingResponse:
-    
+    payload: EmbeddingRequest,
+    embedding_model: EmbeddingModel = Depends(get_embedding_model),
+    ledger: Optional[UsageLedger] = Depends(get_usage_ledger),
+    admission: Optional[AdmissionController] = Depends(get_admission_controller),
+    catalog: ModelCatalog = Depends(get_model_catalog),
+    client_key: str = Depends(get_client_key)
+) -> JSONResponse:
+
     if not payload.model:
         raise NotFoundError("Model name must be provided")
-    
+
+    if settings.catalog_require_registered and not await catalog.find_active(payload.model, "embedding"):
+        raise NotFoundError(f"Embedding model '{payload.model}' is not registered or not active")
+
     if not payload.inputs:
         raise NotFoundError("Input text must be provided")
-    
+
+    permit = None
     try:
-        vectors = await embedding_model.infer(
+        if admission is not None:
+            inputs = [payload.inputs] if isinstance(payload.inputs, str) else payload.inputs
+            permit = await admission.acquire(payload.model, client_key, estimate_tokens(inputs))
+
+        started = time.perf_counter()
+        result = await embedding_model.infer(
             model_id=payload.model, inputs=payload.inputs
         )
+        _record_usage(ledger, payload.model, result, started)
+        if permit is not None:
+            permit.settle(result.prompt_tokens)
+
+        # Build the payload directly from the numpy buffer: skipping per-item
+        # pydantic validation keeps serialization cost flat for large batches.
+        data = encode_embeddings(result.embeddings, payload.encoding_format)
 
-        data = [
-            EmbeddingItem(
-                object="embedding",
-                embedding=vector,
-                index=i
-            ) for i, vector in enumerate(vectors)
-        ]
-
-        return EmbeddingResponse(
-            object="list",
-            data=data,
-            model=payload.model,
-            usage={
-                "prompt_tokens": 0,
-                "total_tokens": 0
+        return JSONResponse(
+            content={
+                "object": "list",
+                "data": data,
+                "model": payload.model,
+                "usage": {
+                    "prompt_tokens": result.prompt_tokens,
+                    "total_tokens": result.prompt_tokens
+                }
+            },
+            headers={
+                "X-Embedding-Cache-Hits": str(result.cache_hits),
+                "X-Embedding-Cache-Hit-Ratio": f"{result.cache_hits / len(data):.3f}",
             }
         )
+    except RateLimitExceeded as e:
+        raise RateLimitedError(detail=str(e), retry_after=e.retry_after)
+    except OverloadedError as e:
+        raise ServiceUnavailableError(detail=str(e), retry_after=e.retry_after)
+    except Exception as e:
+        raise APIError(detail=str(e))
+    finally:
+        if permit is not None:
+            permit.release()
+
+
+@router.delete("/embeddings/cache/{model_id}")
+async def invalidate_embedding_cache(
+    model_id: str,
+    embedding_model: EmbeddingModel = Depends(get_embedding_model)
+):
+    """Drop all cached embeddings of a model"""
+    if embedding_model.cache is None:
+        raise NotFoundError("Embedding cache is disabled")
+
+    removed = await embedding_model.cache.invalidate(model_id)
+    return {"model": model_id, "removed": removed}
+
+
+@router.post("/embeddings/parity", response_model=ParityResponse)
+async def embedding_parity(
+    payload: ParityRequest,
+    embedding_model: EmbeddingModel = Depends(get_embedding_model)
+):
+    """Report cosine drift and speedup of a backend against fp32 PyTorch"""
+    try:
+        report = await embedding_model.parity(payload.model, payload.backend, payload.inputs)
+    except OverloadedError as e:
+        raise ServiceUnavailableError(detail=str(e), retry_after=e.retry_after)
+    except Exception as e:
+        raise APIError(detail=str(e))
+
+    return ParityResponse(
+        model=report.model_id,
+        backend=report.backend,
+        reference_backend=report.reference_backend,
+        samples=report.samples,
+        mean_cosine=report.mean_cosine,
+        min_cosine=report.min_cosine,
+        max_drift=report.max_drift,
+        reference_seconds=report.reference_seconds,
+        candidate_seconds=report.candidate_seconds,
+        speedup=report.speedup,
+    )
+
+@router.post(
+    "/embeddings/bulk",
+    responses={
+        200: {
+            "description": "Embeddings streamed as NDJSON lines or binary frames",
+            "content": {"application/x-ndjson": {}, "application/octet-stream": {}},
+        }
+    })
+async def embed_bulk(
+    request: Request,
+    model: str = Query(..., description="The model to use for generating embeddings"),
+    chunk_size: int = Query(256, ge=1, le=4096, description="Rows embedded per chunk"),
+    offset: int = Query(0, ge=0, description="Number of input rows to skip, to resume a dropped run"),
+    encoding_format: EncodingFormat = Query("float", description="Embedding format of NDJSON output"),
+    output: Literal["ndjson", "binary"] = Query("ndjson", description="Output framing"),
+    embedding_model: EmbeddingModel = Depends(get_embedding_model),
+    ledger: Optional[UsageLedger] = Depends(get_usage_ledger),
+    admission: Optional[AdmissionController] = Depends(get_admission_controller),
+    catalog: ModelCatalog = Depends(get_model_catalog),
+    client_key: str = Depends(get_client_key)
+) -> DuplexStreamingResponse:
+    """Embed an NDJSON corpus while it is uploaded.
+
+    Each input line is either a JSON string or an object with a ``text`` field and
+    an optional ``id``. Rows are embedded in fixed-size chunks and streamed back as
+    soon as each chunk is done, so memory use does not grow with the corpus. Output
+    indexes count input rows from the start of the body, including skipped ones.
+    Every chunk is admitted against the rate limits of the model and client.
+    """
+    if settings.catalog_require_registered and not await catalog.find_active(model, "embedding"):
+        raise NotFoundError(f"Embedding model '{model}' is not registered or not active")
+
+    body = RequestBody(request)
+    chunks = _embed_chunks(
+        aiter_ndjson(body), embedding_model, model, chunk_size, offset, ledger, admission, client_key
+    )
+
+    if output == "binary":
+        return DuplexStreamingResponse(
+            _binary_frames(chunks, offset), body=body, media_type="application/octet-stream"
+        )
+    return DuplexStreamingResponse(
+        _ndjson_lines(chunks, encoding_format, offset), body=body, media_type="application/x-ndjson"
+    )
+
+
+async def _embed_chunks(
+    records: AsyncIterator[Any],
+    embedding_model: EmbeddingModel,
+    model_id: str,
+    chunk_size: int,
+    offset: int,
+    ledger: Optional[UsageLedger],
+    admission: Optional[AdmissionController],
+    client_key: str,
+) -> AsyncIterator[tuple[int, list[Optional[Any]], Any]]:
+    position = 0
+    ids: list[Optional[Any]] = []
+    texts: list[str] = []
+
+    async for record in records:
+        position += 1
+        if position <= offset:
+            continue
+        if isinstance(record, str):
+            ids.append(None)
+            texts.append(record)
+        else:
+            ids.append(record.get("id"))
+            texts.append(record["text"])
+
+        if len(texts) >= chunk_size:
+            result = await _embed_chunk(embedding_model, model_id, texts, ledger, admission, client_key)
+            yield position - len(texts), ids, result.embeddings
+            ids, texts = [], []
+
+    if texts:
+        result = await _embed_chunk(embedding_model, model_id, texts, ledger, admission, client_key)
+        yield position - len(texts), ids, result.embeddings
+
+
+async def _embed_chunk(
+    embedding_model: EmbeddingModel,
+    model_id: str,
+    texts: list[str],
+    ledger: Optional[UsageLedger],
+    admission: Optional[AdmissionController],
+    client_key: str,
+) -> EmbeddingResult:
+    permit = None
+    if admission is not None:
+        permit = await admission.acquire(model_id, client_key, estimate_tokens(texts))
+    try:
+        started = time.perf_counter()
+        result = await embedding_model.infer(model_id=model_id, inputs=texts)
+        _record_usage(ledger, model_id, result, started)
+        if permit is not None:
+            permit.settle(result.prompt_tokens)
+        return result
+    finally:
+        if permit is not None:
+            permit.release()
+
+
+def _record_usage(
+    ledger: Optional[UsageLedger],
+    model_id: str,
+    result: EmbeddingResult,
+    started: float,
+) -> None:
+    if ledger is None:
+        return
+    # Embeddings are computed in-process: they use tokens but cost nothing upstream.
+    ledger.record(UsageEvent(
+        request_type="embedding",
+        model=model_id,
+        provider="local",
+        model_id=model_id,
+        prompt_tokens=result.prompt_tokens,
+        total_tokens=result.prompt_tokens,
+        cost=0.0,
+        latency_ms=(time.perf_counter() - started) * 1000,
+        cached=result.cache_hits == len(result.embeddings)
+    ))
+
+
+async def _ndjson_lines(
+    chunks: AsyncIterator[tuple[int, list[Optional[Any]], Any]],
+    encoding_format: EncodingFormat,
+    offset: int,
+) -> AsyncIterator[bytes]:
+    next_index = offset
+    try:
+        async for start, ids, embeddings in chunks:
+            items = encode_embeddings(embeddings, encoding_format, start_index=start)
+            for item, row_id in zip(items, ids):
+                if row_id is not None:
+                    item["id"] = row_id
+            yield b"".join(dumps_line(item) for item in items)
+            next_index = start + len(items)
+    except ClientDisconnect:
+        raise
     except Exception as e:
-        raise APIError(detail=str(e))
\ No newline at end of file
+        # The status line is already sent: report where to resume from instead.
+        yield dumps_line(_bulk_error(e, next_index))
+
+
+async def _binary_frames(
+    chunks: AsyncIterator[tuple[int, list[Optional[Any]], Any]],
+    offset: int,
+) -> AsyncIterator[bytes]:
+    next_index = offset
+    try:
+        async for start, _, embeddings in chunks:
+            rows, dimension = embeddings.shape
+            yield BULK_FRAME_HEADER.pack(start, rows, dimension) + embeddings.astype("<f4").tobytes()
+            next_index = start + rows
+    except ClientDisconnect:
+        raise
+    except Exception as e:
+        error = dumps_line(_bulk_error(e, next_index))
+        yield BULK_FRAME_HEADER.pack(next_index, len(error), 0) + error
+
+
+def _bulk_error(error: Exception, resume_offset: int) -> dict[str, Any]:
+    body = {"object": "error", "error": str(error), "resume_offset": resume_offset}
+    if isinstance(error, (RateLimitExceeded, OverloadedError)):
+        body["retry_after"] = error.retry_after
+    return body
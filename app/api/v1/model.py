@@ -1,134 +1,205 @@
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+import json
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 import math
 
-from app.database import get_db
-from app.repositories import ModelRepository
-from app.api.schemas import ModelCreate, ModelUpdate, ModelResponse, ModelListResponse
+from app.api.deps import get_model_catalog
+from app.core.ndjson import aiter_ndjson
+from app.database import get_async_db
+from app.database.models import Model
+from app.repositories import AsyncModelRepository
+from app.services.catalog import ModelCatalog
+from app.api.schemas import ModelCreate, ModelUpdate, ModelResponse, ModelListResponse, ModelImportResponse
 
 router = APIRouter(prefix="/models", tags=["Models"])
 
 
-def get_model_repository(db: Session = Depends(get_db)) -> ModelRepository:
-    return ModelRepository(db)
+async def get_model_repository(db: AsyncSession = Depends(get_async_db)) -> AsyncModelRepository:
+    return AsyncModelRepository(db)
 
 
 @router.post("/", response_model=ModelResponse, status_code=201)
-def create_model(
+async def create_model(
     model: ModelCreate,
-    repository: ModelRepository = Depends(get_model_repository)
+    repository: AsyncModelRepository = Depends(get_model_repository),
+    catalog: ModelCatalog = Depends(get_model_catalog)
 ):
     """Create a new AI model"""
+    already_exists = HTTPException(
+        status_code=400,
+        detail=f"AI model '{model.model_id}' from provider '{model.provider}' already exists"
+    )
     # Check if model already exists
-    existing_model = repository.get_by_model_id(model.model_id, model.provider)
+    existing_model = await repository.get_by_model_id(model.model_id, model.provider)
     if existing_model:
-        raise HTTPException(
-            status_code=400,
-            detail=f"AI model '{model.model_id}' from provider '{model.provider}' already exists"
-        )
+        raise already_exists
     
-    return repository.create(model)
+    try:
+        created = await repository.create(model)
+    except IntegrityError:
+        # Created concurrently, caught by the unique (model_id, provider) constraint
+        await repository.db.rollback()
+        raise already_exists
+    catalog.remember(created)
+    return created
+
+
+@router.post("/bulk", response_model=ModelImportResponse)
+async def import_models(
+    request: Request,
+    deactivate_missing: bool = Query(
+        False, description="Deactivate models of the imported providers that are missing from the body"
+    ),
+    repository: AsyncModelRepository = Depends(get_model_repository),
+    catalog: ModelCatalog = Depends(get_model_catalog)
+):
+    """Create or update many AI models by (model_id, provider), from a JSON array or an NDJSON body"""
+    models = await _read_models(request)
+    summary = await repository.bulk_upsert(models, deactivate_missing=deactivate_missing)
+    await catalog.load()
+    return summary
+
+
+async def _read_models(request: Request) -> list[ModelCreate]:
+    records: list[Any] = []
+    try:
+        if request.headers.get("content-type", "").startswith(("application/x-ndjson", "application/jsonl")):
+            records = [record async for record in aiter_ndjson(request.stream())]
+        else:
+            records = json.loads(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid JSON: {e}")
+    if not isinstance(records, list):
+        raise HTTPException(status_code=422, detail="Expected a JSON array of models")
+    models = []
+    for index, record in enumerate(records):
+        try:
+            models.append(ModelCreate.model_validate(record))
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=f"Model {index}: {e}")
+    return models
 
 
 @router.get("/{model_id}", response_model=ModelResponse)
-def get_model(
+async def get_model(
     model_id: int,
-    repository: ModelRepository = Depends(get_model_repository)
+    catalog: ModelCatalog = Depends(get_model_catalog)
 ):
     """Get AI model by ID"""
-    model = repository.get_by_id(model_id)
+    model = await catalog.get(model_id)
     if not model:
         raise HTTPException(status_code=404, detail="AI model not found")
     return model
 
 
 @router.get("/", response_model=ModelListResponse)
-def list_models(
+async def list_models(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(50, ge=1, le=100, description="Page size"),
+    cursor: Optional[int] = Query(
+        None, ge=0, description="Keyset pagination: list models after this id (0 to start), ignoring page"
+    ),
+    include_total: bool = Query(True, description="Count all matching models"),
     provider: Optional[str] = Query(None, description="Filter by provider"),
     model_type: Optional[str] = Query(None, description="Filter by model type"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
-    repository: ModelRepository = Depends(get_model_repository)
+    catalog: ModelCatalog = Depends(get_model_catalog)
 ):
     """List AI models with pagination and filtering"""
-    skip = (page - 1) * size
+    filters = dict(provider=provider, model_type=model_type, is_active=is_active)
     
-    models = repository.get_all(
-        skip=skip,
-        limit=size,
-        provider=provider,
-        model_type=model_type,
-        is_active=is_active
-    )
-    
-    total = repository.count(
-        provider=provider,
-        model_type=model_type,
-        is_active=is_active
-    )
+    # One extra model tells whether there is a next page.
+    if cursor is not None:
+        models = await catalog.get_all(**filters, after_id=cursor, limit=size + 1)
+    else:
+        skip = (page - 1) * size
+        models = (await catalog.get_all(**filters, limit=skip + size + 1))[skip:]
+    next_cursor = models[size - 1].id if len(models) > size else None
+    models = models[:size]
     
-    pages = math.ceil(total / size) if total > 0 else 1
+    total = await catalog.count(**filters) if include_total else None
+    pages = (math.ceil(total / size) if total > 0 else 1) if total is not None else None
     
     return ModelListResponse(
         items=models,
         total=total,
-        page=page,
+        page=page if cursor is None else None,
         size=size,
-        pages=pages
+        pages=pages,
+        next_cursor=next_cursor
     )
 
 
 @router.put("/{model_id}", response_model=ModelResponse)
-def update_model(
+async def update_model(
     model_id: int,
     model_update: ModelUpdate,
-    repository: ModelRepository = Depends(get_model_repository)
+    repository: AsyncModelRepository = Depends(get_model_repository),
+    catalog: ModelCatalog = Depends(get_model_catalog)
 ):
     """Update an AI model"""
-    model = repository.update(model_id, model_update)
+    model = await _update(repository, model_id, model_update)
+    catalog.remember(model)
+    return model
+
+
+async def _update(repository: AsyncModelRepository, model_id: int, model_update: ModelUpdate) -> Model:
+    try:
+        model = await repository.update(model_id, model_update)
+    except IntegrityError:
+        # The new (model_id, provider) pair belongs to another model
+        await repository.db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="An AI model with this model_id and provider already exists"
+        )
     if not model:
         raise HTTPException(status_code=404, detail="AI model not found")
     return model
 
 
 @router.delete("/{model_id}", status_code=204)
-def delete_model(
+async def delete_model(
     model_id: int,
     soft: bool = Query(False, description="Soft delete (deactivate) instead of hard delete"),
-    repository: ModelRepository = Depends(get_model_repository)
+    repository: AsyncModelRepository = Depends(get_model_repository),
+    catalog: ModelCatalog = Depends(get_model_catalog)
 ):
     """Delete an AI model"""
     if soft:
-        model = repository.soft_delete(model_id)
+        model = await repository.soft_delete(model_id)
         if not model:
             raise HTTPException(status_code=404, detail="AI model not found")
+        catalog.remember(model)
     else:
-        success = repository.delete(model_id)
+        success = await repository.delete(model_id)
         if not success:
             raise HTTPException(status_code=404, detail="AI model not found")
+        catalog.forget(model_id)
 
 
 @router.post("/{model_id}/activate", response_model=ModelResponse)
-def activate_model(
+async def activate_model(
     model_id: int,
-    repository: ModelRepository = Depends(get_model_repository)
+    repository: AsyncModelRepository = Depends(get_model_repository),
+    catalog: ModelCatalog = Depends(get_model_catalog)
 ):
     """Activate an AI model"""
-    model = repository.update(model_id, ModelUpdate(is_active=True))
-    if not model:
-        raise HTTPException(status_code=404, detail="AI model not found")
+    model = await _update(repository, model_id, ModelUpdate(is_active=True))
+    catalog.remember(model)
     return model
 
 
 @router.post("/{model_id}/deactivate", response_model=ModelResponse)
-def deactivate_model(
+async def deactivate_model(
     model_id: int,
-    repository: ModelRepository = Depends(get_model_repository)
+    repository: AsyncModelRepository = Depends(get_model_repository),
+    catalog: ModelCatalog = Depends(get_model_catalog)
 ):
     """Deactivate an AI model"""
-    model = repository.update(model_id, ModelUpdate(is_active=False))
-    if not model:
-        raise HTTPException(status_code=404, detail="AI model not found")
+    model = await _update(repository, model_id, ModelUpdate(is_active=False))
+    catalog.remember(model)
     return model
\ No newline at end of file
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.repositories import UsageRepository
+from app.api.schemas import UsageSummaryItem, UsageSummaryResponse
+
+router = APIRouter(prefix="/usage", tags=["Usage"])
+
+
+def get_usage_repository(db: Session = Depends(get_db)) -> UsageRepository:
+    return UsageRepository(db)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Timestamps without an offset are taken as UTC, the zone usage is recorded in.
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+@router.get("/summary", response_model=UsageSummaryResponse)
+def usage_summary(
+    start: Optional[datetime] = Query(
+        None, description="Start of the window, UTC unless an offset is given (default: 24 hours before end)"
+    ),
+    end: Optional[datetime] = Query(
+        None, description="End of the window, exclusive, UTC unless an offset is given (default: now)"
+    ),
+    group_by: Literal["model", "provider"] = Query("model", description="Aggregate per model or per provider"),
+    bucket: Optional[Literal["minute", "hour", "day", "week", "month"]] = Query(
+        None, description="Split the window into buckets of this size"
+    ),
+    request_type: Optional[Literal["chat", "embedding"]] = Query(None, description="Filter by request type"),
+    repository: UsageRepository = Depends(get_usage_repository)
+):
+    """Requests, tokens, spend and latency per model or provider over a time window"""
+    end = _as_utc(end) if end else datetime.now(timezone.utc)
+    start = _as_utc(start) if start else end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    items = [
+        UsageSummaryItem(**row)
+        for row in repository.aggregate(start, end, group_by=group_by, bucket=bucket, request_type=request_type)
+    ]
+    return UsageSummaryResponse(
+        start=start,
+        end=end,
+        group_by=group_by,
+        bucket=bucket,
+        items=items,
+        total_requests=sum(item.requests for item in items),
+        total_tokens=sum(item.total_tokens for item in items),
+        total_cost=sum(item.cost for item in items)
+    )
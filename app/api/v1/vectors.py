@@ -0,0 +1,133 @@
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from fastapi import APIRouter, Depends, Query
+
+from app.api.deps import get_client_key, get_vector_store
+from app.api.errors import APIError, NotFoundError, RateLimitedError, ServiceUnavailableError
+from app.api.schemas import (
+    CollectionCreate,
+    CollectionListResponse,
+    CollectionResponse,
+    DocumentDeleteRequest,
+    DocumentUpsertRequest,
+    DocumentUpsertResponse,
+    SearchRequest,
+    SearchResponse
+)
+from app.services.admission import RateLimitExceeded
+from app.services.ai.errors import OverloadedError
+from app.services.vectors import CollectionExistsError, CollectionNotFoundError, VectorInputError, VectorStore
+
+router = APIRouter(prefix="/collections", tags=["Vectors"])
+
+
+@contextmanager
+def _vector_errors() -> Iterator[None]:
+    try:
+        yield
+    except CollectionNotFoundError as e:
+        raise NotFoundError(str(e))
+    except CollectionExistsError as e:
+        raise APIError(status_code=409, detail=str(e))
+    except VectorInputError as e:
+        raise APIError(status_code=422, detail=str(e))
+    except RateLimitExceeded as e:
+        raise RateLimitedError(detail=str(e), retry_after=e.retry_after)
+    except OverloadedError as e:
+        raise ServiceUnavailableError(detail=str(e), retry_after=e.retry_after)
+
+
+@router.post("", response_model=CollectionResponse, status_code=201)
+async def create_collection(
+    payload: CollectionCreate,
+    store: VectorStore = Depends(get_vector_store)
+):
+    """Create a collection of an embedding model, with its dimension taken from the models table"""
+    with _vector_errors():
+        return await store.create_collection(
+            payload.name,
+            payload.embedding_model,
+            metric=payload.metric,
+            index_type=payload.index_type,
+            lists=payload.lists,
+            description=payload.description
+        )
+
+
+@router.get("", response_model=CollectionListResponse)
+async def list_collections(store: VectorStore = Depends(get_vector_store)):
+    """List collections by name"""
+    return CollectionListResponse(items=await store.list_collections())
+
+
+@router.get("/{name}", response_model=CollectionResponse)
+async def get_collection(name: str, store: VectorStore = Depends(get_vector_store)):
+    """Get a collection by name"""
+    with _vector_errors():
+        return await store.get_collection(name)
+
+
+@router.delete("/{name}", status_code=204)
+async def delete_collection(name: str, store: VectorStore = Depends(get_vector_store)):
+    """Delete a collection with its documents and index"""
+    with _vector_errors():
+        await store.delete_collection(name)
+
+
+@router.post("/{name}/reindex", response_model=CollectionResponse)
+async def reindex_collection(
+    name: str,
+    lists: Optional[int] = Query(None, ge=1, description="IVFFlat lists, by default sqrt(documents)"),
+    store: VectorStore = Depends(get_vector_store)
+):
+    """Rebuild the vector index of a collection, e.g. an IVFFlat index after the initial load"""
+    with _vector_errors():
+        return await store.rebuild_index(name, lists)
+
+
+@router.post("/{name}/documents", response_model=DocumentUpsertResponse)
+async def upsert_documents(
+    name: str,
+    payload: DocumentUpsertRequest,
+    store: VectorStore = Depends(get_vector_store),
+    client_key: str = Depends(get_client_key)
+):
+    """Embed documents and insert them, replacing those with the same ID"""
+    with _vector_errors():
+        return await store.upsert(
+            name,
+            [(document.id, document.content, document.metadata) for document in payload.documents],
+            client_key
+        )
+
+
+@router.post("/{name}/documents/delete")
+async def delete_documents(
+    name: str,
+    payload: DocumentDeleteRequest,
+    store: VectorStore = Depends(get_vector_store)
+):
+    """Delete documents by ID"""
+    with _vector_errors():
+        return {"deleted": await store.delete_documents(name, payload.ids)}
+
+
+@router.post("/{name}/search", response_model=SearchResponse)
+async def search_collection(
+    name: str,
+    payload: SearchRequest,
+    store: VectorStore = Depends(get_vector_store),
+    client_key: str = Depends(get_client_key)
+):
+    """Return the documents nearest to a query text or vector, optionally filtered on metadata"""
+    with _vector_errors():
+        return await store.search(
+            name,
+            client_key,
+            query=payload.query,
+            vector=payload.vector,
+            top_k=payload.top_k,
+            metadata_filter=payload.filter,
+            ef_search=payload.ef_search,
+            probes=payload.probes
+        )
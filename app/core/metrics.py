@@ -0,0 +1,121 @@
+import bisect
+import threading
+from typing import Any, Callable, Sequence
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+class Counter:
+    """Monotonic counter, safe to increment from worker threads."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> int:
+        return self._value
+
+
+class Histogram:
+    """Fixed-bucket histogram with approximate quantiles."""
+
+    def __init__(self, name: str, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def quantile(self, q: float) -> float | None:
+        """Return the upper bound of the bucket holding the q-th quantile."""
+        if self._count == 0:
+            return None
+        rank = q * self._count
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            count, total = self._count, self._sum
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = count
+        return {
+            "count": count,
+            "sum": total,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+
+class MetricsRegistry:
+    """Named counters, histograms and collector callbacks exposed on /metrics."""
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._collectors: dict[str, Callable[[], Any]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str) -> Counter:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Counter(name)
+            return metric
+
+    def histogram(
+        self, name: str, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ) -> Histogram:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(name, buckets)
+            return metric
+
+    def register(self, name: str, collector: Callable[[], Any]) -> None:
+        """Register a callback whose return value is reported under ``name``."""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+            collectors = dict(self._collectors)
+        result: dict[str, Any] = {name: metric.snapshot() for name, metric in metrics.items()}
+        for name, collector in collectors.items():
+            result[name] = collector()
+        return result
+
+
+metrics: MetricsRegistry = MetricsRegistry()
@@ -0,0 +1,25 @@
+import json
+from typing import Any, AsyncIterator
+
+
+async def aiter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream into non-empty lines without buffering the whole body."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+async def aiter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """Decode a newline-delimited JSON byte stream one record at a time."""
+    async for line in aiter_lines(chunks):
+        yield json.loads(line)
+
+
+def dumps_line(record: Any) -> bytes:
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n"
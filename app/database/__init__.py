@@ -1,3 +1,3 @@
-from .base import get_db, engine, SessionLocal
-from .models import BaseModel, Model
-__all__ = ["BaseModel", "Model", "get_db", "engine", "SessionLocal"]
\ No newline at end of file
+from .base import get_db, get_async_db, engine, async_engine, SessionLocal, AsyncSessionLocal
+from .models import BaseModel, Model, ChatCacheEntry, SemanticCacheEntry, UsageRecord, BatchJob, VectorCollection, VectorDocument
+__all__ = ["BaseModel", "Model", "ChatCacheEntry", "SemanticCacheEntry", "UsageRecord", "BatchJob", "VectorCollection", "VectorDocument", "get_db", "get_async_db", "engine", "async_engine", "SessionLocal", "AsyncSessionLocal"]
\ No newline at end of file
@@ -1,6 +1,17 @@
 from .model import BaseModel, Model
+from .chat_cache import ChatCacheEntry
+from .semantic_cache import SemanticCacheEntry
+from .usage import UsageRecord
+from .batch import BatchJob
+from .vector import VectorCollection, VectorDocument
 
 __all__ = [
     "BaseModel",
     "Model",
+    "ChatCacheEntry",
+    "SemanticCacheEntry",
+    "UsageRecord",
+    "BatchJob",
+    "VectorCollection",
+    "VectorDocument",
 ]
\ No newline at end of file
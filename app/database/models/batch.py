@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, BigInteger, Integer, String, Float, Text, DateTime, Index
+from .base import BaseModel
+
+
+class BatchJob(BaseModel):
+    __tablename__ = "batch_jobs"
+
+    id = Column(String(64), primary_key=True)  # e.g., "batch_3f2a..."
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed, failed, cancelled
+    input_path = Column(Text, nullable=False)  # JSONL of chat requests on local disk
+    output_path = Column(Text, nullable=False)  # JSONL of results, one line per input line in input order
+
+    # Run settings
+    concurrency = Column(Integer, nullable=False)
+    max_retries = Column(Integer, nullable=False)
+    requests_per_second = Column(Float, nullable=True)  # Unthrottled when null
+
+    # Progress: the first ``checkpoint`` results are durably written up to byte ``output_offset``
+    total_items = Column(Integer, nullable=False, default=0)
+    checkpoint = Column(Integer, nullable=False, default=0)
+    output_offset = Column(BigInteger, nullable=False, default=0)
+    succeeded_items = Column(Integer, nullable=False, default=0)
+    failed_items = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+
+    # Lease of the process running the job, renewed while it runs; others may take over once it expires
+    owner = Column(String(255), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_batch_jobs_status", "status"),
+        Index("ix_batch_jobs_created_at", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<BatchJob(id='{self.id}', status='{self.status}', checkpoint={self.checkpoint}/{self.total_items})>"
@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from .base import BaseModel
+
+
+class ChatCacheEntry(BaseModel):
+    __tablename__ = "chat_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 of the canonical request
+    model_id = Column(String(255), nullable=False)
+    response = Column(JSONB, nullable=False)  # Full chat.completion body
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_chat_cache_expires_at", "expires_at"),
+        Index("ix_chat_cache_model_id", "model_id"),
+    )
+
+    def __repr__(self):
+        return f"<ChatCacheEntry(key='{self.key}', model_id='{self.model_id}')>"
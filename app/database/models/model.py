@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, Index, UniqueConstraint
 from .base import BaseModel, TimestampMixin, IDMixin
 
 
@@ -17,9 +17,22 @@ class Model(BaseModel, TimestampMixin, IDMixin):
     output_cost_per_token = Column(Float, nullable=True)  # Cost per output token
     context_window = Column(Integer, nullable=True)  # Context window size
     dimension = Column(Integer, nullable=True)  # For embedding models
+
+    # Admission limits applied by /v1/chat and /v1/embeddings, unlimited when null
+    requests_per_second = Column(Float, nullable=True)
+    tokens_per_minute = Column(Integer, nullable=True)
+    max_concurrency = Column(Integer, nullable=True)
    
     # Metadata
     is_active = Column(Boolean, default=True)
 
+    __table_args__ = (
+        UniqueConstraint("model_id", "provider", name="uq_models_model_id_provider"),
+        Index("ix_models_name", "name"),
+        # Filtered listings walk these in id order, for keyset pagination.
+        Index("ix_models_provider_type_id", "provider", "model_type", "id"),
+        Index("ix_models_type_active_id", "model_type", "is_active", "id"),
+    )
+
     def __repr__(self):
         return f"<AIModel(id={self.id}, name='{self.name}', provider='{self.provider}', model_id='{self.model_id}')>"
\ No newline at end of file
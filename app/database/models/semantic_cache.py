@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, Text, Integer, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from .base import BaseModel, IDMixin
+from ..types import Vector
+
+
+class SemanticCacheEntry(BaseModel, IDMixin):
+    __tablename__ = "semantic_cache"
+
+    scope = Column(String(64), nullable=False)  # sha256 of model, system prompt, tools, sampling parameters and embedding model
+    model_id = Column(String(255), nullable=False)
+    embedding_model_id = Column(String(255), nullable=False)
+    prompt = Column(Text, nullable=False)  # Final user turn that was embedded
+    dimension = Column(Integer, nullable=False)
+    embedding = Column(Vector(), nullable=False)
+    response = Column(JSONB, nullable=False)  # Full chat.completion body
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_semantic_cache_scope", "scope"),
+        Index("ix_semantic_cache_expires_at", "expires_at"),
+    )
+
+    def __repr__(self):
+        return f"<SemanticCacheEntry(id={self.id}, model_id='{self.model_id}', scope='{self.scope}')>"
@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, BigInteger, Integer, String, Float, Boolean, DateTime, Index
+from .base import BaseModel
+
+
+class UsageRecord(BaseModel):
+    __tablename__ = "usage_records"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    request_type = Column(String(20), nullable=False)  # "chat" or "embedding"
+    model = Column(String(255), nullable=False)  # Model name as requested
+    provider = Column(String(100), nullable=False)  # e.g., "openrouter", "local"
+    model_id = Column(String(255), nullable=False)  # Model ID sent to the provider
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    total_tokens = Column(Integer, nullable=False, default=0)
+    cost = Column(Float, nullable=True)  # Unknown when the model has no registered prices
+    latency_ms = Column(Float, nullable=True)
+    cached = Column(Boolean, nullable=False, default=False)  # Served from a cache, no upstream call
+
+    __table_args__ = (
+        Index("ix_usage_records_created_at", "created_at"),
+        Index("ix_usage_records_model_created_at", "model", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<UsageRecord(id={self.id}, model='{self.model}', total_tokens={self.total_tokens})>"
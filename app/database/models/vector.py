@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, BigInteger, Integer, String, Text, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from .base import BaseModel, IDMixin
+from ..types import Vector
+
+
+class VectorCollection(BaseModel, IDMixin):
+    __tablename__ = "vector_collections"
+
+    name = Column(String(100), nullable=False, unique=True)
+    description = Column(Text, nullable=True)
+    embedding_model_id = Column(String(255), nullable=False)  # model_id of an embedding row in models
+    dimension = Column(Integer, nullable=False)  # Taken from that row when the collection is created
+    metric = Column(String(20), nullable=False)  # "cosine" or "inner_product"
+
+    # Approximate index over the collection's documents, see VectorRepository.rebuild_index
+    index_type = Column(String(20), nullable=False)  # "hnsw" or "ivfflat"
+    hnsw_m = Column(Integer, nullable=True)
+    hnsw_ef_construction = Column(Integer, nullable=True)
+    ivfflat_lists = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<VectorCollection(id={self.id}, name='{self.name}', dimension={self.dimension})>"
+
+
+class VectorDocument(BaseModel):
+    __tablename__ = "vector_documents"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    collection_id = Column(Integer, ForeignKey("vector_collections.id", ondelete="CASCADE"), nullable=False)
+    external_id = Column(String(255), nullable=False)  # Document ID given by the client
+    content = Column(Text, nullable=False)  # Text that was embedded
+    meta = Column("metadata", JSONB, nullable=False, default=dict)  # Filterable with containment (@>)
+    embedding = Column(Vector(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        UniqueConstraint("collection_id", "external_id", name="uq_vector_documents_collection_external_id"),
+        Index("ix_vector_documents_metadata", "metadata", postgresql_using="gin", postgresql_ops={"metadata": "jsonb_path_ops"}),
+    )
+
+    def __repr__(self):
+        return f"<VectorDocument(id={self.id}, collection_id={self.collection_id}, external_id='{self.external_id}')>"
@@ -0,0 +1,48 @@
+from typing import Optional, Sequence
+
+from sqlalchemy.types import Float, UserDefinedType
+
+
+class Vector(UserDefinedType):
+    """pgvector ``vector`` column, bound and returned as lists of floats.
+
+    ``dimension`` is optional: an unconstrained column can hold vectors of any
+    size, which is how tables shared by several embedding models are declared.
+    """
+
+    cache_ok = True
+
+    def __init__(self, dimension: Optional[int] = None):
+        self.dimension = dimension
+
+    def get_col_spec(self, **kw) -> str:
+        return f"VECTOR({self.dimension})" if self.dimension else "VECTOR"
+
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is None or isinstance(value, str):
+                return value
+            return to_vector_literal(value)
+        return process
+
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            if value is None or not isinstance(value, str):
+                return value
+            return [float(item) for item in value.strip("[]").split(",") if item]
+        return process
+
+    class comparator_factory(UserDefinedType.Comparator):
+        def cosine_distance(self, other):
+            return self.op("<=>", return_type=Float)(other)
+
+        def l2_distance(self, other):
+            return self.op("<->", return_type=Float)(other)
+
+        def max_inner_product(self, other):
+            return self.op("<#>", return_type=Float)(other)
+
+
+def to_vector_literal(values: Sequence[float]) -> str:
+    """Format a vector as the pgvector text literal ``[x1,x2,...]``."""
+    return "[" + ",".join(repr(float(value)) for value in values) + "]"
@@ -1,8 +1,95 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from app.api.v1 import router_v1
+from app.api.deps import (
+    get_admission_controller,
+    get_batch_runner,
+    get_embedding_model,
+    get_llm_model,
+    get_llm_policy_engine,
+    get_llm_router,
+    get_model_catalog,
+    get_usage_ledger,
+    get_vector_store
+)
+from app.core.config import settings
 from app.core.logging import setup_logging
+from app.core.metrics import metrics
+from app.database import async_engine
+from app.services.startup import preload_embedding_models
 
 setup_logging()
+logger = logging.getLogger(__name__)
+
+
+async def _resume_batches() -> None:
+    # Also takes over jobs of processes that stopped renewing their lease.
+    while True:
+        try:
+            await get_batch_runner().resume()
+        except Exception as e:
+            logger.error(f"[Batch] Could not resume batch jobs: {e}")
+        await asyncio.sleep(settings.batch_lease_seconds)
+
+
+async def _warm_up(app: FastAPI) -> None:
+    try:
+        if settings.embedding_preload:
+            # Ready only once every active model is loaded; /ready shows progress meanwhile.
+            await preload_embedding_models(
+                get_embedding_model(),
+                app.state.models,
+                batch_size=settings.embedding_warmup_batch_size,
+                max_backoff=settings.embedding_preload_max_backoff,
+            )
+        app.state.ready = True
+    except Exception as e:
+        logger.error(f"[Startup] Warm-up failed: {e}")
+        app.state.warmup_error = str(e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    app.state.models = {}
+    app.state.warmup_error = None
+    get_model_catalog().start()
+    # Open the upstream connection pools up front; they are closed on shutdown.
+    get_llm_router()
+    ledger = get_usage_ledger()
+    if ledger is not None:
+        ledger.start()
+    # Warm up in the background so /health answers while models load.
+    warmup = asyncio.create_task(_warm_up(app))
+    resume = asyncio.create_task(_resume_batches())
+
+    yield
+
+    warmup.cancel()
+    resume.cancel()
+    # Let both tasks unwind before the services they use are closed.
+    await asyncio.gather(warmup, resume, return_exceptions=True)
+    # Stop batch workers before the clients they use are closed.
+    await get_batch_runner().close()
+    get_batch_runner.cache_clear()
+    await get_llm_router().close()
+    get_llm_model.cache_clear()
+    get_llm_router.cache_clear()
+    get_llm_policy_engine.cache_clear()
+    get_admission_controller.cache_clear()
+    get_vector_store.cache_clear()
+    await get_embedding_model().close()
+    if ledger is not None:
+        # Last, so usage of requests finishing during shutdown is still written.
+        await ledger.close()
+        get_usage_ledger.cache_clear()
+    await get_model_catalog().close()
+    get_model_catalog.cache_clear()
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title="AI Factory",
@@ -10,6 +97,7 @@ app = FastAPI(
     docs_url="/swagger",
     description="API documentation for AI Factory",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 app.include_router(router_v1)
 
@@ -20,4 +108,19 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/ready")
+async def readiness_check():
+    body = {
+        "status": "ready" if app.state.ready else "starting",
+        "models": app.state.models,
+    }
+    if app.state.warmup_error:
+        body["status"] = "failed"
+        body["error"] = app.state.warmup_error
+    return JSONResponse(content=body, status_code=200 if app.state.ready else 503)
+
+@app.get("/metrics")
+async def metrics_snapshot():
+    return metrics.snapshot()
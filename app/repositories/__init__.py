@@ -1,3 +1,8 @@
-from .model import ModelRepository 
+from .model import ModelRepository, AsyncModelRepository
+from .chat_cache import ChatCacheRepository
+from .semantic_cache import SemanticCacheRepository
+from .usage import UsageRepository
+from .batch import BatchJobRepository
+from .vector import VectorRepository
 
-__all__ = ["ModelRepository"]
\ No newline at end of file
+__all__ = ["ModelRepository", "AsyncModelRepository", "ChatCacheRepository", "SemanticCacheRepository", "UsageRepository", "BatchJobRepository", "VectorRepository"]
\ No newline at end of file
@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Any, Iterable, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
+
+from app.database.models.batch import BatchJob
+
+
+class BatchJobRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create(self, **values: Any) -> BatchJob:
+        """Create a new batch job"""
+        job = BatchJob(**values)
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        """Get a batch job by ID"""
+        return self.db.query(BatchJob).filter(BatchJob.id == job_id).first()
+
+    def get_all(self, skip: int = 0, limit: int = 100, status: Optional[str] = None) -> List[BatchJob]:
+        """Get batch jobs, newest first, with optional status filtering"""
+        query = self.db.query(BatchJob)
+        if status:
+            query = query.filter(BatchJob.status == status)
+        return query.order_by(BatchJob.created_at.desc()).offset(skip).limit(limit).all()
+
+    def get_unclaimed(self, statuses: Iterable[str], now: datetime) -> List[BatchJob]:
+        """Get batch jobs in any of the given statuses that no process holds a live lease on, oldest first"""
+        return self.db.query(BatchJob).filter(and_(
+            BatchJob.status.in_(list(statuses)),
+            or_(BatchJob.owner.is_(None), BatchJob.lease_expires_at < now),
+        )).order_by(BatchJob.created_at).all()
+
+    def claim(
+        self,
+        job_id: str,
+        owner: str,
+        now: datetime,
+        values: dict[str, Any],
+        statuses: Iterable[str]
+    ) -> bool:
+        """Take the lease of a job in one of ``statuses`` unless another owner holds a live one
+
+        The check and the update are a single statement, so of several
+        processes claiming the same job only one succeeds.
+
+        Returns:
+            Whether the lease was taken
+        """
+        condition = and_(
+            BatchJob.id == job_id,
+            BatchJob.status.in_(list(statuses)),
+            or_(BatchJob.owner.is_(None), BatchJob.owner == owner, BatchJob.lease_expires_at < now),
+        )
+        updated = self.db.query(BatchJob).filter(condition).update(
+            {**values, "owner": owner}, synchronize_session=False
+        )
+        self.db.commit()
+        return updated > 0
+
+    def update(
+        self,
+        job_id: str,
+        values: dict[str, Any],
+        statuses: Optional[Iterable[str]] = None,
+        owner: Optional[str] = None
+    ) -> bool:
+        """Update a batch job, only while it is in one of ``statuses`` and leased by ``owner`` when given
+
+        Returns:
+            Whether the job was updated
+        """
+        condition = BatchJob.id == job_id
+        if statuses is not None:
+            condition = and_(condition, BatchJob.status.in_(list(statuses)))
+        if owner is not None:
+            condition = and_(condition, BatchJob.owner == owner)
+        updated = self.db.query(BatchJob).filter(condition).update(values, synchronize_session=False)
+        self.db.commit()
+        return updated > 0
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Any, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import and_
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database.models.chat_cache import ChatCacheEntry
+
+
+class ChatCacheRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, key: str, now: datetime) -> Optional[ChatCacheEntry]:
+        """Get an unexpired cached response by key"""
+        return self.db.query(ChatCacheEntry).filter(
+            and_(ChatCacheEntry.key == key, ChatCacheEntry.expires_at > now)
+        ).first()
+
+    def upsert(self, key: str, model_id: str, response: dict[str, Any], expires_at: datetime) -> None:
+        """Insert or refresh a cached response"""
+        statement = insert(ChatCacheEntry).values(
+            key=key,
+            model_id=model_id,
+            response=response,
+            created_at=datetime.now(expires_at.tzinfo),
+            expires_at=expires_at,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[ChatCacheEntry.key],
+            set_={
+                "response": statement.excluded.response,
+                "created_at": statement.excluded.created_at,
+                "expires_at": statement.excluded.expires_at,
+            },
+        )
+        self.db.execute(statement)
+        self.db.commit()
+
+    def delete_expired(self, now: datetime) -> int:
+        """Delete expired responses, returning how many were removed"""
+        deleted = self.db.query(ChatCacheEntry).filter(
+            ChatCacheEntry.expires_at <= now
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
@@ -1,10 +1,34 @@
-from typing import Optional, List
+import json
+from typing import Any, Optional, List
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, literal_column, or_, select, text, tuple_
 
 from app.database.models.model import Model
 from app.api.schemas.model import ModelCreate, ModelUpdate
 
+# Changes to the models table are announced on this channel, in the writing transaction.
+MODEL_CHANGES_CHANNEL = "model_changes"
+
+
+def _notify(op: str, id: Optional[int] = None):
+    """NOTIFY statement of a change to one row, or "reload" of many; delivered to listeners only on commit."""
+    event = {"op": op} if id is None else {"op": op, "id": id}
+    return select(func.pg_notify(MODEL_CHANGES_CHANNEL, json.dumps(event)))
+
+
+# Models of the feed's providers that are missing from it; the feed keys are bound as two arrays.
+_DEACTIVATE_MISSING = text("""
+    UPDATE models SET is_active = false, updated_at = now()
+    WHERE is_active
+      AND provider = ANY(CAST(:providers AS varchar[]))
+      AND (model_id, provider) NOT IN (
+          SELECT * FROM unnest(CAST(:model_ids AS varchar[]), CAST(:model_providers AS varchar[]))
+      )
+    RETURNING id
+""")
+
 
 class ModelRepository:
     def __init__(self, db: Session):
@@ -14,6 +38,8 @@ class ModelRepository:
         """Create a new AI model"""
         db_model = Model(**model.model_dump())
         self.db.add(db_model)
+        self.db.flush()
+        self.db.execute(_notify("create", db_model.id))
         self.db.commit()
         self.db.refresh(db_model)
         return db_model
@@ -28,15 +54,43 @@ class ModelRepository:
             and_(Model.model_id == model_id, Model.provider == provider)
         ).first()
 
+    def get_active_by_name(self, name: str) -> List[Model]:
+        """Get the active provider endpoints registered under a logical model name"""
+        return self.db.query(Model).filter(
+            and_(Model.name == name, Model.is_active.is_(True))
+        ).all()
+
+    def get_active_by_name_or_model_id(self, name: str) -> List[Model]:
+        """Get the active models registered under a logical name or model_id"""
+        return self.db.query(Model).filter(
+            and_(or_(Model.name == name, Model.model_id == name), Model.is_active.is_(True))
+        ).all()
+
+    def filter_active_model_ids(self, model_ids: List[str], model_type: Optional[str] = None) -> List[str]:
+        """Return the given model_ids or logical model names that are registered and active, preserving order"""
+        if not model_ids:
+            return []
+        query = self.db.query(Model.model_id, Model.name).filter(
+            and_(
+                or_(Model.model_id.in_(model_ids), Model.name.in_(model_ids)),
+                Model.is_active.is_(True)
+            )
+        )
+        if model_type:
+            query = query.filter(Model.model_type == model_type)
+        active = {value for row in query.all() for value in (row.model_id, row.name)}
+        return [model_id for model_id in model_ids if model_id in active]
+
     def get_all(
         self, 
         skip: int = 0, 
         limit: int = 100, 
         provider: Optional[str] = None,
         model_type: Optional[str] = None,
-        is_active: Optional[bool] = None
+        is_active: Optional[bool] = None,
+        after_id: Optional[int] = None
     ) -> List[Model]:
-        """Get all AI models with optional filtering"""
+        """Get all AI models with optional filtering, in id order; pass ``after_id`` instead of ``skip`` to page by keyset"""
         query = self.db.query(Model)
         
         if provider:
@@ -46,8 +100,10 @@ class ModelRepository:
         
         if is_active is not None:
             query = query.filter(Model.is_active == is_active)
+        if after_id is not None:
+            query = query.filter(Model.id > after_id)
             
-        return query.offset(skip).limit(limit).all()
+        return query.order_by(Model.id).offset(skip).limit(limit).all()
 
     def count(
         self, 
@@ -74,6 +130,7 @@ class ModelRepository:
             update_data = ai_model_update.model_dump(exclude_unset=True)
             for field, value in update_data.items():
                 setattr(db_ai_model, field, value)
+            self.db.execute(_notify("update", model_id))
             self.db.commit()
             self.db.refresh(db_ai_model)
         return db_ai_model
@@ -83,10 +140,167 @@ class ModelRepository:
         db_ai_model = self.get_by_id(model_id)
         if db_ai_model:
             self.db.delete(db_ai_model)
+            self.db.execute(_notify("delete", model_id))
             self.db.commit()
             return True
         return False
 
     def soft_delete(self, model_id: int) -> Optional[Model]:
         """Soft delete an AI model (set is_active to False)"""
-        return self.update(model_id, ModelUpdate(is_active=False))
\ No newline at end of file
+        return self.update(model_id, ModelUpdate(is_active=False))
+
+
+class AsyncModelRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, model: ModelCreate) -> Model:
+        """Create a new AI model"""
+        db_model = Model(**model.model_dump())
+        self.db.add(db_model)
+        await self.db.flush()
+        await self.db.execute(_notify("create", db_model.id))
+        await self.db.commit()
+        await self.db.refresh(db_model)
+        return db_model
+
+    async def get_by_id(self, id: int) -> Optional[Model]:
+        """Get AI model by ID"""
+        return await self.db.get(Model, id)
+
+    async def get_by_model_id(self, model_id: str, provider: str) -> Optional[Model]:
+        """Get AI model by model_id and provider"""
+        result = await self.db.execute(
+            select(Model).where(and_(Model.model_id == model_id, Model.provider == provider)).limit(1)
+        )
+        return result.scalars().first()
+
+    async def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        provider: Optional[str] = None,
+        model_type: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        after_id: Optional[int] = None
+    ) -> List[Model]:
+        """Get all AI models with optional filtering, in id order; pass ``after_id`` instead of ``skip`` to page by keyset"""
+        query = self._filtered(select(Model), provider, model_type, is_active)
+        if after_id is not None:
+            query = query.where(Model.id > after_id)
+        result = await self.db.execute(query.order_by(Model.id).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def count(
+        self,
+        provider: Optional[str] = None,
+        model_type: Optional[str] = None,
+        is_active: Optional[bool] = None
+    ) -> int:
+        """Count AI models with optional filtering"""
+        query = self._filtered(select(func.count(Model.id)), provider, model_type, is_active)
+        return (await self.db.execute(query)).scalar_one()
+
+    async def update(self, model_id: int, ai_model_update: ModelUpdate) -> Optional[Model]:
+        """Update an AI model"""
+        db_ai_model = await self.get_by_id(model_id)
+        if db_ai_model:
+            update_data = ai_model_update.model_dump(exclude_unset=True)
+            for field, value in update_data.items():
+                setattr(db_ai_model, field, value)
+            await self.db.execute(_notify("update", model_id))
+            await self.db.commit()
+            await self.db.refresh(db_ai_model)
+        return db_ai_model
+
+    async def delete(self, model_id: int) -> bool:
+        """Delete an AI model"""
+        db_ai_model = await self.get_by_id(model_id)
+        if db_ai_model:
+            await self.db.delete(db_ai_model)
+            await self.db.execute(_notify("delete", model_id))
+            await self.db.commit()
+            return True
+        return False
+
+    async def soft_delete(self, model_id: int) -> Optional[Model]:
+        """Soft delete an AI model (set is_active to False)"""
+        return await self.update(model_id, ModelUpdate(is_active=False))
+
+    async def bulk_upsert(
+        self,
+        models: List[ModelCreate],
+        deactivate_missing: bool = False,
+        chunk_size: int = 500
+    ) -> dict[str, int]:
+        """Insert or update AI models by (model_id, provider), one transaction per chunk
+
+        Existing rows only get the fields an entry sets: fields it leaves out
+        keep their stored values, while new rows take the schema defaults for
+        them. Rows whose values are all the same are left untouched. The last
+        entry of a (model_id, provider) pair given more than once wins.
+
+        Args:
+            models: Models to import
+            deactivate_missing: Also deactivate active models of the imported
+                providers that are not among ``models``
+            chunk_size: Rows per INSERT ... ON CONFLICT statement
+
+        Returns:
+            Number of models created, updated, unchanged and deactivated
+        """
+        latest = {(model.model_id, model.provider): model for model in models}
+        rows = [model.model_dump() for model in latest.values()]
+        # Entries setting the same fields share one statement: ON CONFLICT updates exactly those.
+        groups: dict[frozenset[str], list[dict[str, Any]]] = {}
+        for model, row in zip(latest.values(), rows):
+            groups.setdefault(frozenset(model.model_fields_set), []).append(row)
+
+        summary = {"created": 0, "updated": 0, "unchanged": 0, "deactivated": 0}
+        for fields_set, group in groups.items():
+            columns = sorted(fields_set - {"model_id", "provider"})
+            for start in range(0, len(group), chunk_size):
+                chunk = group[start:start + chunk_size]
+                statement = insert(Model).values(chunk)
+                if columns:
+                    statement = statement.on_conflict_do_update(
+                        constraint="uq_models_model_id_provider",
+                        set_={**{column: statement.excluded[column] for column in columns}, "updated_at": func.now()},
+                        where=tuple_(*(Model.__table__.c[column] for column in columns)).is_distinct_from(
+                            tuple_(*(statement.excluded[column] for column in columns))
+                        ),
+                    )
+                else:
+                    statement = statement.on_conflict_do_nothing(constraint="uq_models_model_id_provider")
+                statement = statement.returning(literal_column("xmax = 0").label("inserted"))
+                # Only inserted and changed rows are returned.
+                written = (await self.db.execute(statement)).scalars().all()
+                created = sum(1 for inserted in written if inserted)
+                summary["created"] += created
+                summary["updated"] += len(written) - created
+                summary["unchanged"] += len(chunk) - len(written)
+                if written:
+                    await self.db.execute(_notify("reload"))
+                await self.db.commit()
+
+        if deactivate_missing and rows:
+            result = await self.db.execute(_DEACTIVATE_MISSING, {
+                "providers": sorted({row["provider"] for row in rows}),
+                "model_ids": [row["model_id"] for row in rows],
+                "model_providers": [row["provider"] for row in rows],
+            })
+            summary["deactivated"] = len(result.all())
+            if summary["deactivated"]:
+                await self.db.execute(_notify("reload"))
+            await self.db.commit()
+        return summary
+
+    @staticmethod
+    def _filtered(query, provider: Optional[str], model_type: Optional[str], is_active: Optional[bool]):
+        if provider:
+            query = query.where(Model.provider == provider)
+        if model_type:
+            query = query.where(Model.model_type == model_type)
+        if is_active is not None:
+            query = query.where(Model.is_active == is_active)
+        return query
@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import Any, Optional, Sequence
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, bindparam, cast, text
+
+from app.database.models.semantic_cache import SemanticCacheEntry
+from app.database.types import Vector
+
+
+class SemanticCacheRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search(
+        self,
+        scope: str,
+        embedding: Sequence[float],
+        now: datetime,
+        ef_search: int = 100
+    ) -> Optional[tuple[SemanticCacheEntry, float]]:
+        """Find the nearest unexpired entry of a scope, returning it with its cosine similarity"""
+        dimension = len(embedding)
+        distance = cast(SemanticCacheEntry.embedding, Vector(dimension)).op("<=>")(
+            cast(bindparam("query", embedding, type_=Vector()), Vector(dimension))
+        )
+        # Keep scanning the graph until enough rows pass the scope filter (pgvector >= 0.8),
+        # in strict distance order so the row returned is the nearest one.
+        self.db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+        self.db.execute(text("SET LOCAL hnsw.iterative_scan = strict_order"))
+        row = self.db.query(SemanticCacheEntry, distance.label("distance")).filter(
+            and_(
+                SemanticCacheEntry.dimension == dimension,
+                SemanticCacheEntry.scope == scope,
+                SemanticCacheEntry.expires_at > now,
+            )
+        ).order_by(distance).limit(1).first()
+        self.db.commit()
+        if row is None:
+            return None
+        entry, distance_value = row
+        return entry, 1.0 - float(distance_value)
+
+    def create(
+        self,
+        scope: str,
+        model_id: str,
+        embedding_model_id: str,
+        prompt: str,
+        embedding: Sequence[float],
+        response: dict[str, Any],
+        expires_at: datetime
+    ) -> SemanticCacheEntry:
+        """Store a completion under the embedding of its prompt"""
+        db_entry = SemanticCacheEntry(
+            scope=scope,
+            model_id=model_id,
+            embedding_model_id=embedding_model_id,
+            prompt=prompt,
+            dimension=len(embedding),
+            embedding=list(embedding),
+            response=response,
+            expires_at=expires_at,
+        )
+        self.db.add(db_entry)
+        self.db.commit()
+        return db_entry
+
+    def delete_expired(self, now: datetime) -> int:
+        """Delete expired entries, returning how many were removed"""
+        deleted = self.db.query(SemanticCacheEntry).filter(
+            SemanticCacheEntry.expires_at <= now
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import Any, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, insert
+
+from app.database.models.usage import UsageRecord
+
+
+class UsageRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def bulk_insert(self, records: List[dict[str, Any]]) -> int:
+        """Insert many usage records in one batched statement"""
+        if not records:
+            return 0
+        self.db.execute(insert(UsageRecord), records)
+        self.db.commit()
+        return len(records)
+
+    def aggregate(
+        self,
+        start: datetime,
+        end: datetime,
+        group_by: str = "model",
+        bucket: Optional[str] = None,
+        request_type: Optional[str] = None
+    ) -> List[dict[str, Any]]:
+        """Sum requests, tokens and cost per model or provider, optionally per time bucket
+
+        Args:
+            start: Inclusive lower bound of ``created_at``
+            end: Exclusive upper bound of ``created_at``
+            group_by: "model" or "provider"
+            bucket: ``date_trunc`` unit ("hour", "day", ...), or None for the whole window
+            request_type: Only count "chat" or "embedding" records
+        """
+        group = UsageRecord.provider if group_by == "provider" else UsageRecord.model
+        columns = [group.label("key")]
+        if bucket:
+            columns.append(func.date_trunc(bucket, UsageRecord.created_at).label("bucket"))
+
+        query = self.db.query(
+            *columns,
+            func.count(UsageRecord.id).label("requests"),
+            func.count(UsageRecord.id).filter(UsageRecord.cached.is_(True)).label("cached_requests"),
+            func.coalesce(func.sum(UsageRecord.prompt_tokens), 0).label("prompt_tokens"),
+            func.coalesce(func.sum(UsageRecord.completion_tokens), 0).label("completion_tokens"),
+            func.coalesce(func.sum(UsageRecord.total_tokens), 0).label("total_tokens"),
+            func.coalesce(func.sum(UsageRecord.cost), 0.0).label("cost"),
+            func.avg(UsageRecord.latency_ms).label("avg_latency_ms"),
+        ).filter(
+            and_(UsageRecord.created_at >= start, UsageRecord.created_at < end)
+        )
+        if request_type:
+            query = query.filter(UsageRecord.request_type == request_type)
+
+        rows = query.group_by(*columns).order_by(*reversed(columns)).all()
+        return [row._asdict() for row in rows]
@@ -0,0 +1,194 @@
+import csv
+import io
+import json
+from typing import Any, List, Optional, Sequence
+from sqlalchemy.orm import Session
+from sqlalchemy import Connection, Float, TextClause, bindparam, cast, text
+
+from app.database.models.vector import VectorCollection, VectorDocument
+from app.database.types import Vector, to_vector_literal
+
+# Operator class of the index and distance operator of queries, per metric.
+_OPERATOR_CLASSES = {"cosine": "vector_cosine_ops", "inner_product": "vector_ip_ops"}
+_DISTANCE_OPERATORS = {"cosine": "<=>", "inner_product": "<#>"}
+
+_UPSERT_FROM_STAGING = text("""
+    INSERT INTO vector_documents (collection_id, external_id, content, metadata, embedding, updated_at)
+    SELECT :collection_id, external_id, content, metadata, embedding, now() FROM vector_staging
+    ON CONFLICT ON CONSTRAINT uq_vector_documents_collection_external_id DO UPDATE SET
+        content = excluded.content,
+        metadata = excluded.metadata,
+        embedding = excluded.embedding,
+        updated_at = excluded.updated_at
+    RETURNING xmax = 0
+""")
+
+
+class VectorRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_collection(self, **values: Any) -> VectorCollection:
+        """Create a collection together with its vector index
+
+        Raises:
+            IntegrityError: If the name is taken
+        """
+        collection = VectorCollection(**values)
+        self.db.add(collection)
+        self.db.commit()
+        self.db.refresh(collection)
+        try:
+            with self._autocommit() as connection:
+                connection.execute(_create_index(collection, _index_name(collection.id)))
+        except BaseException:
+            self.db.delete(collection)
+            self.db.commit()
+            raise
+        return collection
+
+    def get_collection(self, name: str) -> Optional[VectorCollection]:
+        """Get a collection by name"""
+        return self.db.query(VectorCollection).filter(VectorCollection.name == name).first()
+
+    def get_collections(self) -> List[VectorCollection]:
+        """Get all collections by name"""
+        return self.db.query(VectorCollection).order_by(VectorCollection.name).all()
+
+    def delete_collection(self, collection: VectorCollection) -> None:
+        """Delete a collection, its documents and its vector index"""
+        self.db.commit()
+        with self._autocommit() as connection:
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {_index_name(collection.id)}"))
+        self.db.delete(collection)
+        self.db.commit()
+
+    def rebuild_index(self, collection: VectorCollection) -> None:
+        """Rebuild the vector index of a collection, e.g. IVFFlat lists after a bulk load
+
+        The new index is built next to the old one and swapped in, so searches
+        keep their index and writes to other collections are not blocked.
+        """
+        self.db.commit()
+        name = _index_name(collection.id)
+        staging = f"{name}_new"
+        with self._autocommit() as connection:
+            # Left invalid by an interrupted rebuild.
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {staging}"))
+            connection.execute(_create_index(collection, staging))
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            connection.execute(text(f"ALTER INDEX {staging} RENAME TO {name}"))
+
+    def upsert_documents(
+        self, collection_id: int, documents: Sequence[tuple[str, str, dict[str, Any], Sequence[float]]]
+    ) -> tuple[int, int]:
+        """Insert or replace documents by external ID, COPYing them through a staging table
+
+        Args:
+            collection_id: Collection of the documents
+            documents: (external_id, content, metadata, embedding) with unique external IDs
+
+        Returns:
+            Number of documents created and updated
+        """
+        if not documents:
+            return 0, 0
+        connection = self.db.connection()
+        connection.execute(text(
+            "CREATE TEMP TABLE vector_staging "
+            "(external_id text, content text, metadata jsonb, embedding vector) ON COMMIT DROP"
+        ))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+        for external_id, content, metadata, embedding in documents:
+            writer.writerow((external_id, content, json.dumps(metadata), to_vector_literal(embedding)))
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                "COPY vector_staging (external_id, content, metadata, embedding) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+        inserted = self.db.execute(_UPSERT_FROM_STAGING, {"collection_id": collection_id}).scalars().all()
+        self.db.commit()
+        created = sum(1 for value in inserted if value)
+        return created, len(inserted) - created
+
+    def count_documents(self, collection_id: int) -> int:
+        """Count the documents of a collection"""
+        return self.db.query(VectorDocument).filter(VectorDocument.collection_id == collection_id).count()
+
+    def delete_documents(self, collection_id: int, external_ids: List[str]) -> int:
+        """Delete documents by external ID, returning how many were removed"""
+        deleted = self.db.query(VectorDocument).filter(
+            VectorDocument.collection_id == collection_id,
+            VectorDocument.external_id.in_(external_ids)
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
+
+    def search(
+        self,
+        collection: VectorCollection,
+        embedding: Sequence[float],
+        top_k: int = 10,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        ef_search: int = 100,
+        probes: int = 10
+    ) -> List[tuple[str, str, dict[str, Any], float]]:
+        """Find the ``top_k`` nearest documents of a collection as (external_id, content, metadata, distance)
+
+        Args:
+            collection: Collection to search
+            embedding: Query vector of the collection's dimension
+            top_k: Number of documents to return
+            metadata_filter: Only documents whose metadata contains this object
+            ef_search: HNSW candidate list size
+            probes: IVFFlat lists scanned
+        """
+        dimension = collection.dimension
+        # Same expression as the partial index, so the planner can use it.
+        distance = cast(VectorDocument.embedding, Vector(dimension)).op(
+            _DISTANCE_OPERATORS[collection.metric], return_type=Float
+        )(cast(bindparam("query", embedding, type_=Vector()), Vector(dimension)))
+        # Keep scanning until enough rows pass the filters (pgvector >= 0.8).
+        if collection.index_type == "ivfflat":
+            self.db.execute(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
+            self.db.execute(text("SET LOCAL ivfflat.iterative_scan = relaxed_order"))
+        else:
+            self.db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+            self.db.execute(text("SET LOCAL hnsw.iterative_scan = strict_order"))
+        query = self.db.query(
+            VectorDocument.external_id, VectorDocument.content, VectorDocument.meta, distance.label("distance")
+        ).filter(VectorDocument.collection_id == collection.id)
+        if metadata_filter:
+            query = query.filter(VectorDocument.meta.contains(metadata_filter))
+        rows = query.order_by(distance).limit(top_k).all()
+        self.db.commit()
+        if collection.index_type == "ivfflat":
+            # Relaxed order may return rows slightly out of distance order.
+            rows.sort(key=lambda row: row[3])
+        return [(external_id, content, metadata, float(value)) for external_id, content, metadata, value in rows]
+
+    def _autocommit(self) -> Connection:
+        # Concurrent index builds and drops cannot run inside a transaction.
+        return self.db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT")
+
+
+def _create_index(collection: VectorCollection, name: str) -> TextClause:
+    if collection.index_type == "ivfflat":
+        options = f"lists = {int(collection.ivfflat_lists)}"
+    else:
+        options = f"m = {int(collection.hnsw_m)}, ef_construction = {int(collection.hnsw_ef_construction)}"
+    return text(
+        f"CREATE INDEX CONCURRENTLY {name} "
+        f"ON vector_documents USING {collection.index_type} "
+        f"((embedding::vector({int(collection.dimension)})) {_OPERATOR_CLASSES[collection.metric]}) "
+        f"WITH ({options}) WHERE collection_id = {int(collection.id)}"
+    )
+
+
+def _index_name(collection_id: int) -> str:
+    return f"ix_vector_documents_embedding_{int(collection_id)}"
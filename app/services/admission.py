@@ -0,0 +1,340 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Iterable, Literal, Optional
+
+from app.core.config import RateLimitConfig
+from app.core.metrics import metrics
+
+LimitsResolver = Callable[[str], Awaitable[Optional[RateLimitConfig]]]
+
+# Rough characters per token, to charge token buckets before the real count is known.
+_CHARS_PER_TOKEN = 4
+# Limiters unused for this long are forgotten.
+_IDLE_SECONDS = 600.0
+# Limiter shared by model names that are neither configured nor registered, so
+# arbitrary names sent by clients do not each get their own.
+_UNREGISTERED = "*unregistered*"
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request is not admitted; ``retry_after`` is in seconds."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(texts: Iterable[str]) -> int:
+    return sum(len(text) for text in texts) // _CHARS_PER_TOKEN + 1
+
+
+def estimate_chat_tokens(payload: dict[str, Any]) -> int:
+    """Prompt tokens of a chat request, estimated from its text, plus its ``max_tokens``."""
+    texts = []
+    for message in payload.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            texts.append(content)
+        elif isinstance(content, list):
+            texts.extend(part.get("text") or "" for part in content if isinstance(part, dict))
+    return estimate_tokens(texts) + (payload.get("max_tokens") or 0)
+
+
+class TokenBucket:
+    """Bucket holding up to ``capacity`` tokens, refilled at ``rate`` tokens per second.
+
+    Takes may overdraw the bucket: a queued request borrows tokens that have
+    not been refilled yet, so the next one waits behind it.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` tokens are available; requests above capacity wait for a full bucket."""
+        self._refill(now)
+        deficit = min(amount, self.capacity) - self.tokens
+        return max(0.0, deficit / self.rate)
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens -= amount
+
+    def give(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class _Limiter:
+    """Request and token buckets plus a concurrency semaphore of one model or API key."""
+
+    def __init__(self, config: RateLimitConfig):
+        self.config = config
+        self.requests = None
+        if config.requests_per_second:
+            burst = config.burst or max(1.0, config.requests_per_second)
+            self.requests = TokenBucket(config.requests_per_second, burst)
+        self.tokens = None
+        if config.tokens_per_minute:
+            self.tokens = TokenBucket(config.tokens_per_minute / 60, config.tokens_per_minute)
+        self.concurrency = asyncio.Semaphore(config.max_concurrency) if config.max_concurrency else None
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = self.requests.wait_time(1, now)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def take(self, tokens: int, now: float) -> None:
+        if self.requests is not None:
+            self.requests.take(1, now)
+        if self.tokens is not None:
+            self.tokens.take(tokens, now)
+
+    def give(self, requests: int, tokens: int, now: float) -> None:
+        if self.requests is not None and requests:
+            self.requests.give(requests, now)
+        if self.tokens is not None and tokens:
+            self.tokens.give(tokens, now)
+
+
+class Permit:
+    """Admission of one request; release it once the upstream call is done."""
+
+    def __init__(self, limiters: list[_Limiter], tokens: int):
+        self._limiters = limiters
+        self._tokens = tokens
+        self._released = False
+
+    def settle(self, tokens: Optional[int]) -> None:
+        """Correct the token buckets from the estimate to the actual token count."""
+        if not tokens:
+            return
+        difference, self._tokens = tokens - self._tokens, tokens
+        now = time.monotonic()
+        for limiter in self._limiters:
+            if limiter.tokens is None:
+                continue
+            if difference > 0:
+                limiter.tokens.take(difference, now)
+            else:
+                limiter.tokens.give(-difference, now)
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        for limiter in self._limiters:
+            limiter.in_flight -= 1
+            limiter.last_used = time.monotonic()
+            if limiter.concurrency is not None:
+                limiter.concurrency.release()
+
+
+class AdmissionController:
+    """Per-model and per-API-key admission control in front of the model backends.
+
+    Each model and each API key gets a requests/sec token bucket, a tokens/min
+    token bucket and a concurrency semaphore, for whichever limits are set. A
+    request is admitted once every bucket holds its tokens and a slot is free
+    in every semaphore. In ``reject`` mode a request that would have to wait
+    fails right away with ``RateLimitExceeded``; in ``queue`` mode it waits up
+    to ``queue_timeout`` seconds first.
+
+    Token buckets are charged with an estimate up front and settled with the
+    real count once the response reports it.
+
+    Only model names configured in ``models`` or registered in the models
+    table get a limiter of their own; every other name shares a single one
+    with the default limits. Limiters idle for ten minutes are dropped.
+    """
+
+    def __init__(
+        self,
+        resolve_limits: LimitsResolver,
+        default_model: RateLimitConfig,
+        models: dict[str, RateLimitConfig],
+        default_key: RateLimitConfig,
+        keys: dict[str, RateLimitConfig],
+        mode: Literal["reject", "queue"] = "reject",
+        queue_timeout: float = 5.0,
+        catalog_ttl: float = 30.0,
+    ):
+        """Initialize the controller.
+
+        Args:
+            resolve_limits: Coroutine returning the limits of a model from the models table,
+                or None when the model is not registered
+            default_model: Limits of models without their own
+            models: Limits per model name, taking precedence over the models table
+            default_key: Limits of API keys without their own
+            keys: Limits per API key
+            mode: "reject" to fail at once with a Retry-After, "queue" to wait for capacity
+            queue_timeout: Longest wait of a queued request before it is rejected
+            catalog_ttl: Seconds limits read from the models table are cached
+        """
+        self.resolve_limits = resolve_limits
+        self.default_model = default_model
+        self.models = models
+        self.default_key = default_key
+        self.keys = keys
+        self.mode = mode
+        self.queue_timeout = queue_timeout
+        self.catalog_ttl = catalog_ttl
+        self._catalog: dict[str, tuple[float, Optional[RateLimitConfig]]] = {}
+        self._model_limiters: dict[str, _Limiter] = {}
+        self._key_limiters: dict[str, _Limiter] = {}
+        self._last_prune = time.monotonic()
+        self._admitted = metrics.counter("admission.admitted")
+        self._rejected = metrics.counter("admission.rejected")
+        self._queued = metrics.counter("admission.queued")
+        self._queue_wait = metrics.histogram("admission.queue_wait_seconds")
+        self._logger = logging.getLogger(__name__)
+
+    async def acquire(self, model: str, key: str, tokens: int = 0) -> Permit:
+        """Admit a request for ``model`` from ``key`` expected to use ``tokens`` tokens.
+
+        Raises:
+            RateLimitExceeded: If the request is rejected or waited too long
+        """
+        name, config = await self._model_config(model)
+        limiters = [
+            limiter for limiter in (
+                self._limiter(self._model_limiters, name, config),
+                self._limiter(self._key_limiters, key, _merge(self.keys.get(key), self.default_key)),
+            )
+            if limiter is not None
+        ]
+        if not limiters:
+            return Permit([], tokens)
+
+        start = time.monotonic()
+        wait, binding = max(
+            ((limiter.wait_time(tokens, start), limiter) for limiter in limiters), key=lambda item: item[0]
+        )
+        if wait > 0 and (self.mode == "reject" or wait > self.queue_timeout):
+            self._rejected.inc()
+            scope = f"model {model}" if binding is self._model_limiters.get(name) else "API key"
+            raise RateLimitExceeded(f"Rate limit of {scope} exceeded", retry_after=wait)
+
+        for limiter in limiters:
+            limiter.take(tokens, start)
+            limiter.in_flight += 1
+        permit = Permit(limiters, tokens)
+        try:
+            if wait > 0:
+                self._queued.inc()
+                await asyncio.sleep(wait)
+            await self._acquire_slots(model, limiters, start)
+        except BaseException:
+            # Not admitted after all: hand the tokens back and free the slots taken.
+            now = time.monotonic()
+            for limiter in limiters:
+                limiter.give(1, tokens, now)
+                limiter.in_flight -= 1
+            raise
+        self._queue_wait.observe(time.monotonic() - start)
+        self._admitted.inc()
+        return permit
+
+    async def _acquire_slots(self, model: str, limiters: list[_Limiter], start: float) -> None:
+        acquired: list[asyncio.Semaphore] = []
+        try:
+            for limiter in limiters:
+                semaphore = limiter.concurrency
+                if semaphore is None:
+                    continue
+                if self.mode == "reject" and semaphore.locked():
+                    raise RateLimitExceeded(f"Concurrency limit of {model} reached")
+                remaining = self.queue_timeout - (time.monotonic() - start)
+                try:
+                    await asyncio.wait_for(semaphore.acquire(), max(remaining, 0))
+                except asyncio.TimeoutError:
+                    raise RateLimitExceeded(f"Concurrency limit of {model} reached") from None
+                acquired.append(semaphore)
+        except RateLimitExceeded:
+            self._rejected.inc()
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+
+    async def _model_config(self, model: str) -> tuple[str, RateLimitConfig]:
+        """Name of the limiter admitting ``model`` and its limits."""
+        cached = self._catalog.get(model)
+        if cached is None or time.monotonic() - cached[0] >= self.catalog_ttl:
+            try:
+                limits = await self.resolve_limits(model)
+            except Exception as e:
+                self._logger.warning(f"[Admission] Could not resolve limits of {model}: {e}")
+                limits = cached[1] if cached is not None else None
+            if limits is None and model not in self.models:
+                self._catalog.pop(model, None)
+                return _UNREGISTERED, self.default_model
+            cached = self._catalog[model] = (time.monotonic(), limits)
+        return model, _merge(self.models.get(model), cached[1], self.default_model)
+
+    def _limiter(self, limiters: dict[str, _Limiter], name: str, config: RateLimitConfig) -> Optional[_Limiter]:
+        self._prune()
+        limiter = limiters.get(name)
+        if limiter is None or limiter.config != config:
+            if not any(value is not None for value in config.model_dump().values()):
+                limiters.pop(name, None)
+                return None
+            # Permits of a replaced limiter still release into it.
+            limiter = limiters[name] = _Limiter(config)
+        limiter.last_used = time.monotonic()
+        return limiter
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        for limiters in (self._model_limiters, self._key_limiters):
+            for name, limiter in list(limiters.items()):
+                if limiter.in_flight == 0 and now - limiter.last_used > _IDLE_SECONDS:
+                    del limiters[name]
+        for model, (resolved_at, _) in list(self._catalog.items()):
+            if now - resolved_at >= self.catalog_ttl:
+                del self._catalog[model]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "models": {
+                name: {"in_flight": limiter.in_flight, "config": limiter.config.model_dump(exclude_none=True)}
+                for name, limiter in self._model_limiters.items()
+            },
+            "keys": len(self._key_limiters),
+            "admitted": self._admitted.value,
+            "queued": self._queued.value,
+            "rejected": self._rejected.value,
+        }
+
+
+def _merge(*configs: Optional[RateLimitConfig]) -> RateLimitConfig:
+    """Per limit, the first config that sets it."""
+    merged: dict[str, Any] = {}
+    for config in configs:
+        if config is None:
+            continue
+        for field, value in config.model_dump().items():
+            if merged.get(field) is None:
+                merged[field] = value
+    return RateLimitConfig(**merged)
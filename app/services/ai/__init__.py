@@ -1,9 +1,11 @@
 from .base import BaseModel
 from .embedded import EmbeddingModel
 from .llm import LLMModel
+from .workers import ProcessEmbeddingModel
 
 __all__ = [
     "BaseModel",
     "EmbeddingModel",
-    "LLMModel"
+    "LLMModel",
+    "ProcessEmbeddingModel"
 ]
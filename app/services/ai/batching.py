@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+from app.core.metrics import metrics
+from .errors import OverloadedError
+
+FILL_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+@dataclass
+class _PendingRequest:
+    inputs: list[str]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class MicroBatcher:
+    """Merges inputs of concurrent requests into a single encode call.
+
+    Requests are queued and a worker task drains the queue, filling a batch until
+    it holds ``max_batch_size`` inputs or ``max_wait_ms`` has passed since the
+    first request arrived. The per-row results are then split back per request
+    in input order.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run_batch: Callable[[list[str]], Awaitable[tuple[np.ndarray, ...]]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 1024,
+    ):
+        """Initialize the batcher. The worker task starts on first submit.
+
+        Args:
+            name: Label used in logs and metrics
+            run_batch: Coroutine function encoding a list of texts into a tuple of
+                per-row arrays, e.g. embeddings and token counts
+            max_batch_size: Maximum number of inputs merged into one batch
+            max_wait_ms: Maximum time to wait for a batch to fill
+            max_queue_size: Maximum number of requests waiting for a batch
+        """
+        self.name = name
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue[_PendingRequest] = asyncio.Queue(maxsize=max_queue_size)
+        self._carry: Optional[_PendingRequest] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._queue_wait = metrics.histogram("embedding.batch.queue_wait_seconds")
+        self._batch_fill = metrics.histogram("embedding.batch.fill_ratio", FILL_BUCKETS)
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def submit(self, inputs: list[str]) -> tuple[np.ndarray, ...]:
+        """Queue inputs for the next batch and wait for their rows of the result.
+
+        Raises:
+            OverloadedError: If the queue is full
+        """
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and self._worker.get_loop() is not loop:
+            # Queue and worker are bound to the loop that created them.
+            self._queue = asyncio.Queue(maxsize=self._queue.maxsize)
+            self._carry, self._worker = None, None
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+        request = _PendingRequest(inputs=inputs, future=loop.create_future())
+        try:
+            self._queue.put_nowait(request)
+        except asyncio.QueueFull:
+            raise OverloadedError(f"Embedding queue for {self.name} is full")
+        return await request.future
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+    async def _next_batch(self) -> list[_PendingRequest]:
+        first = self._carry or await self._queue.get()
+        self._carry = None
+        batch, size = [first], len(first.inputs)
+        deadline = first.enqueued_at + self.max_wait
+
+        while size < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0 and self._queue.empty():
+                break
+            try:
+                request = (
+                    self._queue.get_nowait() if timeout <= 0
+                    else await asyncio.wait_for(self._queue.get(), timeout)
+                )
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+            if size + len(request.inputs) > self.max_batch_size:
+                self._carry = request
+                break
+            batch.append(request)
+            size += len(request.inputs)
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            batch = [request for request in batch if not request.future.done()]
+            if not batch:
+                continue
+
+            now = time.perf_counter()
+            texts: list[str] = []
+            for request in batch:
+                self._queue_wait.observe(now - request.enqueued_at)
+                texts.extend(request.inputs)
+            self._batch_fill.observe(min(1.0, len(texts) / self.max_batch_size))
+
+            try:
+                results = await self.run_batch(texts)
+            except Exception as e:
+                self._logger.error(f"[Batcher] {self.name} batch of {len(texts)} failed: {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+
+            offset = 0
+            for request in batch:
+                end = offset + len(request.inputs)
+                if not request.future.done():
+                    request.future.set_result(tuple(part[offset:end] for part in results))
+                offset = end
@@ -0,0 +1,72 @@
+from typing import Any
+
+import numpy as np
+
+
+def token_lengths(model: Any, inputs: list[str]) -> np.ndarray:
+    """Count the tokens each input occupies after truncation, special tokens included."""
+    encoded = model.tokenizer(
+        inputs,
+        add_special_tokens=True,
+        truncation=True,
+        max_length=model.max_seq_length,
+    )
+    return np.fromiter((len(ids) for ids in encoded["input_ids"]), dtype=np.int64, count=len(inputs))
+
+
+def plan_batches(lengths: np.ndarray, max_batch_tokens: int) -> list[np.ndarray]:
+    """Group input indexes into batches whose padded size fits the token budget.
+
+    Inputs are sorted longest first, so every batch is padded to the length of
+    its first member and holds as many inputs as ``max_batch_tokens`` allows.
+    """
+    order = np.argsort(-lengths, kind="stable")
+    batches: list[np.ndarray] = []
+    start = 0
+    while start < len(order):
+        padded_length = max(int(lengths[order[start]]), 1)
+        size = max(1, max_batch_tokens // padded_length)
+        batches.append(order[start:start + size])
+        start += size
+    return batches
+
+
+def encode_bucketed(
+    model: Any,
+    inputs: list[str],
+    normalize_embeddings: bool,
+    max_batch_tokens: int,
+    **kwargs
+) -> tuple[np.ndarray, np.ndarray]:
+    """Encode inputs in length-sorted batches bounded by a token budget.
+
+    Args:
+        model: Loaded SentenceTransformer
+        inputs: Texts to embed
+        normalize_embeddings: Whether to normalize embeddings
+        max_batch_tokens: Upper bound on batch size times padded sequence length
+        **kwargs: Additional parameters for model.encode()
+
+    Returns:
+        The float32 embedding matrix and the token count of each input, both in
+        input order
+    """
+    kwargs.pop("batch_size", None)
+    if not inputs:
+        dimension = model.get_sentence_embedding_dimension()
+        return np.empty((0, dimension), dtype=np.float32), np.empty(0, dtype=np.int64)
+
+    lengths = token_lengths(model, inputs)
+
+    embeddings = None
+    for batch in plan_batches(lengths, max_batch_tokens):
+        encoded = model.encode(
+            [inputs[i] for i in batch],
+            batch_size=len(batch),
+            normalize_embeddings=normalize_embeddings,
+            **kwargs
+        )
+        if embeddings is None:
+            embeddings = np.empty((len(inputs), encoded.shape[1]), dtype=np.float32)
+        embeddings[batch] = encoded
+    return embeddings, lengths
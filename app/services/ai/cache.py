@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from app.core.metrics import metrics
+
+# (model_id, backend, normalized, sha256(text)): backends differ slightly in their output.
+CacheKey = tuple[str, str, bool, bytes]
+# Cached vector and the number of tokens its text occupied.
+CacheEntry = tuple[np.ndarray, int]
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class _SQLiteTier:
+    """Persistent tier storing float32 vectors as blobs in a local SQLite file."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Earlier layouts lack the backend, and possibly real token counts, of
+        # their rows: start over rather than serve vectors of unknown origin.
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+        if columns and "backend" not in columns:
+            self._conn.execute("DROP TABLE embeddings")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model_id TEXT NOT NULL,"
+            " backend TEXT NOT NULL,"
+            " normalized INTEGER NOT NULL,"
+            " text_hash BLOB NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " tokens INTEGER NOT NULL,"
+            " PRIMARY KEY (model_id, backend, normalized, text_hash)"
+            ") WITHOUT ROWID"
+        )
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: list[CacheKey]) -> dict[CacheKey, CacheEntry]:
+        found: dict[CacheKey, CacheEntry] = {}
+        with self._lock:
+            for model_id, backend, normalized, digest in keys:
+                row = self._conn.execute(
+                    "SELECT vector, tokens FROM embeddings"
+                    " WHERE model_id = ? AND backend = ? AND normalized = ? AND text_hash = ?",
+                    (model_id, backend, int(normalized), digest),
+                ).fetchone()
+                if row is not None:
+                    found[(model_id, backend, normalized, digest)] = (
+                        np.frombuffer(row[0], dtype=np.float32), row[1]
+                    )
+        return found
+
+    def put_many(self, items: list[tuple[CacheKey, CacheEntry]]) -> None:
+        rows = [
+            (model_id, backend, int(normalized), digest, vector.astype(np.float32).tobytes(), tokens)
+            for (model_id, backend, normalized, digest), (vector, tokens) in items
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings"
+                " (model_id, backend, normalized, text_hash, vector, tokens)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+
+    def invalidate(self, model_id: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM embeddings WHERE model_id = ?", (model_id,)
+            ).rowcount
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache with an in-process LRU and an optional disk tier.
+
+    Entries are keyed on (model_id, backend, normalize flag, sha256(text)) and
+    store the float32 vector together with the token count of the text, so a
+    model's vectors are not served again after its backend changed.
+    """
+
+    def __init__(self, max_entries: int = 100_000, path: Optional[str] = None):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of vectors kept in the in-memory tier
+            path: SQLite file for the persistent tier, disabled when None
+        """
+        self.max_entries = max_entries
+        self._memory: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        self._disk = _SQLiteTier(path) if path else None
+        self._memory_hits = metrics.counter("embedding.cache.memory_hits")
+        self._disk_hits = metrics.counter("embedding.cache.disk_hits")
+        self._misses = metrics.counter("embedding.cache.misses")
+
+    async def get_many(
+        self, model_id: str, backend: str, normalized: bool, texts: list[str]
+    ) -> list[Optional[CacheEntry]]:
+        """Look up (vector, tokens) entries for ``texts``, returning None for each miss."""
+        keys = [(model_id, backend, normalized, text_digest(text)) for text in texts]
+        results: list[Optional[CacheEntry]] = []
+        for key in keys:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._memory_hits.inc()
+            results.append(entry)
+
+        missing = [key for key, entry in zip(keys, results) if entry is None]
+        if missing and self._disk is not None:
+            found = await asyncio.to_thread(self._disk.get_many, missing)
+            for index, key in enumerate(keys):
+                if results[index] is None and key in found:
+                    results[index] = found[key]
+                    self._disk_hits.inc()
+                    self._remember(key, found[key])
+
+        self._misses.inc(sum(1 for entry in results if entry is None))
+        return results
+
+    async def put_many(
+        self,
+        model_id: str,
+        backend: str,
+        normalized: bool,
+        texts: list[str],
+        vectors: np.ndarray,
+        token_counts: np.ndarray,
+    ) -> None:
+        items = [
+            (
+                (model_id, backend, normalized, text_digest(text)),
+                (np.asarray(vector, dtype=np.float32), int(tokens)),
+            )
+            for text, vector, tokens in zip(texts, vectors, token_counts)
+        ]
+        for key, entry in items:
+            self._remember(key, entry)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.put_many, items)
+
+    async def invalidate(self, model_id: str) -> int:
+        """Drop every cached vector of a model, whatever its backend, from both tiers.
+
+        Returns:
+            Number of entries removed
+        """
+        keys = [key for key in self._memory if key[0] == model_id]
+        for key in keys:
+            del self._memory[key]
+        removed = len(keys)
+        if self._disk is not None:
+            removed = max(removed, await asyncio.to_thread(self._disk.invalidate, model_id))
+        return removed
+
+    def stats(self) -> dict:
+        memory_hits = self._memory_hits.value
+        disk_hits = self._disk_hits.value
+        lookups = memory_hits + disk_hits + self._misses.value
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "hit_ratio": (memory_hits + disk_hits) / lookups if lookups else None,
+            "memory_hit_ratio": memory_hits / lookups if lookups else None,
+            "disk_enabled": self._disk is not None,
+        }
+
+    def _remember(self, key: CacheKey, entry: CacheEntry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
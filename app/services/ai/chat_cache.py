@@ -0,0 +1,255 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from app.core.metrics import metrics
+from app.database import SessionLocal
+from app.repositories import ChatCacheRepository
+from .singleflight import payload_digest
+
+# Fields that change how the response is delivered but not what it contains.
+_DELIVERY_FIELDS = ("stream",)
+# How often expired rows are purged from the persistent tier.
+_PURGE_INTERVAL_SECONDS = 300.0
+
+
+def is_cacheable(payload: dict[str, Any]) -> bool:
+    """Only deterministic requests are cached: temperature must be explicitly 0."""
+    return payload.get("temperature") == 0
+
+
+def chat_cache_key(payload: dict[str, Any]) -> str:
+    """Canonical sha256 of a chat request: model, messages, tools and sampling params."""
+    return payload_digest({k: v for k, v in payload.items() if k not in _DELIVERY_FIELDS})
+
+
+def replay_as_sse(response: dict[str, Any]) -> list[bytes]:
+    """Turn a cached chat.completion into the SSE events of an equivalent stream."""
+    base = {
+        "id": response.get("id"),
+        "object": "chat.completion.chunk",
+        "created": response.get("created"),
+        "model": response.get("model"),
+    }
+    events = []
+    for choice in response.get("choices", []):
+        events.append({
+            **base,
+            "choices": [{
+                "index": choice.get("index", 0),
+                "delta": choice.get("message", {}),
+                "finish_reason": None,
+            }],
+        })
+        events.append({
+            **base,
+            "choices": [{
+                "index": choice.get("index", 0),
+                "delta": {},
+                "finish_reason": choice.get("finish_reason"),
+            }],
+        })
+    if response.get("usage"):
+        events.append({**base, "choices": [], "usage": response["usage"]})
+    return [f"data: {json.dumps(event)}\n\n".encode("utf-8") for event in events] + [b"data: [DONE]\n\n"]
+
+
+class StreamAccumulator:
+    """Rebuild a chat.completion from the raw SSE bytes of a streamed response.
+
+    Chunks may split events anywhere; incomplete lines are buffered until the
+    rest arrives. Only text deltas are assembled; streams carrying tool calls
+    or without a finish reason are reported as incomplete and not cached.
+    """
+
+    def __init__(self):
+        self._buffer = b""
+        self._meta: dict[str, Any] = {}
+        self._choices: dict[int, dict[str, Any]] = {}
+        self._usage: Optional[dict[str, Any]] = None
+        self._cacheable = True
+
+    def feed(self, chunk: bytes) -> None:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        lines = (self._buffer + chunk).split(b"\n")
+        self._buffer = lines.pop()
+        for line in lines:
+            self._feed_line(line.decode("utf-8", errors="replace").rstrip("\r"))
+
+    def _feed_line(self, line: str) -> None:
+        if not line.startswith("data:"):
+            return
+        data = line[len("data:"):].strip()
+        if not data or data == "[DONE]":
+            return
+        try:
+            chunk = json.loads(data)
+        except json.JSONDecodeError:
+            self._cacheable = False
+            return
+        self._feed_chunk(chunk)
+
+    def _feed_chunk(self, chunk: dict[str, Any]) -> None:
+        for field in ("id", "created", "model"):
+            if field in chunk:
+                self._meta.setdefault(field, chunk[field])
+        if chunk.get("usage"):
+            self._usage = chunk["usage"]
+        for choice in chunk.get("choices", []):
+            delta = choice.get("delta") or {}
+            if delta.get("tool_calls") or delta.get("function_call"):
+                self._cacheable = False
+            state = self._choices.setdefault(
+                choice.get("index", 0), {"role": "assistant", "content": "", "finish_reason": None}
+            )
+            state["role"] = delta.get("role") or state["role"]
+            state["content"] += delta.get("content") or ""
+            if choice.get("finish_reason"):
+                state["finish_reason"] = choice["finish_reason"]
+
+    @property
+    def usage(self) -> Optional[dict[str, Any]]:
+        """Usage reported by the stream so far, if any."""
+        return self._usage
+
+    @property
+    def content(self) -> str:
+        """Text generated so far, over all choices."""
+        return "".join(state["content"] for state in self._choices.values())
+
+    def result(self) -> Optional[dict[str, Any]]:
+        if self._buffer:
+            self._feed_line(self._buffer.decode("utf-8", errors="replace"))
+            self._buffer = b""
+        if not self._cacheable or not self._choices:
+            return None
+        if any(state["finish_reason"] is None for state in self._choices.values()):
+            return None
+        response = {
+            **self._meta,
+            "object": "chat.completion",
+            "choices": [
+                {
+                    "index": index,
+                    "message": {"role": state["role"], "content": state["content"]},
+                    "finish_reason": state["finish_reason"],
+                }
+                for index, state in sorted(self._choices.items())
+            ],
+        }
+        if self._usage:
+            response["usage"] = self._usage
+        return response
+
+
+class _PostgresTier:
+    """Persistent tier storing responses in the ``chat_cache`` table."""
+
+    def __init__(self):
+        self._last_purge = 0.0
+
+    def get(self, key: str) -> Optional[tuple[dict[str, Any], float]]:
+        db = SessionLocal()
+        try:
+            entry = ChatCacheRepository(db).get(key, datetime.now(timezone.utc))
+            if entry is None:
+                return None
+            return entry.response, entry.expires_at.timestamp()
+        finally:
+            db.close()
+
+    def put(self, key: str, model_id: str, response: dict[str, Any], expires_at: float) -> None:
+        db = SessionLocal()
+        try:
+            repository = ChatCacheRepository(db)
+            repository.upsert(
+                key, model_id, response, datetime.fromtimestamp(expires_at, timezone.utc)
+            )
+            if time.time() - self._last_purge > _PURGE_INTERVAL_SECONDS:
+                self._last_purge = time.time()
+                repository.delete_expired(datetime.now(timezone.utc))
+        finally:
+            db.close()
+
+
+class ChatResponseCache:
+    """Exact-match cache of chat completions with an in-process LRU and an optional Postgres tier.
+
+    Entries are keyed on ``chat_cache_key`` of the request and expire after
+    ``ttl_seconds`` in both tiers. Failures of the Postgres tier are logged and
+    treated as misses so they never fail a request.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 86_400, persistent: bool = False):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of responses kept in the in-memory tier
+            ttl_seconds: Lifetime of a cached response
+            persistent: Also store responses in the ``chat_cache`` table
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+        self._db = _PostgresTier() if persistent else None
+        self._memory_hits = metrics.counter("chat.cache.memory_hits")
+        self._db_hits = metrics.counter("chat.cache.db_hits")
+        self._misses = metrics.counter("chat.cache.misses")
+        self._logger = logging.getLogger(__name__)
+
+    async def get(self, key: str) -> Optional[dict[str, Any]]:
+        """Return the cached response for ``key``, or None on a miss."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            response, expires_at = entry
+            if expires_at > time.time():
+                self._memory.move_to_end(key)
+                self._memory_hits.inc()
+                return response
+            del self._memory[key]
+
+        if self._db is not None:
+            try:
+                found = await asyncio.to_thread(self._db.get, key)
+            except Exception as e:
+                self._logger.warning(f"[ChatCache] Lookup failed: {e}")
+                found = None
+            if found is not None:
+                self._db_hits.inc()
+                self._remember(key, found)
+                return found[0]
+
+        self._misses.inc()
+        return None
+
+    async def put(self, key: str, model_id: str, response: dict[str, Any]) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, (response, expires_at))
+        if self._db is not None:
+            try:
+                await asyncio.to_thread(self._db.put, key, model_id, response, expires_at)
+            except Exception as e:
+                self._logger.warning(f"[ChatCache] Store failed: {e}")
+
+    def stats(self) -> dict:
+        memory_hits = self._memory_hits.value
+        db_hits = self._db_hits.value
+        lookups = memory_hits + db_hits + self._misses.value
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_ratio": (memory_hits + db_hits) / lookups if lookups else None,
+            "persistent": self._db is not None,
+        }
+
+    def _remember(self, key: str, entry: tuple[dict[str, Any], float]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
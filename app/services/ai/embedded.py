@@ -1,51 +1,259 @@
-from sentence_transformers import SentenceTransformer
-import asyncio
-from typing import Any
+from dataclasses import dataclass
+from typing import Any, Optional
 from .base import BaseModel
+from .batching import MicroBatcher
+from .bucketing import encode_bucketed
+from .cache import EmbeddingCache
+from .executor import InferenceExecutor, configure_torch_threads
+from .parity import ParityReport, check_parity
+from .registry import Backend, ModelRegistry
+from .singleflight import SingleFlight, payload_digest
+import numpy as np
 import os
 
 
+@dataclass
+class EmbeddingResult:
+    embeddings: np.ndarray
+    prompt_tokens: int = 0
+    cache_hits: int = 0
+
+
 class EmbeddingModel(BaseModel):
     """AI model for generating embeddings using SentenceTransformer."""
-    
-    def __init__(self, device: str = "cpu"):
+
+    def __init__(
+        self,
+        device: str = "cpu",
+        models_dir: Optional[str] = None,
+        memory_budget_bytes: int = 4 * 1024 ** 3,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 1024,
+        cache: Optional[EmbeddingCache] = None,
+        executor_workers: int = 1,
+        executor_max_pending: int = 32,
+        torch_num_threads: Optional[int] = None,
+        max_batch_tokens: int = 16384,
+        default_backend: Backend = "torch",
+        backends: Optional[dict[str, Backend]] = None,
+        onnx_int8_file: str = "onnx/model_qint8_avx512_vnni.onnx",
+    ):
         """Initialize embedding model without loading any specific model.
-        
+
         Args:
             device: Device to run model on ('cpu', 'cuda', 'mps', etc.)
+            models_dir: Directory holding the local models, defaults to ``./models``
+            memory_budget_bytes: RAM budget for models kept resident by the registry
+            max_batch_size: Maximum number of inputs merged into one forward pass
+            max_wait_ms: Maximum time a request waits for its batch to fill
+            max_queue_size: Maximum number of requests queued per model
+            cache: Embedding cache consulted before encoding, disabled when None
+            executor_workers: Inference threads dedicated to each model
+            executor_max_pending: Encode jobs allowed in flight per model before shedding load
+            torch_num_threads: Explicit torch intra-op thread count, by default the CPU count
+                divided among the executor threads of the resident models
+            max_batch_tokens: Token budget of one forward pass (batch size x padded length)
+            default_backend: Inference backend ('torch', 'int8', 'onnx', 'onnx_int8')
+            backends: Per-model backend overrides, keyed by model ID
+            onnx_int8_file: Quantized ONNX graph used by the 'onnx_int8' backend
         """
         self.device = device
+        base = os.path.dirname(os.path.abspath(__file__))
+        self.registry = ModelRegistry(
+            models_dir=models_dir or os.path.join(base, "models"),
+            device=device,
+            memory_budget_bytes=memory_budget_bytes,
+            default_backend=default_backend,
+            backends=backends,
+            onnx_int8_file=onnx_int8_file,
+        )
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue_size = max_queue_size
+        self.cache = cache
+        self.executor_workers = executor_workers
+        self.executor_max_pending = executor_max_pending
+        self.torch_num_threads = torch_num_threads
+        self.max_batch_tokens = max_batch_tokens
+        self._batchers: dict[tuple[str, bool], MicroBatcher] = {}
+        self._executors: dict[str, InferenceExecutor] = {}
+        self._parity_executor: Optional[InferenceExecutor] = None
+        self._torch_workers = 0
+        self._flight = SingleFlight("embedding")
 
 
     async def infer(
-        self, 
-        inputs: list[str], 
+        self,
+        inputs: list[str],
         model_id: str = "all-MiniLM-L6-v2",
         normalize_embeddings: bool = True,
         **kwargs
-    ) -> list[list[float]]:
+    ) -> EmbeddingResult:
         """Generate embeddings for the given inputs.
-        
+
+        Requests without extra ``encode`` parameters are coalesced with
+        identical requests in flight and served from the cache where possible;
+        the remaining texts go through the per-model micro-batcher and share
+        forward passes with concurrent requests. Each merged batch is sorted by
+        token length and split by a token budget.
+
         Args:
             inputs: Input string or list of strings to embed
             model_id: SentenceTransformer model ID to use
             normalize_embeddings: Whether to normalize embeddings
             **kwargs: Additional parameters for model.encode()
-            
+
         Returns:
-            List of embeddings, each embedding is a list of floats
+            EmbeddingResult holding a float32 matrix with one row per input, in input order
         """
         if isinstance(inputs, str):
             inputs = [inputs]
-        
-        base = os.path.dirname(os.path.abspath(__file__))
 
-        model = SentenceTransformer(f"{base}/models/{model_id}", device=self.device)
-        
-        # Run encoding in executor to avoid blocking
-        loop = asyncio.get_event_loop()
-        embeddings = await loop.run_in_executor(
-            None, 
-            lambda: model.encode(inputs, normalize_embeddings=normalize_embeddings, **kwargs)
+        if kwargs:
+            embeddings, token_counts = await self._encode(
+                inputs, model_id, normalize_embeddings, **kwargs
+            )
+            return EmbeddingResult(embeddings=embeddings, prompt_tokens=int(token_counts.sum()))
+
+        key = (model_id, normalize_embeddings, payload_digest(inputs))
+        return await self._flight.do(
+            key, lambda: self._infer(inputs, model_id, normalize_embeddings)
+        )
+
+    async def _infer(
+        self, inputs: list[str], model_id: str, normalize_embeddings: bool
+    ) -> EmbeddingResult:
+        if self.cache is None:
+            embeddings, token_counts = await self._get_batcher(
+                model_id, normalize_embeddings
+            ).submit(inputs)
+            return EmbeddingResult(embeddings=embeddings, prompt_tokens=int(token_counts.sum()))
+
+        backend = self.registry.backend_for(model_id)
+        cached = await self.cache.get_many(model_id, backend, normalize_embeddings, inputs)
+        missing = list(dict.fromkeys(
+            text for text, entry in zip(inputs, cached) if entry is None
+        ))
+
+        computed: dict[str, tuple[np.ndarray, int]] = {}
+        if missing:
+            vectors, token_counts = await self._get_batcher(
+                model_id, normalize_embeddings
+            ).submit(missing)
+            await self.cache.put_many(
+                model_id, backend, normalize_embeddings, missing, vectors, token_counts
+            )
+            computed = {
+                text: (vector, int(tokens))
+                for text, vector, tokens in zip(missing, vectors, token_counts)
+            }
+
+        entries = [
+            entry if entry is not None else computed[text]
+            for text, entry in zip(inputs, cached)
+        ]
+        return EmbeddingResult(
+            embeddings=np.stack([vector for vector, _ in entries]).astype(np.float32, copy=False),
+            prompt_tokens=sum(tokens for _, tokens in entries),
+            cache_hits=sum(1 for entry in cached if entry is not None),
+        )
+
+    async def warm_up(self, model_id: str, batch_size: int = 8) -> None:
+        """Load a model and run a synthetic batch through the full encode path.
+
+        The batch bypasses the cache so that first-call allocations and kernel
+        selection happen before real traffic arrives.
+        """
+        texts = [f"Warm-up sentence number {i} for the embedding model." for i in range(batch_size)]
+        await self._encode(texts, model_id, True)
+
+    async def parity(
+        self, model_id: str, backend: Backend, texts: Optional[list[str]] = None
+    ) -> ParityReport:
+        """Compare ``backend`` against fp32 PyTorch.
+
+        Checks run one at a time on an executor of their own, so loading and
+        encoding with two detached models never holds up serving requests.
+
+        Raises:
+            OverloadedError: If another check is running
+        """
+        if not os.path.isdir(self.registry.model_path(model_id)):
+            raise FileNotFoundError(f"Embedding model '{model_id}' not found in {self.registry.models_dir}")
+        if self._parity_executor is None:
+            self._parity_executor = InferenceExecutor(name="parity", max_workers=1, max_pending=1)
+        return await check_parity(self.registry, self._parity_executor, model_id, backend, texts)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "batchers": {
+                f"{model_id}:{'normalized' if normalize else 'raw'}": {
+                    "queue_depth": batcher.queue_depth
+                }
+                for (model_id, normalize), batcher in self._batchers.items()
+            },
+            "executors": {
+                model_id: executor.stats() for model_id, executor in self._executors.items()
+            },
+            "singleflight": self._flight.stats(),
+        }
+
+    async def close(self) -> None:
+        for batcher in self._batchers.values():
+            await batcher.close()
+        self._batchers.clear()
+        for executor in self._executors.values():
+            executor.shutdown()
+        self._executors.clear()
+        if self._parity_executor is not None:
+            self._parity_executor.shutdown()
+            self._parity_executor = None
+
+    def _get_executor(self, model_id: str) -> InferenceExecutor:
+        executor = self._executors.get(model_id)
+        if executor is None:
+            executor = self._executors[model_id] = InferenceExecutor(
+                name=model_id,
+                max_workers=self.executor_workers,
+                max_pending=self.executor_max_pending,
+            )
+        return executor
+
+    def _configure_threads(self) -> None:
+        # Each resident model has its own executor, so this many threads may run at once.
+        workers = self.executor_workers * max(1, self.registry.resident_count)
+        if workers != self._torch_workers:
+            self._torch_workers = workers
+            configure_torch_threads(total_workers=workers, num_threads=self.torch_num_threads)
+
+    def _get_batcher(self, model_id: str, normalize_embeddings: bool) -> MicroBatcher:
+        key = (model_id, normalize_embeddings)
+        batcher = self._batchers.get(key)
+        if batcher is None:
+            batcher = self._batchers[key] = MicroBatcher(
+                name=model_id,
+                run_batch=lambda texts: self._encode(texts, model_id, normalize_embeddings),
+                max_batch_size=self.max_batch_size,
+                max_wait_ms=self.max_wait_ms,
+                max_queue_size=self.max_queue_size,
+            )
+        return batcher
+
+    async def _encode(
+        self,
+        inputs: list[str],
+        model_id: str,
+        normalize_embeddings: bool,
+        **kwargs
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Encode inputs, returning the embeddings and the token count of each input."""
+        model = await self.registry.get(model_id)
+        self._configure_threads()
+
+        # Run encoding on the model's dedicated executor to avoid blocking
+        return await self._get_executor(model_id).run(
+            lambda: encode_bucketed(
+                model, inputs, normalize_embeddings, self.max_batch_tokens, **kwargs
+            )
         )
-        return embeddings.tolist()
\ No newline at end of file
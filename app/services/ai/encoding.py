@@ -0,0 +1,65 @@
+import base64
+from typing import Any, Literal
+
+import numpy as np
+
+EncodingFormat = Literal["float", "base64", "base64_float16", "base64_int8"]
+
+
+def quantize_int8(embeddings: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization.
+
+    Returns:
+        The int8 matrix and the float32 scale of each row, so that
+        ``row ≈ quantized * scale``
+    """
+    scales = np.abs(embeddings).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def encode_embeddings(
+    embeddings: np.ndarray, encoding_format: EncodingFormat = "float", start_index: int = 0
+) -> list[dict[str, Any]]:
+    """Build response items straight from the embedding matrix.
+
+    Base64 formats are written from the little-endian numpy buffer of each row,
+    without creating a Python float per component.
+
+    Args:
+        embeddings: Matrix with one embedding per row
+        encoding_format: Wire format of the ``embedding`` field
+        start_index: Index of the first row in the original input
+
+    Returns:
+        List of embedding items ready for JSON serialization
+    """
+    if encoding_format == "float":
+        return [
+            {"object": "embedding", "embedding": row, "index": start_index + i}
+            for i, row in enumerate(embeddings.tolist())
+        ]
+
+    if encoding_format == "base64_int8":
+        quantized, scales = quantize_int8(embeddings)
+        return [
+            {
+                "object": "embedding",
+                "embedding": base64.b64encode(row.tobytes()).decode("ascii"),
+                "index": start_index + i,
+                "scale": float(scale),
+            }
+            for i, (row, scale) in enumerate(zip(quantized, scales))
+        ]
+
+    dtype = "<f2" if encoding_format == "base64_float16" else "<f4"
+    matrix = np.ascontiguousarray(embeddings, dtype=dtype)
+    return [
+        {
+            "object": "embedding",
+            "embedding": base64.b64encode(row.tobytes()).decode("ascii"),
+            "index": start_index + i,
+        }
+        for i, row in enumerate(matrix)
+    ]
@@ -0,0 +1,6 @@
+class OverloadedError(Exception):
+    """Raised when inference capacity is exhausted and the request should be shed."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.core.metrics import metrics
+from .errors import OverloadedError
+
+
+def configure_torch_threads(total_workers: int, num_threads: Optional[int] = None) -> int:
+    """Size torch intra-op parallelism so that all inference workers share the cores.
+
+    Args:
+        total_workers: Number of inference threads that may run concurrently, over all loaded models
+        num_threads: Explicit intra-op thread count, derived from the CPU count when None
+
+    Returns:
+        The intra-op thread count applied
+    """
+    import torch
+
+    if num_threads is None:
+        num_threads = max(1, (os.cpu_count() or 1) // max(1, total_workers))
+    torch.set_num_threads(num_threads)
+    return num_threads
+
+
+class InferenceExecutor:
+    """Bounded thread pool dedicated to CPU-bound inference work.
+
+    Unlike the loop's default executor it is isolated from other blocking work,
+    and it sheds load instead of queueing without limit: once ``max_pending``
+    jobs are running or waiting, new submissions fail with ``OverloadedError``.
+    """
+
+    def __init__(self, name: str, max_workers: int = 1, max_pending: int = 32):
+        """Initialize the executor.
+
+        Args:
+            name: Label used for thread names and metrics
+            max_workers: Number of threads running inference
+            max_pending: Maximum number of jobs running or waiting for a thread
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"infer-{name}")
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._rejected = metrics.counter("embedding.executor.rejected")
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` on the pool.
+
+        Raises:
+            OverloadedError: If ``max_pending`` jobs are already in flight
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected.inc()
+                raise OverloadedError(f"Inference executor for {self.name} is saturated")
+            self._pending += 1
+
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # A cancelled caller leaves its job running on the thread, so the job
+        # only stops counting as pending once it has actually finished.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _: Optional[Future] = None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
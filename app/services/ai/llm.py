@@ -1,7 +1,9 @@
 import httpx
+import importlib.util
 import time
-from typing import Any, AsyncGenerator
+from typing import Any, AsyncGenerator, Optional
 from .base import BaseModel
+from app.core.metrics import metrics
 import logging
 
 class LLMModel(BaseModel):
@@ -11,27 +13,62 @@ class LLMModel(BaseModel):
         self, 
         api_key: str,
         base_url: str = "https://openrouter.ai/api/v1",
-        timeout: int = 60
+        timeout: int = 60,
+        connect_timeout: float = 5.0,
+        read_timeout: Optional[float] = None,
+        pool_timeout: Optional[float] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False
     ):
         """Initialize LLM model with OpenRouter configuration.
         
         Args:
             api_key: OpenRouter API key
             base_url: OpenRouter API base URL
-            timeout: Request timeout in seconds
+            timeout: Default timeout in seconds for phases without an explicit value
+            connect_timeout: Timeout for establishing a connection
+            read_timeout: Timeout between received chunks, defaults to ``timeout``
+            pool_timeout: Timeout waiting for a free pooled connection, defaults to ``timeout``
+            max_connections: Maximum number of open upstream connections
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept open
+            http2: Multiplex requests over HTTP/2 (requires the ``h2`` package)
         """
         self.api_key = api_key
         self.base_url = base_url
         self.timeout = timeout
+        self._logger = logging.getLogger(__name__)
+
+        if http2 and importlib.util.find_spec("h2") is None:
+            self._logger.warning("[LLM] HTTP/2 requested but 'h2' is not installed, using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+
         self._client = httpx.AsyncClient(
             base_url=base_url,
-            timeout=timeout,
+            timeout=httpx.Timeout(
+                timeout,
+                connect=connect_timeout,
+                read=read_timeout if read_timeout is not None else timeout,
+                pool=pool_timeout if pool_timeout is not None else timeout
+            ),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            http2=http2,
             headers={
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json"
             }
         )
-        self._logger = logging.getLogger(__name__)
+        self._pool_wait = metrics.histogram("llm.pool.wait_seconds")
+        self._connect_time = metrics.histogram("llm.pool.connect_seconds")
+        self._ttfb = metrics.histogram("llm.stream.ttfb_seconds")
+        self._inter_chunk = metrics.histogram("llm.stream.inter_chunk_seconds")
 
     def infer(
         self, 
@@ -62,7 +99,9 @@ class LLMModel(BaseModel):
         start = time.time()
 
         try:
-            response = await self._client.post("chat/completions", json=payload)
+            response = await self._client.post(
+                "chat/completions", json=payload, extensions=self._trace_extensions()
+            )
 
             self._logger.info(f"[LLM] HTTP {response.status_code} in {time.time() - start:.2f}s")
 
@@ -72,7 +111,8 @@ class LLMModel(BaseModel):
             return data
 
         except httpx.HTTPError as e:
-            self._logger.error(f"[LLM] HTTP error: {e} | Response text: {e.response.text if e.response else 'no response'}")
+            response_text = e.response.text if isinstance(e, httpx.HTTPStatusError) else "no response"
+            self._logger.error(f"[LLM] HTTP error: {e} | Response text: {response_text}")
             raise
 
         except Exception as e:
@@ -80,24 +120,72 @@ class LLMModel(BaseModel):
             raise
 
     
-    async def _stream_completion(self, payload: dict[str, Any]) -> AsyncGenerator[str, None]:
+    async def _stream_completion(self, payload: dict[str, Any]) -> AsyncGenerator[bytes, None]:
         """Make a streaming completion request.
         
+        The upstream body is relayed as raw byte chunks, keeping the SSE framing
+        intact. Leaving the generator early closes the upstream request.
+
         Args:
             payload: Request payload
             
         Yields:
-            Text chunks as they arrive
+            Body chunks as they arrive
         """
-        start = time.time()
-        async with self._client.stream("POST", "/chat/completions", json=payload) as response:
+        start = time.perf_counter()
+        async with self._client.stream(
+            "POST", "/chat/completions", json=payload, extensions=self._trace_extensions()
+        ) as response:
             response.raise_for_status()
-            async for line in response.aiter_lines():
-                yield line
+            last = None
+            async for chunk in response.aiter_bytes():
+                now = time.perf_counter()
+                if last is None:
+                    self._ttfb.observe(now - start)
+                else:
+                    self._inter_chunk.observe(now - last)
+                last = now
+                yield chunk
+
+        self._logger.info(f"[LLM] Stream ended in {time.perf_counter() - start:.2f}s")
+
+    def pool_stats(self) -> dict[str, Any]:
+        """Report occupancy of the upstream connection pool."""
+        pool = getattr(self._client._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        requests = list(getattr(pool, "_requests", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        queued = sum(1 for request in requests if request.is_queued())
+        return {
+            "http2": self.http2,
+            "connections": len(connections),
+            "idle": idle,
+            "active": len(connections) - idle,
+            "in_flight": len(requests) - queued,
+            "queued": queued,
+        }
 
-        self._logger.info(f"[LLM] Stream ended in {time.time() - start:.2f}s")
+    def _trace_extensions(self) -> dict[str, Any]:
+        """Build an httpcore trace hook measuring pool wait and connect time.
+
+        Pool wait is the time from issuing the request until a connection starts
+        connecting or sending headers, i.e. how long the request queued for a slot.
+        """
+        start = time.perf_counter()
+        marks: dict[str, float] = {}
 
+        async def trace(event_name: str, info: dict[str, Any]) -> None:
+            now = time.perf_counter()
+            if event_name == "connection.connect_tcp.started" and "acquired" not in marks:
+                marks["acquired"] = marks["connect"] = now
+                self._pool_wait.observe(now - start)
+            elif event_name == "connection.connect_tcp.complete" and "connect" in marks:
+                self._connect_time.observe(now - marks["connect"])
+            elif event_name.endswith("send_request_headers.started") and "acquired" not in marks:
+                marks["acquired"] = now
+                self._pool_wait.observe(now - start)
 
+        return {"trace": trace}
 
     async def close(self):
         """Close the HTTP client."""
@@ -0,0 +1,98 @@
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .executor import InferenceExecutor
+from .registry import Backend, ModelRegistry
+
+DEFAULT_PARITY_TEXTS = [
+    "The quick brown fox jumps over the lazy dog.",
+    "How do I reset my password?",
+    "Quarterly revenue grew 12% year over year, driven by subscriptions.",
+    "A man is playing a guitar on stage.",
+    "Sentence embeddings map text to dense vectors for semantic search.",
+    "Where is the nearest train station?",
+    "The patient was prescribed 500mg of amoxicillin twice daily.",
+    "def add(a, b):\n    return a + b",
+]
+
+
+@dataclass
+class ParityReport:
+    model_id: str
+    backend: str
+    reference_backend: str
+    samples: int
+    mean_cosine: float
+    min_cosine: float
+    max_drift: float
+    reference_seconds: float
+    candidate_seconds: float
+
+    @property
+    def speedup(self) -> float:
+        return self.reference_seconds / self.candidate_seconds if self.candidate_seconds else 0.0
+
+
+def cosine_similarities(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    """Row-wise cosine similarity of two embedding matrices."""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return np.sum(reference * candidate, axis=1)
+
+
+async def check_parity(
+    registry: ModelRegistry,
+    executor: InferenceExecutor,
+    model_id: str,
+    backend: Backend,
+    texts: Optional[list[str]] = None,
+    reference_backend: Backend = "torch",
+) -> ParityReport:
+    """Compare a backend against the fp32 reference on the same inputs.
+
+    Both variants are loaded outside the registry, so they neither evict
+    serving models nor stay resident, and encode the texts once to warm up
+    and once timed. The whole check is a single job on ``executor``. Drift is
+    reported as ``1 - cosine`` per input.
+
+    Args:
+        registry: Registry that locates the model and its load settings
+        executor: Inference executor the check runs on
+        model_id: Model to check
+        backend: Candidate backend
+        texts: Probe inputs, defaults to a small mixed-domain sample
+        reference_backend: Backend treated as ground truth
+
+    Returns:
+        ParityReport with cosine statistics and encode timings
+    """
+    texts = texts or DEFAULT_PARITY_TEXTS
+
+    def timed_encode(variant: Backend) -> tuple[np.ndarray, float]:
+        # Only one variant is held at a time; it is released on return.
+        model = registry.load_detached(model_id, variant)
+        model.encode(texts[:1])
+        start = time.perf_counter()
+        embeddings = model.encode(texts, normalize_embeddings=False)
+        return np.asarray(embeddings, dtype=np.float32), time.perf_counter() - start
+
+    def run() -> tuple[tuple[np.ndarray, float], tuple[np.ndarray, float]]:
+        return timed_encode(reference_backend), timed_encode(backend)
+
+    (reference, reference_seconds), (candidate, candidate_seconds) = await executor.run(run)
+    similarities = cosine_similarities(reference, candidate)
+
+    return ParityReport(
+        model_id=model_id,
+        backend=backend,
+        reference_backend=reference_backend,
+        samples=len(texts),
+        mean_cosine=float(similarities.mean()),
+        min_cosine=float(similarities.min()),
+        max_drift=float(1.0 - similarities.min()),
+        reference_seconds=reference_seconds,
+        candidate_seconds=candidate_seconds,
+    )
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import aclosing
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncGenerator, Awaitable, Callable, Optional
+
+import httpx
+
+from app.core.config import LLMPolicyConfig
+from app.core.metrics import metrics
+from .base import BaseModel
+
+FallbackResolver = Callable[[list[str]], Awaitable[list[str]]]
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMPolicyEngine(BaseModel):
+    """Retries, hedging and model fallback around an LLM's ``infer``.
+
+    For every model the engine applies its ``LLMPolicyConfig``:
+    - retryable failures (transport errors and ``retry_statuses``) are retried
+      with full-jitter exponential backoff, waiting at least ``Retry-After``
+    - with ``hedge`` enabled, a duplicate request is sent once the first one has
+      been outstanding longer than the model's observed latency quantile, and
+      the first response wins. Models without an explicit policy share one
+      latency histogram
+    - when retries are exhausted the request moves on to the ``fallbacks``,
+      keeping only those registered and active in the models table
+
+    Streaming requests are retried only until the first chunk is received;
+    after that, errors propagate to the client.
+    """
+
+    def __init__(
+        self,
+        llm: BaseModel,
+        default_policy: Optional[LLMPolicyConfig] = None,
+        policies: Optional[dict[str, LLMPolicyConfig]] = None,
+        resolve_fallbacks: Optional[FallbackResolver] = None,
+    ):
+        """Initialize the engine.
+
+        Args:
+            llm: Model or router performing the upstream calls
+            default_policy: Policy of models without an explicit entry
+            policies: Per-model policies, keyed by the requested model
+            resolve_fallbacks: Coroutine filtering fallback model IDs down to usable
+                ones; only called once the primary model has failed
+        """
+        self.llm = llm
+        self.default_policy = default_policy or LLMPolicyConfig()
+        self.policies = policies or {}
+        self.resolve_fallbacks = resolve_fallbacks
+        self._retries = metrics.counter("llm.policy.retries")
+        self._hedges = metrics.counter("llm.policy.hedges")
+        self._fallbacks = metrics.counter("llm.policy.fallbacks")
+        self._logger = logging.getLogger(__name__)
+
+    def policy_for(self, model: str) -> LLMPolicyConfig:
+        return self.policies.get(model, self.default_policy)
+
+    def infer(self, payload: dict[str, Any]):
+        """Generate a completion with the model's policy applied.
+
+        Returns:
+            AsyncGenerator for streaming or Coroutine for non-streaming
+        """
+        if payload.get("stream", False):
+            return self._stream_completion(payload)
+        return self._complete(payload)
+
+    async def _complete(self, payload: dict[str, Any]) -> dict[str, Any]:
+        last_error: Optional[Exception] = None
+        async for model in self._candidates(payload["model"]):
+            try:
+                return await self._complete_with_retries({**payload, "model": model})
+            except Exception as e:
+                if not self._is_retryable(e, self.policy_for(model)):
+                    raise
+                last_error = e
+                self._logger.warning(f"[Policy] {model} failed after retries: {e}")
+        raise last_error
+
+    async def _stream_completion(self, payload: dict[str, Any]) -> AsyncGenerator[bytes, None]:
+        last_error: Optional[Exception] = None
+        async for model in self._candidates(payload["model"]):
+            policy = self.policy_for(model)
+            for attempt in range(policy.max_retries + 1):
+                # Entered before the first yield, so a consumer closing the
+                # generator at any point also closes the upstream stream.
+                async with aclosing(self.llm.infer({**payload, "model": model})) as stream:
+                    try:
+                        first = await stream.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    except Exception as e:
+                        if not self._is_retryable(e, policy):
+                            raise
+                        last_error = e
+                    else:
+                        # First byte received: from here on the stream is committed.
+                        yield first
+                        async for chunk in stream:
+                            yield chunk
+                        return
+                if attempt < policy.max_retries:
+                    self._retries.inc()
+                    await asyncio.sleep(self._backoff(last_error, attempt, policy))
+            self._logger.warning(f"[Policy] {model} stream failed after retries: {last_error}")
+        raise last_error
+
+    async def _candidates(self, model: str) -> AsyncGenerator[str, None]:
+        yield model
+        fallbacks = self.policy_for(model).fallbacks
+        if not fallbacks:
+            return
+        if self.resolve_fallbacks is not None:
+            fallbacks = await self.resolve_fallbacks(fallbacks)
+        for fallback in fallbacks:
+            if fallback != model:
+                self._fallbacks.inc()
+                self._logger.info(f"[Policy] Falling back from {model} to {fallback}")
+                yield fallback
+
+    async def _complete_with_retries(self, payload: dict[str, Any]) -> dict[str, Any]:
+        policy = self.policy_for(payload["model"])
+        for attempt in range(policy.max_retries + 1):
+            try:
+                return await self._attempt(payload, policy)
+            except Exception as e:
+                if attempt == policy.max_retries or not self._is_retryable(e, policy):
+                    raise
+                self._retries.inc()
+                await asyncio.sleep(self._backoff(e, attempt, policy))
+
+    async def _attempt(self, payload: dict[str, Any], policy: LLMPolicyConfig) -> dict[str, Any]:
+        latency = self._latency(payload["model"])
+        hedge_delay = self._hedge_delay(latency, policy)
+        start = time.perf_counter()
+
+        primary = asyncio.create_task(self.llm.infer(payload))
+        tasks = {primary}
+        try:
+            if hedge_delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    self._hedges.inc()
+                    tasks.add(asyncio.create_task(self.llm.infer(payload)))
+
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        latency.observe(time.perf_counter() - start)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _latency(self, model: str):
+        # Only models named in the policies get their own histogram, so client
+        # supplied model names cannot grow /metrics; all others share one.
+        label = model if model in self.policies else "default"
+        return metrics.histogram(f"llm.latency_seconds.{label}")
+
+    def _hedge_delay(self, latency, policy: LLMPolicyConfig) -> Optional[float]:
+        if not policy.hedge or latency.count < policy.hedge_min_samples:
+            return None
+        quantile = latency.quantile(policy.hedge_quantile)
+        return max(policy.hedge_min_delay, quantile or 0.0)
+
+    @staticmethod
+    def _is_retryable(error: Exception, policy: LLMPolicyConfig) -> bool:
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in policy.retry_statuses
+        return isinstance(error, httpx.TransportError)
+
+    @staticmethod
+    def _backoff(error: Exception, attempt: int, policy: LLMPolicyConfig) -> float:
+        delay = random.uniform(0, min(policy.backoff_max, policy.backoff_base * 2 ** attempt))
+        if isinstance(error, httpx.HTTPStatusError):
+            retry_after = retry_after_seconds(error.response)
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, policy.backoff_max))
+        return delay
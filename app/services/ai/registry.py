@@ -0,0 +1,256 @@
+from sentence_transformers import SentenceTransformer
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Literal, Optional
+import asyncio
+import logging
+import os
+import time
+
+# torch:     PyTorch fp32
+# int8:      PyTorch with Linear layers dynamically quantized to int8
+# onnx:      ONNX Runtime, loading onnx/model.onnx from the model directory
+# onnx_int8: ONNX Runtime with a pre-quantized int8 graph from the model directory
+Backend = Literal["torch", "int8", "onnx", "onnx_int8"]
+BACKENDS: tuple[str, ...] = ("torch", "int8", "onnx", "onnx_int8")
+
+
+@dataclass
+class ModelStats:
+    hits: int = 0
+    misses: int = 0
+    loads: int = 0
+    evictions: int = 0
+    last_load_seconds: float | None = None
+    resident_bytes: int = 0
+
+
+@dataclass
+class _ResidentModel:
+    model: Any  # SentenceTransformer, or whatever a subclass's _load returns
+    size_bytes: int
+    loaded_at: float = field(default_factory=time.time)
+
+
+def load_model(
+    path: str,
+    device: str = "cpu",
+    backend: Backend = "torch",
+    onnx_int8_file: str = "onnx/model_qint8_avx512_vnni.onnx",
+) -> SentenceTransformer:
+    """Load a local SentenceTransformer with the requested inference backend.
+
+    Args:
+        path: Model directory
+        device: Device to load the model on
+        backend: Inference backend, see ``Backend``
+        onnx_int8_file: Quantized graph used by the ``onnx_int8`` backend, relative to ``path``
+    """
+    if backend == "torch":
+        return SentenceTransformer(path, device=device)
+
+    if backend == "int8":
+        import torch
+
+        model = SentenceTransformer(path, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    if backend == "onnx":
+        return SentenceTransformer(path, device=device, backend="onnx")
+
+    if backend == "onnx_int8":
+        return SentenceTransformer(
+            path, device=device, backend="onnx", model_kwargs={"file_name": onnx_int8_file}
+        )
+
+    raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
+
+
+def estimate_model_bytes(model: SentenceTransformer, path: Optional[str] = None) -> int:
+    """Estimate the resident size of a model from its parameters and buffers.
+
+    ONNX Runtime sessions expose no tensors, so their size is approximated by the
+    size of the ``.onnx`` files under ``path``.
+    """
+    total = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    if total == 0 and path is not None:
+        for root, _, files in os.walk(path):
+            total += sum(
+                os.path.getsize(os.path.join(root, name))
+                for name in files if name.endswith(".onnx")
+            )
+    return total
+
+
+class ModelRegistry:
+    """Process-wide registry keeping SentenceTransformer models resident in memory.
+
+    Models are loaded once per backend and evicted in least-recently-used order
+    whenever the total resident size exceeds the memory budget. Concurrent first
+    requests for the same model await a single shared load.
+    """
+
+    def __init__(
+        self,
+        models_dir: str,
+        device: str = "cpu",
+        memory_budget_bytes: int = 4 * 1024 ** 3,
+        default_backend: Backend = "torch",
+        backends: Optional[dict[str, Backend]] = None,
+        onnx_int8_file: str = "onnx/model_qint8_avx512_vnni.onnx",
+    ):
+        """Initialize an empty registry.
+
+        Args:
+            models_dir: Directory containing one sub-directory per model
+            device: Device to load models on ('cpu', 'cuda', 'mps', etc.)
+            memory_budget_bytes: Upper bound on the total size of resident models
+            default_backend: Inference backend of models without an override
+            backends: Per-model backend overrides, keyed by model ID
+            onnx_int8_file: Quantized graph used by the ``onnx_int8`` backend
+        """
+        self.models_dir = models_dir
+        self.device = device
+        self.memory_budget_bytes = memory_budget_bytes
+        self.default_backend = default_backend
+        self.backends = backends or {}
+        self.onnx_int8_file = onnx_int8_file
+        self._models: OrderedDict[tuple[str, str], _ResidentModel] = OrderedDict()
+        self._loading: dict[tuple[str, str], asyncio.Future] = {}
+        self._stats: dict[str, ModelStats] = {}
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._models.values())
+
+    @property
+    def resident_count(self) -> int:
+        return len(self._models)
+
+    def backend_for(self, model_id: str) -> Backend:
+        return self.backends.get(model_id, self.default_backend)
+
+    def is_loaded(self, model_id: str, backend: Optional[Backend] = None) -> bool:
+        return (model_id, backend or self.backend_for(model_id)) in self._models
+
+    async def get(self, model_id: str, backend: Optional[Backend] = None) -> SentenceTransformer:
+        """Return a resident model, loading it if needed.
+
+        Args:
+            model_id: Name of the model directory under ``models_dir``
+            backend: Inference backend, defaults to the one configured for the model
+
+        Returns:
+            The loaded SentenceTransformer
+        """
+        key = (model_id, backend or self.backend_for(model_id))
+        stats = self._stats.setdefault(_label(key), ModelStats())
+
+        entry = self._models.get(key)
+        if entry is not None:
+            self._models.move_to_end(key)
+            stats.hits += 1
+            return entry.model
+
+        stats.misses += 1
+        pending = self._loading.get(key)
+        if pending is None:
+            # The load runs as a task of its own: a caller cancelled while waiting
+            # must not cancel it for the others, nor discard the loaded model.
+            pending = self._loading[key] = asyncio.ensure_future(self._load_resident(key, stats))
+            pending.add_done_callback(partial(self._loaded, key))
+        return await asyncio.shield(pending)
+
+    def evict(self, model_id: str, backend: Optional[Backend] = None) -> bool:
+        """Drop a model from memory. Returns False if it was not resident."""
+        key = (model_id, backend or self.backend_for(model_id))
+        entry = self._models.pop(key, None)
+        if entry is None:
+            return False
+        stats = self._stats.setdefault(_label(key), ModelStats())
+        stats.evictions += 1
+        stats.resident_bytes = 0
+        self._unload(entry.model)
+        self._logger.info(f"[Registry] Evicted {_label(key)}")
+        return True
+
+    def load_detached(self, model_id: str, backend: Backend) -> SentenceTransformer:
+        """Load a model in this process without making it resident.
+
+        The caller owns the returned model: it is neither counted against the
+        memory budget nor shared with serving requests. Blocks while loading.
+        """
+        return load_model(self._local_path(model_id), self.device, backend, self.onnx_int8_file)
+
+    def model_path(self, model_id: str) -> str:
+        return os.path.join(self.models_dir, model_id)
+
+    def stats(self) -> dict:
+        return {
+            "resident_bytes": self.resident_bytes,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "resident_models": [_label(key) for key in self._models],
+            "models": {
+                label: vars(stats).copy() for label, stats in self._stats.items()
+            },
+        }
+
+    async def _load_resident(self, key: tuple[str, str], stats: ModelStats) -> Any:
+        start = time.perf_counter()
+        model = await asyncio.get_running_loop().run_in_executor(None, self._load, key)
+        elapsed = time.perf_counter() - start
+
+        size = self._size(key, model)
+        self._models[key] = _ResidentModel(model=model, size_bytes=size)
+        stats.loads += 1
+        stats.last_load_seconds = elapsed
+        stats.resident_bytes = size
+        self._logger.info(
+            f"[Registry] Loaded {_label(key)} ({size / 1024 ** 2:.1f} MiB) in {elapsed:.2f}s"
+        )
+        self._evict(keep=key)
+        return model
+
+    def _loaded(self, key: tuple[str, str], task: asyncio.Future) -> None:
+        if self._loading.get(key) is task:
+            del self._loading[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller has gone.
+            task.exception()
+
+    def _load(self, key: tuple[str, str]) -> Any:
+        model_id, backend = key
+        return load_model(self._local_path(model_id), self.device, backend, self.onnx_int8_file)
+
+    def _local_path(self, model_id: str) -> str:
+        # Unknown IDs fail here instead of being fetched from the hub or spawning workers.
+        path = self.model_path(model_id)
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"Embedding model '{model_id}' not found in {self.models_dir}")
+        return path
+
+    def _size(self, key: tuple[str, str], model: Any) -> int:
+        return estimate_model_bytes(model, self.model_path(key[0]))
+
+    def _unload(self, model: Any) -> None:
+        """Release an evicted model; in-process models are freed with their last reference."""
+
+    def _evict(self, keep: tuple[str, str]) -> None:
+        while self.resident_bytes > self.memory_budget_bytes:
+            lru = next(iter(self._models))
+            if lru == keep:
+                self._logger.warning(
+                    f"[Registry] {_label(keep)} alone exceeds the memory budget "
+                    f"({self.memory_budget_bytes} bytes)"
+                )
+                break
+            self.evict(*lru)
+
+
+def _label(key: tuple[str, str]) -> str:
+    model_id, backend = key
+    return f"{model_id}@{backend}"
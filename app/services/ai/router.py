@@ -0,0 +1,324 @@
+import asyncio
+import logging
+import time
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Awaitable, Callable, Optional
+
+import httpx
+
+from app.core.metrics import metrics
+from app.services.usage import UsageEvent, UsageLedger, UsageSniffer, usage_cost
+from .base import BaseModel
+from .llm import LLMModel
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """One provider serving a logical model, from a row of the models table."""
+
+    provider: str
+    model_id: str
+    input_cost_per_token: Optional[float] = None
+    output_cost_per_token: Optional[float] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.provider}/{self.model_id}"
+
+
+EndpointResolver = Callable[[str], Awaitable[list[Endpoint]]]
+
+
+@dataclass
+class EndpointState:
+    """Live latency, error rate and circuit breaker state of an endpoint.
+
+    The breaker opens after ``failure_threshold`` consecutive failures, or when
+    the error rate exceeds its limit over enough requests. After the cooldown,
+    one probe request is let through (half-open); its outcome closes or
+    reopens the breaker.
+    """
+
+    latency: Optional[float] = None
+    error_rate: float = 0.0
+    requests: int = 0
+    consecutive_failures: int = 0
+    state: str = "closed"
+    opened_at: float = 0.0
+    probing: bool = False
+    last_error: Optional[str] = None
+    ejections: int = 0
+    updated_at: float = field(default_factory=time.time)
+
+
+class LLMRouter(BaseModel):
+    """Route logical model names to provider endpoints by live latency, errors and cost.
+
+    Endpoints of a name are the active rows of the models table sharing that
+    ``name``; each row's ``provider`` selects a pooled ``LLMModel`` client and its
+    ``model_id`` is sent upstream. Every request goes to the healthy endpoint with
+    the lowest score::
+
+        ewma_latency * (1 + error_penalty * ewma_error_rate) + cost_weight * cost_per_1k_tokens
+
+    Endpoints without measurements score zero so they are tried early. Names
+    without usable endpoints are sent unchanged to the default provider.
+    """
+
+    def __init__(
+        self,
+        clients: dict[str, LLMModel],
+        default_provider: str,
+        resolve_endpoints: EndpointResolver,
+        ewma_alpha: float = 0.2,
+        error_penalty: float = 5.0,
+        cost_weight: float = 0.0,
+        catalog_ttl: float = 30.0,
+        failure_threshold: int = 5,
+        error_rate_threshold: float = 0.5,
+        min_requests: int = 20,
+        cooldown: float = 30.0,
+        ledger: Optional[UsageLedger] = None,
+    ):
+        """Initialize the router.
+
+        Args:
+            clients: Pooled client per provider name
+            default_provider: Provider of names without endpoints in the models table
+            resolve_endpoints: Coroutine returning the active endpoints of a name
+            ewma_alpha: Weight of the newest sample in latency and error averages
+            error_penalty: Latency multiplier per unit of error rate
+            cost_weight: Seconds of latency one unit of currency per 1k tokens is worth
+            catalog_ttl: Seconds endpoints of a name are cached before re-reading them
+            failure_threshold: Consecutive failures that open the breaker
+            error_rate_threshold: Error rate that opens the breaker
+            min_requests: Requests seen before the error rate can open the breaker
+            cooldown: Seconds an open breaker waits before a probe request
+            ledger: Usage ledger recording tokens, cost and latency of every completion
+        """
+        self.clients = clients
+        self.default_provider = default_provider
+        self.resolve_endpoints = resolve_endpoints
+        self.ewma_alpha = ewma_alpha
+        self.error_penalty = error_penalty
+        self.cost_weight = cost_weight
+        self.catalog_ttl = catalog_ttl
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.ledger = ledger
+        self._catalog: dict[str, tuple[float, list[Endpoint]]] = {}
+        self._states: dict[Endpoint, EndpointState] = {}
+        self._ejections = metrics.counter("llm.router.ejections")
+        self._logger = logging.getLogger(__name__)
+
+    def infer(self, payload: dict[str, Any]):
+        """Generate a completion on the best endpoint of ``payload["model"]``.
+
+        Returns:
+            AsyncGenerator for streaming or Coroutine for non-streaming
+        """
+        if payload.get("stream", False):
+            return self._stream_completion(payload)
+        return self._complete(payload)
+
+    async def _complete(self, payload: dict[str, Any]) -> dict[str, Any]:
+        endpoint = await self._select(payload["model"])
+        state = self._acquire(endpoint)
+        start = time.perf_counter()
+        try:
+            result = await self._client(endpoint).infer({**payload, "model": endpoint.model_id})
+        except BaseException as e:
+            self._record(endpoint, state, None, e)
+            raise
+        latency = time.perf_counter() - start
+        self._record(endpoint, state, latency, None)
+        self._record_usage(payload["model"], endpoint, result.get("usage"), latency)
+        return result
+
+    async def _stream_completion(self, payload: dict[str, Any]) -> AsyncGenerator[bytes, None]:
+        endpoint = await self._select(payload["model"])
+        state = self._acquire(endpoint)
+        start = time.perf_counter()
+        stream = self._client(endpoint).infer({**payload, "model": endpoint.model_id})
+        async with aclosing(stream):
+            # Health is judged on time to first byte; later failures are the client's to see.
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                self._record(endpoint, state, time.perf_counter() - start, None)
+                return
+            except BaseException as e:
+                self._record(endpoint, state, None, e)
+                raise
+            self._record(endpoint, state, time.perf_counter() - start, None)
+
+            sniffer = UsageSniffer() if self.ledger is not None else None
+            try:
+                if sniffer is not None:
+                    sniffer.feed(first)
+                yield first
+                async for chunk in stream:
+                    if sniffer is not None:
+                        sniffer.feed(chunk)
+                    yield chunk
+            finally:
+                # Aborted streams are recorded too: the provider bills what it generated.
+                if sniffer is not None:
+                    self._record_usage(
+                        payload["model"], endpoint, sniffer.usage, time.perf_counter() - start
+                    )
+
+    async def _select(self, name: str) -> Endpoint:
+        endpoints = [
+            endpoint for endpoint in await self._endpoints(name)
+            if endpoint.provider in self.clients and self._available(endpoint)
+        ]
+        if not endpoints:
+            # Everything is ejected: prefer the endpoint closest to its probe over failing outright.
+            endpoints = [
+                endpoint for endpoint in await self._endpoints(name) if endpoint.provider in self.clients
+            ]
+            endpoints.sort(key=lambda endpoint: self._state(endpoint).opened_at)
+            endpoints = endpoints[:1]
+        if not endpoints:
+            return Endpoint(provider=self.default_provider, model_id=name)
+        return min(endpoints, key=self._score)
+
+    async def _endpoints(self, name: str) -> list[Endpoint]:
+        cached = self._catalog.get(name)
+        if cached is not None and time.monotonic() - cached[0] < self.catalog_ttl:
+            return cached[1]
+        try:
+            endpoints = await self.resolve_endpoints(name)
+        except Exception as e:
+            self._logger.warning(f"[Router] Could not resolve endpoints of {name}: {e}")
+            # Keep serving the last known endpoints while the catalog is unreachable.
+            endpoints = cached[1] if cached is not None else []
+        self._catalog[name] = (time.monotonic(), endpoints)
+        return endpoints
+
+    def _score(self, endpoint: Endpoint) -> float:
+        state = self._state(endpoint)
+        latency = state.latency or 0.0
+        cost = ((endpoint.input_cost_per_token or 0.0) + (endpoint.output_cost_per_token or 0.0)) * 1000
+        return latency * (1 + self.error_penalty * state.error_rate) + self.cost_weight * cost
+
+    def _available(self, endpoint: Endpoint) -> bool:
+        state = self._state(endpoint)
+        if state.state == "closed":
+            return True
+        if state.state == "open" and time.monotonic() - state.opened_at >= self.cooldown:
+            state.state = "half_open"
+        return state.state == "half_open" and not state.probing
+
+    def _acquire(self, endpoint: Endpoint) -> EndpointState:
+        state = self._state(endpoint)
+        if state.state == "half_open":
+            state.probing = True
+        return state
+
+    def _record(
+        self,
+        endpoint: Endpoint,
+        state: EndpointState,
+        latency: Optional[float],
+        error: Optional[BaseException],
+    ) -> None:
+        if isinstance(error, asyncio.CancelledError):
+            # Lost a hedge race or the client went away: says nothing about the endpoint.
+            state.probing = False
+            return
+
+        alpha = self.ewma_alpha
+        failed = error is not None and _is_endpoint_failure(error)
+        state.requests += 1
+        state.updated_at = time.time()
+        state.error_rate = (1 - alpha) * state.error_rate + alpha * (1.0 if failed else 0.0)
+        state.probing = False
+
+        if not failed:
+            if latency is not None:
+                state.latency = latency if state.latency is None else (
+                    (1 - alpha) * state.latency + alpha * latency
+                )
+            state.consecutive_failures = 0
+            if state.state != "closed":
+                self._logger.info(f"[Router] {endpoint.label} recovered, closing breaker")
+            state.state = "closed"
+            return
+
+        state.consecutive_failures += 1
+        state.last_error = str(error) or type(error).__name__
+        tripped = (
+            state.consecutive_failures >= self.failure_threshold
+            or (state.requests >= self.min_requests and state.error_rate >= self.error_rate_threshold)
+        )
+        if state.state == "half_open" or (state.state == "closed" and tripped):
+            state.state = "open"
+            state.opened_at = time.monotonic()
+            state.ejections += 1
+            self._ejections.inc()
+            self._logger.warning(f"[Router] Ejected {endpoint.label}: {state.last_error}")
+
+    def _record_usage(
+        self,
+        name: str,
+        endpoint: Endpoint,
+        usage: Optional[dict[str, Any]],
+        latency: float,
+    ) -> None:
+        if self.ledger is None:
+            return
+        usage = usage or {}
+        self.ledger.record(UsageEvent(
+            request_type="chat",
+            model=name,
+            provider=endpoint.provider,
+            model_id=endpoint.model_id,
+            prompt_tokens=usage.get("prompt_tokens") or 0,
+            completion_tokens=usage.get("completion_tokens") or 0,
+            total_tokens=usage.get("total_tokens") or 0,
+            cost=usage_cost(usage, endpoint.input_cost_per_token, endpoint.output_cost_per_token),
+            latency_ms=latency * 1000,
+        ))
+
+    def _state(self, endpoint: Endpoint) -> EndpointState:
+        state = self._states.get(endpoint)
+        if state is None:
+            state = self._states[endpoint] = EndpointState()
+        return state
+
+    def _client(self, endpoint: Endpoint) -> LLMModel:
+        return self.clients[endpoint.provider]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "endpoints": {
+                endpoint.label: {
+                    "state": state.state,
+                    "latency": state.latency,
+                    "error_rate": state.error_rate,
+                    "requests": state.requests,
+                    "ejections": state.ejections,
+                    "last_error": state.last_error,
+                    "score": self._score(endpoint),
+                }
+                for endpoint, state in self._states.items()
+            },
+            "pools": {provider: client.pool_stats() for provider, client in self.clients.items()},
+        }
+
+    async def close(self) -> None:
+        """Close the clients of every provider."""
+        await asyncio.gather(*(client.close() for client in self.clients.values()))
+
+
+def _is_endpoint_failure(error: BaseException) -> bool:
+    """Transport errors, throttling and 5xx count against an endpoint; other 4xx are the request's fault."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from app.core.metrics import metrics
+from app.database import SessionLocal
+from app.repositories import SemanticCacheRepository
+from .chat_cache import is_cacheable
+from .embedded import EmbeddingModel
+
+SIMILARITY_BUCKETS = (0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.88, 0.9, 0.92, 0.94, 0.96, 0.98, 0.99, 1.0)
+# How often expired rows are purged from the table.
+_PURGE_INTERVAL_SECONDS = 300.0
+# Request fields that are not part of the scope: the conversation is split into
+# system prompt and question, and streaming only changes how the answer is delivered.
+_UNSCOPED_FIELDS = ("messages", "stream")
+
+
+@dataclass
+class SemanticLookup:
+    """Outcome of a lookup, kept to store the upstream answer on a miss."""
+
+    scope: str
+    prompt: str
+    embedding: list[float]
+    response: Optional[dict[str, Any]] = None
+    similarity: Optional[float] = None
+
+
+def semantic_scope(payload: dict[str, Any], embedding_model_id: str) -> Optional[tuple[str, str]]:
+    """Split a request into its cache scope and the final user turn.
+
+    Only deterministic (``temperature`` 0), single-turn requests (system
+    messages followed by one user message with plain text content) are
+    eligible, since the answer to a later turn depends on the whole
+    conversation. The scope hashes everything an answer depends on besides the
+    question: model, system prompt, tools, sampling parameters such as
+    ``max_tokens`` and ``top_p``, and the embedding model that produced the
+    vector.
+
+    Returns:
+        (scope, prompt), or None when the request is not eligible
+    """
+    if not is_cacheable(payload):
+        return None
+    messages = payload.get("messages", [])
+    system = [message for message in messages if message.get("role") == "system"]
+    turns = [message for message in messages if message.get("role") != "system"]
+    if len(turns) != 1 or turns[0].get("role") != "user":
+        return None
+    prompt = turns[0].get("content")
+    if not isinstance(prompt, str) or not prompt.strip():
+        return None
+
+    scope = {
+        **{key: value for key, value in payload.items() if key not in _UNSCOPED_FIELDS},
+        "system": system,
+        "embedding_model": embedding_model_id,
+    }
+    encoded = json.dumps(scope, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest(), prompt
+
+
+def is_final_answer(response: dict[str, Any]) -> bool:
+    """Whether a completion is a whole text answer: every choice stopped naturally, without tool calls."""
+    choices = response.get("choices") or []
+    return bool(choices) and all(
+        choice.get("finish_reason") == "stop"
+        and not (choice.get("message") or {}).get("tool_calls")
+        and not (choice.get("message") or {}).get("function_call")
+        for choice in choices
+    )
+
+
+class SemanticCache:
+    """Chat completion cache matching questions by embedding similarity in pgvector.
+
+    The final user turn is embedded with a local model and searched with the
+    HNSW index of the ``semantic_cache`` table, restricted to the request's
+    scope. The index is created by the migration for ``dimension``, the
+    output size of the embedding model. An answer is served when its cosine
+    similarity reaches ``threshold``. Only final answers (see
+    ``is_final_answer``) are stored. Database failures are logged and treated
+    as misses.
+    """
+
+    def __init__(
+        self,
+        embedding_model: EmbeddingModel,
+        embedding_model_id: str,
+        dimension: int = 384,
+        threshold: float = 0.95,
+        ttl_seconds: float = 86_400,
+        ef_search: int = 100,
+    ):
+        """Initialize the cache.
+
+        Args:
+            embedding_model: Local embedding model used to embed prompts
+            embedding_model_id: SentenceTransformer model ID to embed with
+            dimension: Embedding dimension the HNSW index was created for
+            threshold: Minimum cosine similarity to serve a cached answer
+            ttl_seconds: Lifetime of a cached answer
+            ef_search: HNSW candidate list size used by lookups
+        """
+        self.embedding_model = embedding_model
+        self.embedding_model_id = embedding_model_id
+        self.dimension = dimension
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.ef_search = ef_search
+        self._last_purge = 0.0
+        self._hits = metrics.counter("chat.semantic_cache.hits")
+        self._misses = metrics.counter("chat.semantic_cache.misses")
+        self._errors = metrics.counter("chat.semantic_cache.errors")
+        self._similarity = metrics.histogram("chat.semantic_cache.similarity", SIMILARITY_BUCKETS)
+        self._lookup_time = metrics.histogram("chat.semantic_cache.lookup_seconds")
+        self._logger = logging.getLogger(__name__)
+
+    async def lookup(self, payload: dict[str, Any]) -> Optional[SemanticLookup]:
+        """Search for an answer to a semantically equivalent earlier request.
+
+        Returns:
+            SemanticLookup with ``response`` set on a hit, without it on a miss,
+            or None when the request is not eligible or the lookup failed
+        """
+        scoped = semantic_scope(payload, self.embedding_model_id)
+        if scoped is None:
+            return None
+        scope, prompt = scoped
+
+        start = time.perf_counter()
+        try:
+            result = await self.embedding_model.infer([prompt], model_id=self.embedding_model_id)
+            embedding = result.embeddings[0].tolist()
+            if len(embedding) != self.dimension:
+                raise ValueError(
+                    f"{self.embedding_model_id} produces {len(embedding)} dimensions, "
+                    f"the index serves {self.dimension}"
+                )
+            found = await asyncio.to_thread(self._search, scope, embedding)
+        except Exception as e:
+            self._errors.inc()
+            self._logger.warning(f"[SemanticCache] Lookup failed: {e}")
+            return None
+        finally:
+            self._lookup_time.observe(time.perf_counter() - start)
+
+        lookup = SemanticLookup(scope=scope, prompt=prompt, embedding=embedding)
+        if found is not None:
+            response, similarity = found
+            lookup.similarity = similarity
+            self._similarity.observe(similarity)
+            if similarity >= self.threshold:
+                lookup.response = response
+                self._hits.inc()
+                return lookup
+        self._misses.inc()
+        return lookup
+
+    async def store(self, lookup: SemanticLookup, model_id: str, response: dict[str, Any]) -> None:
+        if not is_final_answer(response):
+            return
+        try:
+            await asyncio.to_thread(self._store, lookup, model_id, response)
+        except Exception as e:
+            self._errors.inc()
+            self._logger.warning(f"[SemanticCache] Store failed: {e}")
+
+    def stats(self) -> dict:
+        hits = self._hits.value
+        lookups = hits + self._misses.value
+        return {
+            "embedding_model_id": self.embedding_model_id,
+            "threshold": self.threshold,
+            "hit_ratio": hits / lookups if lookups else None,
+            "errors": self._errors.value,
+        }
+
+    def _search(self, scope: str, embedding: list[float]) -> Optional[tuple[dict[str, Any], float]]:
+        db = SessionLocal()
+        try:
+            found = SemanticCacheRepository(db).search(
+                scope, embedding, datetime.now(timezone.utc), ef_search=self.ef_search
+            )
+            if found is None:
+                return None
+            entry, similarity = found
+            return entry.response, similarity
+        finally:
+            db.close()
+
+    def _store(self, lookup: SemanticLookup, model_id: str, response: dict[str, Any]) -> None:
+        db = SessionLocal()
+        try:
+            repository = SemanticCacheRepository(db)
+            now = datetime.now(timezone.utc)
+            repository.create(
+                scope=lookup.scope,
+                model_id=model_id,
+                embedding_model_id=self.embedding_model_id,
+                prompt=lookup.prompt,
+                embedding=lookup.embedding,
+                response=response,
+                expires_at=now + timedelta(seconds=self.ttl_seconds),
+            )
+            if time.time() - self._last_purge > _PURGE_INTERVAL_SECONDS:
+                self._last_purge = time.time()
+                repository.delete_expired(now)
+        finally:
+            db.close()
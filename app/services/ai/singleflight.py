@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+
+def payload_digest(payload: Any) -> str:
+    """sha256 of the canonical JSON of a request payload."""
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Call:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls sharing a key onto a single execution.
+
+    The first caller for a key starts the work as its own task; callers that
+    arrive while it runs wait on the same task and receive its result or
+    exception. A caller being cancelled (e.g. its client disconnected) only
+    stops that caller from waiting. The shared task is cancelled only once
+    every caller has left.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, _Call] = {}
+        self._leaders = metrics.counter(f"{name}.singleflight.leaders")
+        self._coalesced = metrics.counter(f"{name}.singleflight.coalesced")
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` for ``key`` unless an identical call is already in flight.
+
+        Args:
+            key: Identity of the call, e.g. a hash of the canonical request
+            fn: Zero-argument callable starting the work
+
+        Returns:
+            Result of the shared call
+        """
+        call = self._calls.get(key)
+        if call is None or call.task.done():
+            call = _Call(task=asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self._leaders.inc()
+        else:
+            self._coalesced.inc()
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        leaders = self._leaders.value
+        coalesced = self._coalesced.value
+        total = leaders + coalesced
+        return {
+            "in_flight": len(self._calls),
+            "leaders": leaders,
+            "coalesced": coalesced,
+            "coalescing_ratio": coalesced / total if total else None,
+        }
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Nobody may be left to retrieve the outcome of a cancelled-by-all call.
+        if not call.task.cancelled():
+            call.task.exception()
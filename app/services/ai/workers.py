@@ -0,0 +1,371 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+from multiprocessing import shared_memory
+from typing import Any, Optional
+
+import numpy as np
+
+from .bucketing import encode_bucketed
+from .embedded import EmbeddingModel
+from .errors import OverloadedError
+from .registry import ModelRegistry, estimate_model_bytes, load_model
+
+
+def _worker_main(
+    model_path: str,
+    device: str,
+    backend: str,
+    onnx_int8_file: str,
+    num_threads: int,
+    max_batch_tokens: int,
+    tasks: Any,
+    results: Any,
+) -> None:
+    """Entry point of an embedding worker process.
+
+    Loads the model once and reports ``("ready", size_bytes)`` or
+    ``("failed", error)`` on ``results``. It then encodes batches from
+    ``tasks`` and hands each result matrix back through a fresh shared memory
+    block as ``("result", job_id, ...)``. Token counts are small and travel
+    with the result message.
+    """
+    try:
+        import torch
+
+        torch.set_num_threads(num_threads)
+        model = load_model(model_path, device, backend, onnx_int8_file)
+        results.put(("ready", estimate_model_bytes(model, model_path)))
+    except BaseException as e:
+        results.put(("failed", f"{type(e).__name__}: {e}"))
+        return
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        job_id, inputs, normalize_embeddings, kwargs = task
+        try:
+            embeddings, token_counts = encode_bucketed(
+                model, inputs, normalize_embeddings, max_batch_tokens, **kwargs
+            )
+            shm = shared_memory.SharedMemory(create=True, size=max(embeddings.nbytes, 1))
+            np.ndarray(embeddings.shape, dtype=np.float32, buffer=shm.buf)[:] = embeddings
+            results.put(("result", job_id, shm.name, embeddings.shape, token_counts, None))
+            shm.close()
+        except Exception as e:
+            results.put(("result", job_id, None, None, None, f"{type(e).__name__}: {e}"))
+
+
+class _ProcessPool:
+    """Worker processes holding one model, fed from a shared task queue.
+
+    A collector thread reads ``results``: it counts workers in as they report
+    ready, resolves the future of each finished job, and fails every pending
+    job once a worker process exits unexpectedly. A failed pool is
+    ``broken`` and must be replaced.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        model_path: str,
+        device: str,
+        backend: str,
+        onnx_int8_file: str,
+        num_workers: int,
+        max_pending: int,
+        max_batch_tokens: int,
+        timeout: float,
+    ):
+        self.model_id = model_id
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.size_bytes = 0
+        self.error: Optional[str] = None
+        ctx = mp.get_context("spawn")
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        num_threads = max(1, (os.cpu_count() or 1) // num_workers)
+        self._processes = [
+            ctx.Process(
+                target=_worker_main,
+                args=(
+                    model_path, device, backend, onnx_int8_file, num_threads,
+                    max_batch_tokens, self._tasks, self._results
+                ),
+                daemon=True,
+            )
+            for _ in range(num_workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+        self._ids = itertools.count()
+        self._futures: dict[int, tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._lock = threading.Lock()
+        self._ready_workers = 0
+        self._ready = threading.Event()
+        self._closing = False
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    @property
+    def pending(self) -> int:
+        return len(self._futures)
+
+    @property
+    def broken(self) -> bool:
+        return self.error is not None
+
+    def wait_ready(self, timeout: float) -> None:
+        """Block until every worker has loaded the model.
+
+        Raises:
+            RuntimeError: If a worker failed to load or exited, or loading timed out
+        """
+        if not self._ready.wait(timeout):
+            self._fail(f"Embedding workers for {self.model_id} did not load within {timeout:.0f}s")
+        if self.error is not None:
+            self.shutdown()
+            raise RuntimeError(self.error)
+
+    async def encode(
+        self, inputs: list[str], normalize_embeddings: bool, **kwargs
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        if len(self._futures) >= self.max_pending:
+            raise OverloadedError("Embedding worker processes are saturated")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        job_id = next(self._ids)
+        with self._lock:
+            self._futures[job_id] = (loop, future)
+        self._tasks.put((job_id, inputs, normalize_embeddings, kwargs))
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"Embedding workers for {self.model_id} did not answer within {self.timeout:.0f}s"
+            ) from None
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+
+    def shutdown(self) -> None:
+        """Stop the workers once they have drained the queued jobs, then the collector."""
+        self._closing = True
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._results.put(None)
+        self._collector.join(timeout=5)
+        self._fail_pending(f"Embedding workers for {self.model_id} were shut down")
+
+    def _collect(self) -> None:
+        while True:
+            self._check_workers()
+            try:
+                message = self._results.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if message is None:
+                break
+
+            if message[0] == "ready":
+                self.size_bytes += message[1]
+                self._ready_workers += 1
+                if self._ready_workers == len(self._processes):
+                    self._ready.set()
+                continue
+            if message[0] == "failed":
+                self._fail(f"Embedding worker for {self.model_id} failed to load: {message[1]}")
+                continue
+
+            _, job_id, shm_name, shape, token_counts, error = message
+            result: Optional[tuple[np.ndarray, np.ndarray]] = None
+            if shm_name is not None:
+                shm = shared_memory.SharedMemory(name=shm_name)
+                try:
+                    embeddings = np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+                    result = (embeddings, token_counts)
+                finally:
+                    shm.close()
+                    shm.unlink()
+
+            with self._lock:
+                entry = self._futures.get(job_id)
+            if entry is None:
+                continue
+            loop, future = entry
+            if error is not None:
+                loop.call_soon_threadsafe(_resolve, future, None, RuntimeError(error))
+            else:
+                loop.call_soon_threadsafe(_resolve, future, result, None)
+
+    def _check_workers(self) -> None:
+        if self._closing:
+            return
+        for process in self._processes:
+            if process.exitcode is not None:
+                self._fail(
+                    f"Embedding worker for {self.model_id} exited with code {process.exitcode}"
+                )
+                return
+
+    def _fail(self, error: str) -> None:
+        # The job a dead worker held is lost, and which one it was is unknown.
+        if self.error is None:
+            self.error = error
+            logging.getLogger(__name__).error(f"[Workers] {error}")
+        self._ready.set()
+        self._fail_pending(error)
+
+    def _fail_pending(self, error: str) -> None:
+        with self._lock:
+            entries = list(self._futures.values())
+        for loop, future in entries:
+            try:
+                loop.call_soon_threadsafe(_resolve, future, None, RuntimeError(error))
+            except RuntimeError:
+                pass  # Event loop already closed
+
+
+def _resolve(future: asyncio.Future, result: Any, error: Optional[Exception]) -> None:
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class _ProcessRegistry(ModelRegistry):
+    """Registry whose resident entries are worker pools instead of in-process models.
+
+    Pools count against the memory budget with one copy of the weights per
+    worker and are shut down when evicted, so they follow the same LRU
+    eviction as in-process models.
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        max_pending: int,
+        max_batch_tokens: int,
+        timeout: float,
+        start_timeout: float,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.num_workers = num_workers
+        self.max_pending = max_pending
+        self.max_batch_tokens = max_batch_tokens
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+
+    @property
+    def pools(self) -> dict[str, _ProcessPool]:
+        return {model_id: entry.model for (model_id, _), entry in self._models.items()}
+
+    def close(self) -> None:
+        for key in list(self._models):
+            self._models.pop(key).model.shutdown()
+
+    def _load(self, key: tuple[str, str]) -> _ProcessPool:
+        model_id, backend = key
+        path = self._local_path(model_id)
+        self._logger.info(f"[Workers] Starting {self.num_workers} processes for {model_id}")
+        pool = _ProcessPool(
+            model_id=model_id,
+            model_path=path,
+            device=self.device,
+            backend=backend,
+            onnx_int8_file=self.onnx_int8_file,
+            num_workers=self.num_workers,
+            max_pending=self.max_pending,
+            max_batch_tokens=self.max_batch_tokens,
+            timeout=self.timeout,
+        )
+        pool.wait_ready(self.start_timeout)
+        return pool
+
+    def _size(self, key: tuple[str, str], model: _ProcessPool) -> int:
+        return model.size_bytes
+
+    def _unload(self, model: _ProcessPool) -> None:
+        # Joining the workers blocks, so it happens off the event loop.
+        threading.Thread(target=model.shutdown, daemon=True).start()
+
+
+class ProcessEmbeddingModel(EmbeddingModel):
+    """Embedding model that encodes in worker processes instead of threads.
+
+    Each model gets ``num_workers`` processes holding their own copy of the
+    weights, so tokenization and pre/post-processing scale past the GIL. Result
+    matrices come back through shared memory rather than pickled lists. Worker
+    pools are the registry's resident entries, under the same memory budget
+    and LRU eviction as in-process models. Caching and micro-batching are
+    inherited unchanged.
+    """
+
+    def __init__(self, num_workers: int = 2, timeout: float = 60.0, start_timeout: float = 300.0, **kwargs):
+        """Initialize the model. Worker processes start on first use of a model.
+
+        Args:
+            num_workers: Worker processes per model
+            timeout: Seconds an encode job may take before the request fails
+            start_timeout: Seconds the workers of a model may take to load it
+            **kwargs: Parameters forwarded to ``EmbeddingModel``
+        """
+        super().__init__(**kwargs)
+        self.num_workers = num_workers
+        self.registry = _ProcessRegistry(
+            num_workers=num_workers,
+            max_pending=self.executor_max_pending,
+            max_batch_tokens=self.max_batch_tokens,
+            timeout=timeout,
+            start_timeout=start_timeout,
+            models_dir=self.registry.models_dir,
+            device=self.device,
+            memory_budget_bytes=self.registry.memory_budget_bytes,
+            default_backend=self.registry.default_backend,
+            backends=self.registry.backends,
+            onnx_int8_file=self.registry.onnx_int8_file,
+        )
+        self._logger = logging.getLogger(__name__)
+
+    def stats(self) -> dict[str, Any]:
+        stats = super().stats()
+        stats["processes"] = {
+            model_id: {"workers": self.num_workers, "pending": pool.pending}
+            for model_id, pool in self.registry.pools.items()
+        }
+        return stats
+
+    async def close(self) -> None:
+        await super().close()
+        await asyncio.to_thread(self.registry.close)
+
+    async def _encode(
+        self,
+        inputs: list[str],
+        model_id: str,
+        normalize_embeddings: bool,
+        **kwargs
+    ) -> tuple[np.ndarray, np.ndarray]:
+        pool = await self.registry.get(model_id)
+        if pool.broken:
+            # Replace a pool that lost a worker; the next request starts a fresh one.
+            self.registry.evict(model_id)
+            pool = await self.registry.get(model_id)
+        return await pool.encode(inputs, normalize_embeddings, **kwargs)
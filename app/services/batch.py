@@ -0,0 +1,486 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, AsyncIterator, BinaryIO, Callable, Optional
+
+import httpx
+from pydantic import ValidationError
+
+from app.api.schemas.llm import LLMRequest
+from app.core.metrics import metrics
+from app.core.ndjson import aiter_lines, dumps_line
+from app.database import SessionLocal
+from app.database.models.batch import BatchJob
+from app.repositories import BatchJobRepository
+from app.services.admission import (
+    AdmissionController,
+    Permit,
+    RateLimitExceeded,
+    TokenBucket,
+    estimate_chat_tokens
+)
+from app.services.ai.base import BaseModel
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Input lines read from disk per thread hop.
+_READ_LINES = 256
+# Bytes per chunk when streaming results back.
+_READ_CHUNK = 64 * 1024
+
+
+class BatchInputError(ValueError):
+    """Raised when an uploaded batch has a malformed line."""
+
+
+class _LeaseLost(Exception):
+    """Raised in a running job once another process took it over or it was cancelled."""
+
+
+class BatchRunner:
+    """Run JSONL batches of chat requests with a bounded pool of asyncio workers.
+
+    Jobs live in the ``batch_jobs`` table, their input and output as JSONL files
+    under ``jobs_dir``. Each job runs ``concurrency`` workers pulling input lines,
+    optionally paced to ``requests_per_second``, and writes one result line per
+    input line in input order. Completed results wait for earlier ones in a
+    window of ``2 * concurrency`` lines, so memory does not grow with the job.
+
+    Every ``checkpoint_items`` results or ``checkpoint_interval`` seconds the
+    output is fsynced and its length recorded with the number of results. A job
+    interrupted by a restart resumes from its last checkpoint, so items after it
+    may be sent upstream twice.
+
+    A running job is leased to one process for ``lease_seconds`` and the lease
+    is renewed while it runs, so several app processes never run the same
+    job. ``resume`` picks up jobs whose lease expired with their process.
+    Every item is admitted by the ``AdmissionController`` like an API request,
+    counted against the key ``batch:<job id>``, and waits instead of failing
+    when limits are reached.
+    """
+
+    def __init__(
+        self,
+        make_llm: Callable[[int], BaseModel],
+        jobs_dir: str,
+        max_running_jobs: int = 2,
+        checkpoint_items: int = 100,
+        checkpoint_interval: float = 5.0,
+        lease_seconds: float = 60.0,
+        admission: Optional[AdmissionController] = None,
+    ):
+        """Initialize the runner.
+
+        Args:
+            make_llm: Builds the model running a job's items from its per-item retry count
+            jobs_dir: Directory holding the input and output files of jobs
+            max_running_jobs: Jobs running at once; later ones stay queued
+            checkpoint_items: Results written between checkpoints
+            checkpoint_interval: Longest time between checkpoints of a running job
+            lease_seconds: Time after which a job whose process stopped renewing its lease may be taken over
+            admission: Admission controller items are admitted by, none when None
+        """
+        self.make_llm = make_llm
+        self.jobs_dir = jobs_dir
+        self.max_running_jobs = max_running_jobs
+        self.checkpoint_items = checkpoint_items
+        self.checkpoint_interval = checkpoint_interval
+        self.lease_seconds = lease_seconds
+        self.admission = admission
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._succeeded = metrics.counter("batch.items.succeeded")
+        self._failed = metrics.counter("batch.items.failed")
+        self._logger = logging.getLogger(__name__)
+
+    async def create(
+        self,
+        lines: AsyncIterator[bytes],
+        concurrency: int,
+        max_retries: int,
+        requests_per_second: Optional[float] = None,
+    ) -> BatchJob:
+        """Store an uploaded JSONL batch and queue it.
+
+        Each line is an ``LLMRequest`` payload, optionally with a ``custom_id``
+        echoed back in its result.
+
+        Raises:
+            BatchInputError: If a line is not a valid chat request
+        """
+        job_id = f"batch_{uuid.uuid4().hex}"
+        input_path = os.path.join(self.jobs_dir, f"{job_id}.input.jsonl")
+        output_path = os.path.join(self.jobs_dir, f"{job_id}.output.jsonl")
+        await asyncio.to_thread(os.makedirs, self.jobs_dir, exist_ok=True)
+
+        total = 0
+        file = await asyncio.to_thread(open, input_path, "wb")
+        try:
+            buffer: list[bytes] = []
+            async for line in aiter_lines(lines):
+                total += 1
+                buffer.append(_normalize_line(line, total))
+                if len(buffer) >= _READ_LINES:
+                    await asyncio.to_thread(file.writelines, buffer)
+                    buffer = []
+            await asyncio.to_thread(file.writelines, buffer)
+            await asyncio.to_thread(_sync_close, file)
+        except BaseException:
+            file.close()
+            await asyncio.to_thread(os.remove, input_path)
+            raise
+        if total == 0:
+            await asyncio.to_thread(os.remove, input_path)
+            raise BatchInputError("Batch is empty")
+
+        job = await self._db(lambda repository: repository.create(
+            id=job_id,
+            status="queued",
+            input_path=input_path,
+            output_path=output_path,
+            concurrency=concurrency,
+            max_retries=max_retries,
+            requests_per_second=requests_per_second,
+            total_items=total,
+            checkpoint=0,
+            output_offset=0,
+            succeeded_items=0,
+            failed_items=0,
+        ))
+        self.start(job_id)
+        return job
+
+    def start(self, job_id: str) -> None:
+        """Run a job in the background unless it already runs."""
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            task = self._tasks[job_id] = asyncio.create_task(self._run(job_id))
+            task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def resume(self) -> int:
+        """Start the queued or running jobs no live process holds a lease on.
+
+        That is jobs left by a previous process, or by one that stopped
+        renewing its lease. Call it periodically to take those over.
+        """
+        jobs = await self._db(lambda repository: repository.get_unclaimed(ACTIVE_STATUSES, _now()))
+        jobs = [job for job in jobs if job.id not in self._tasks]
+        for job in jobs:
+            self.start(job.id)
+        if jobs:
+            self._logger.info(f"[Batch] Resuming {len(jobs)} jobs")
+        return len(jobs)
+
+    async def get(self, job_id: str) -> Optional[BatchJob]:
+        return await self._db(lambda repository: repository.get(job_id))
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; results up to its last checkpoint are kept."""
+        cancelled = await self._db(lambda repository: repository.update(
+            job_id, {"status": "cancelled", "finished_at": _now()}, statuses=ACTIVE_STATUSES
+        ))
+        task = self._tasks.get(job_id)
+        if cancelled and task is not None:
+            task.cancel()
+        return cancelled
+
+    async def stream_results(self, job: BatchJob) -> AsyncIterator[bytes]:
+        """Yield the checkpointed results of a job, read from disk chunk by chunk."""
+        remaining = job.output_offset
+        if remaining == 0:
+            return
+        file = await asyncio.to_thread(open, job.output_path, "rb")
+        try:
+            while remaining > 0:
+                chunk = await asyncio.to_thread(file.read, min(_READ_CHUNK, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            file.close()
+
+    async def close(self) -> None:
+        """Stop running jobs at their last checkpoint; they resume on next start."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job_id: str) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_running_jobs)
+        async with self._slots:
+            job = await self.get(job_id)
+            if job is None or job.status not in ACTIVE_STATUSES:
+                return
+            now = _now()
+            started = await self._db(lambda repository: repository.claim(
+                job_id,
+                self.owner,
+                now,
+                {
+                    "status": "running",
+                    "started_at": job.started_at or now,
+                    "updated_at": now,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                },
+                statuses=ACTIVE_STATUSES,
+            ))
+            if not started:
+                return
+            # Another process may have moved the checkpoint on before its lease expired.
+            job = await self.get(job_id)
+
+            self._logger.info(f"[Batch] Running {job_id} from item {job.checkpoint}/{job.total_items}")
+            try:
+                await self._process(job)
+            except asyncio.CancelledError:
+                self._logger.info(f"[Batch] Stopped {job_id}")
+                # Let the next process resume the job without waiting for the lease to expire.
+                await self._db(lambda repository: repository.update(
+                    job_id, {"owner": None, "lease_expires_at": None}, owner=self.owner
+                ))
+                raise
+            except _LeaseLost:
+                self._logger.warning(f"[Batch] Lost the lease of {job_id}, stopping")
+                return
+            except Exception as e:
+                self._logger.error(f"[Batch] {job_id} failed: {e}")
+                await self._db(lambda repository: repository.update(
+                    job_id,
+                    {"status": "failed", "error": str(e), "finished_at": _now()},
+                    statuses=("running",),
+                    owner=self.owner,
+                ))
+                return
+            await self._db(lambda repository: repository.update(
+                job_id, {"status": "completed", "finished_at": _now()}, statuses=("running",), owner=self.owner
+            ))
+            self._logger.info(f"[Batch] Completed {job_id}")
+
+    async def _process(self, job: BatchJob) -> None:
+        llm = self.make_llm(job.max_retries)
+        pacing = None
+        if job.requests_per_second:
+            pacing = TokenBucket(job.requests_per_second, 1.0)
+
+        source = await asyncio.to_thread(open, job.input_path, "rb")
+        sink = await asyncio.to_thread(_open_output, job.output_path, job.output_offset)
+        try:
+            # Bounds items in flight plus results waiting for an earlier one to finish.
+            window = asyncio.Semaphore(2 * job.concurrency)
+            items: asyncio.Queue = asyncio.Queue(maxsize=job.concurrency)
+            results: asyncio.Queue = asyncio.Queue()
+
+            async def produce() -> None:
+                await asyncio.to_thread(_skip_lines, source, job.checkpoint)
+                index = job.checkpoint
+                while True:
+                    lines = await asyncio.to_thread(lambda: list(islice(source, _READ_LINES)))
+                    if not lines:
+                        break
+                    for line in lines:
+                        await window.acquire()
+                        await items.put((index, line))
+                        index += 1
+                for _ in range(job.concurrency):
+                    await items.put(None)
+
+            async def work() -> None:
+                while (item := await items.get()) is not None:
+                    index, line = item
+                    await results.put((index, *await self._run_item(llm, pacing, job.id, index, line)))
+
+            async def write() -> None:
+                await self._write_results(job, sink, results, window)
+
+            tasks = [asyncio.create_task(produce()), asyncio.create_task(write())]
+            tasks += [asyncio.create_task(work()) for _ in range(job.concurrency)]
+            # Renewing the lease never ends on its own; it only fails once the lease is lost.
+            lease = asyncio.create_task(self._renew_lease(job.id))
+            running = asyncio.gather(*tasks)
+            try:
+                await asyncio.wait((running, lease), return_when=asyncio.FIRST_COMPLETED)
+                if lease.done():
+                    lease.result()
+                running.result()
+            finally:
+                for task in (*tasks, lease):
+                    task.cancel()
+                await asyncio.gather(*tasks, lease, return_exceptions=True)
+        finally:
+            source.close()
+            sink.close()
+
+    async def _run_item(
+        self,
+        llm: BaseModel,
+        pacing: Optional[TokenBucket],
+        job_id: str,
+        index: int,
+        line: bytes,
+    ) -> tuple[bytes, bool]:
+        record = json.loads(line)
+        result: dict[str, Any] = {"index": index, "custom_id": record.get("custom_id")}
+        if pacing is not None:
+            now = time.monotonic()
+            wait = pacing.wait_time(1, now)
+            pacing.take(1, now)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        permit = await self._admit(job_id, record["body"])
+        try:
+            result["response"] = await llm.infer(record["body"])
+            if permit is not None:
+                permit.settle((result["response"].get("usage") or {}).get("total_tokens"))
+        except Exception as e:
+            result["error"] = _describe_error(e)
+            self._failed.inc()
+            return dumps_line(result), False
+        finally:
+            if permit is not None:
+                permit.release()
+        self._succeeded.inc()
+        return dumps_line(result), True
+
+    async def _admit(self, job_id: str, body: dict[str, Any]) -> Optional[Permit]:
+        if self.admission is None:
+            return None
+        tokens = estimate_chat_tokens(body)
+        while True:
+            try:
+                return await self.admission.acquire(body["model"], f"batch:{job_id}", tokens)
+            except RateLimitExceeded as e:
+                # Batches trade latency for throughput: wait for capacity instead of failing the item.
+                await asyncio.sleep(e.retry_after)
+
+    async def _renew_lease(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            renewed = await self._db(lambda repository: repository.update(
+                job_id,
+                {"lease_expires_at": _now() + timedelta(seconds=self.lease_seconds)},
+                statuses=("running",),
+                owner=self.owner,
+            ))
+            if not renewed:
+                raise _LeaseLost(job_id)
+
+    async def _write_results(
+        self,
+        job: BatchJob,
+        sink: BinaryIO,
+        results: asyncio.Queue,
+        window: asyncio.Semaphore,
+    ) -> None:
+        next_index = job.checkpoint
+        succeeded, failed = job.succeeded_items, job.failed_items
+        done: dict[int, tuple[bytes, bool]] = {}
+        ready: list[bytes] = []
+        last_checkpoint = time.monotonic()
+
+        while next_index < job.total_items:
+            index, line, ok = await results.get()
+            done[index] = (line, ok)
+            while next_index in done:
+                line, ok = done.pop(next_index)
+                ready.append(line)
+                if ok:
+                    succeeded += 1
+                else:
+                    failed += 1
+                next_index += 1
+                window.release()
+
+            due = time.monotonic() - last_checkpoint >= self.checkpoint_interval
+            if ready and (len(ready) >= self.checkpoint_items or due or next_index == job.total_items):
+                offset = await asyncio.to_thread(_append_synced, sink, ready)
+                ready = []
+                last_checkpoint = time.monotonic()
+                progress = {
+                    "checkpoint": next_index,
+                    "output_offset": offset,
+                    "succeeded_items": succeeded,
+                    "failed_items": failed,
+                    "updated_at": _now(),
+                }
+                updated = await self._db(lambda repository: repository.update(
+                    job.id, progress, statuses=("running",), owner=self.owner
+                ))
+                if not updated:
+                    raise _LeaseLost(job.id)
+
+    @staticmethod
+    async def _db(operation: Callable[[BatchJobRepository], Any]) -> Any:
+        def run() -> Any:
+            db = SessionLocal()
+            try:
+                return operation(BatchJobRepository(db))
+            finally:
+                db.close()
+        return await asyncio.to_thread(run)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": len(self._tasks),
+            "max_running_jobs": self.max_running_jobs,
+            "succeeded_items": self._succeeded.value,
+            "failed_items": self._failed.value,
+        }
+
+
+def _normalize_line(line: bytes, number: int) -> bytes:
+    try:
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("expected a JSON object")
+        custom_id = record.pop("custom_id", None)
+        request = LLMRequest.model_validate(record)
+    except (ValueError, ValidationError) as e:
+        raise BatchInputError(f"Line {number}: {e}") from None
+    body = {**request.model_dump(exclude_none=True), "stream": False}
+    return dumps_line({"custom_id": custom_id, "body": body})
+
+
+def _describe_error(error: Exception) -> dict[str, Any]:
+    if isinstance(error, httpx.HTTPStatusError):
+        return {"status": error.response.status_code, "message": str(error)}
+    return {"message": str(error) or type(error).__name__}
+
+
+def _open_output(path: str, offset: int) -> BinaryIO:
+    # Results past the last checkpoint are not recorded anywhere: drop them and redo those items.
+    file = open(path, "r+b" if os.path.exists(path) else "wb")
+    file.truncate(offset)
+    file.seek(offset)
+    return file
+
+
+def _append_synced(file: BinaryIO, lines: list[bytes]) -> int:
+    file.writelines(lines)
+    file.flush()
+    os.fsync(file.fileno())
+    return file.tell()
+
+
+def _skip_lines(file: BinaryIO, count: int) -> None:
+    for _ in islice(file, count):
+        pass
+
+
+def _sync_close(file: BinaryIO) -> None:
+    file.flush()
+    os.fsync(file.fileno())
+    file.close()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
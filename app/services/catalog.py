@@ -0,0 +1,367 @@
+import asyncio
+import json
+import logging
+import time
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import select
+
+from app.core.config import RateLimitConfig
+from app.core.metrics import metrics
+from app.database import AsyncSessionLocal
+from app.database.models.model import Model
+from app.repositories.model import MODEL_CHANGES_CHANNEL
+from app.services.ai.router import Endpoint
+
+# Longest wait between reconnects of the change listener.
+_MAX_RECONNECT_SECONDS = 60.0
+
+
+@dataclass(frozen=True)
+class CatalogModel:
+    """Immutable copy of one row of the models table."""
+
+    id: int
+    name: str
+    provider: str
+    model_id: str
+    model_type: str
+    description: Optional[str]
+    max_tokens: Optional[int]
+    input_cost_per_token: Optional[float]
+    output_cost_per_token: Optional[float]
+    context_window: Optional[int]
+    dimension: Optional[int]
+    requests_per_second: Optional[float]
+    tokens_per_minute: Optional[int]
+    max_concurrency: Optional[int]
+    is_active: bool
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_row(cls, row: Model) -> "CatalogModel":
+        return cls(**{field.name: getattr(row, field.name) for field in fields(cls)})
+
+
+class _Snapshot:
+    """Rows of the models table indexed by id, by (provider, model_id) and by name or model_id."""
+
+    def __init__(self, models: list[CatalogModel]):
+        self.by_id: dict[int, CatalogModel] = {}
+        self.by_key: dict[tuple[str, str], CatalogModel] = {}
+        self.by_name: dict[str, list[CatalogModel]] = {}
+        for model in models:
+            self._index(model)
+        # Sorted ids, for listing in id order from any keyset cursor.
+        self.ids: list[int] = sorted(self.by_id)
+
+    def put(self, model: CatalogModel) -> None:
+        self.remove(model.id)
+        self._index(model)
+        insort(self.ids, model.id)
+
+    def remove(self, id: int) -> None:
+        model = self.by_id.pop(id, None)
+        if model is None:
+            return
+        del self.ids[bisect_left(self.ids, id)]
+        if self.by_key.get((model.provider, model.model_id)) is model:
+            del self.by_key[(model.provider, model.model_id)]
+        for name in {model.name, model.model_id}:
+            entries = [entry for entry in self.by_name.get(name, []) if entry.id != id]
+            if entries:
+                self.by_name[name] = entries
+            else:
+                self.by_name.pop(name, None)
+
+    def _index(self, model: CatalogModel) -> None:
+        self.by_id[model.id] = model
+        self.by_key[(model.provider, model.model_id)] = model
+        for name in {model.name, model.model_id}:
+            entries = self.by_name.setdefault(name, [])
+            entries.append(model)
+            entries.sort(key=lambda entry: entry.id)
+
+
+def _matches(
+    model: CatalogModel, provider: Optional[str], model_type: Optional[str], is_active: Optional[bool]
+) -> bool:
+    return (
+        (not provider or model.provider == provider)
+        and (not model_type or model.model_type == model_type)
+        and (is_active is None or model.is_active == is_active)
+    )
+
+
+class ModelCatalog:
+    """In-process, read-through copy of the models table.
+
+    The whole table is loaded on first use and then kept current from the
+    NOTIFY events ``ModelRepository`` writes on ``MODEL_CHANGES_CHANNEL``:
+    each event re-reads only the row it names, bulk imports reload the table. The listener holds one
+    dedicated connection and reconnects with backoff; after every
+    (re)connect, and whenever the snapshot is older than ``ttl`` seconds,
+    the table is reloaded in full so missed events are caught up.
+
+    Lookups are plain dict reads and never touch the database once loaded.
+    """
+
+    def __init__(self, dsn: Optional[str] = None, ttl: float = 300.0):
+        """Initialize the catalog.
+
+        Args:
+            dsn: libpq URL of the database to LISTEN on; None to rely on the TTL only
+            ttl: Seconds after which the snapshot is reloaded in full
+        """
+        self.dsn = dsn
+        self.ttl = ttl
+        self._snapshot: Optional[_Snapshot] = None
+        self._loaded_at = 0.0
+        self._load_lock = asyncio.Lock()
+        self._reload: Optional[asyncio.Task] = None
+        # A change was announced while a reload was running, which may have read the table before it.
+        self._reload_again = False
+        self._listener: Optional[asyncio.Task] = None
+        self._updates: set[asyncio.Task] = set()
+        # Rows changed while a full load is running, applied again once it is in place.
+        self._changed_during_load: Optional[set[int]] = None
+        self._loads = metrics.counter("catalog.loads")
+        self._events = metrics.counter("catalog.events")
+        self._errors = metrics.counter("catalog.errors")
+        self._logger = logging.getLogger(__name__)
+
+    def start(self) -> None:
+        """Start listening for changes to the models table."""
+        if self.dsn and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        tasks = [task for task in (self._listener, self._reload, *self._updates) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._listener = self._reload = None
+        self._updates.clear()
+
+    async def get(self, id: int) -> Optional[CatalogModel]:
+        """Return the model with primary key ``id``, active or not."""
+        return (await self._current()).by_id.get(id)
+
+    async def get_by_model_id(self, model_id: str, provider: str) -> Optional[CatalogModel]:
+        return (await self._current()).by_key.get((provider, model_id))
+
+    async def find_active(self, name: str, model_type: Optional[str] = None) -> list[CatalogModel]:
+        """Return the active models registered under a logical name or model_id."""
+        return [
+            model for model in (await self._current()).by_name.get(name, ())
+            if model.is_active and (model_type is None or model.model_type == model_type)
+        ]
+
+    async def get_all(
+        self,
+        provider: Optional[str] = None,
+        model_type: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> list[CatalogModel]:
+        """Return up to ``limit`` models matching the filters in id order, starting after ``after_id``."""
+        snapshot = await self._current()
+        ids = snapshot.ids
+        models: list[CatalogModel] = []
+        for index in range(bisect_right(ids, after_id) if after_id is not None else 0, len(ids)):
+            if limit is not None and len(models) >= limit:
+                break
+            model = snapshot.by_id[ids[index]]
+            if _matches(model, provider, model_type, is_active):
+                models.append(model)
+        return models
+
+    async def count(
+        self,
+        provider: Optional[str] = None,
+        model_type: Optional[str] = None,
+        is_active: Optional[bool] = None
+    ) -> int:
+        """Count the models matching the filters."""
+        snapshot = await self._current()
+        if not provider and not model_type and is_active is None:
+            return len(snapshot.by_id)
+        return sum(1 for model in snapshot.by_id.values() if _matches(model, provider, model_type, is_active))
+
+    async def resolve_fallback_models(self, model_ids: list[str]) -> list[str]:
+        """Keep the fallback models that are registered and active, in configured order."""
+        return [model_id for model_id in model_ids if await self.find_active(model_id)]
+
+    async def resolve_model_endpoints(self, name: str) -> list[Endpoint]:
+        """Return the active provider endpoints registered under a logical model name."""
+        return [
+            Endpoint(
+                provider=model.provider,
+                model_id=model.model_id,
+                input_cost_per_token=model.input_cost_per_token,
+                output_cost_per_token=model.output_cost_per_token,
+            )
+            for model in await self.find_active(name)
+            if model.name == name
+        ]
+
+    async def resolve_model_limits(self, name: str) -> Optional[RateLimitConfig]:
+        """Return the admission limits registered for a model name or model_id.
+
+        Returns:
+            The summed limits of its active endpoints, unset where none sets
+            one, or None when no active model is registered under ``name``
+        """
+        models = await self.find_active(name)
+        if not models:
+            return None
+        # Endpoints of a logical name are separate provider quotas: their limits add up.
+        limits = {}
+        for field in ("requests_per_second", "tokens_per_minute", "max_concurrency"):
+            values = [getattr(model, field) for model in models if getattr(model, field) is not None]
+            limits[field] = sum(values) if values else None
+        return RateLimitConfig(**limits)
+
+    def remember(self, row: Model) -> None:
+        """Take in a row this process just wrote, without waiting for its change event."""
+        self._set(row.id, CatalogModel.from_row(row))
+
+    def forget(self, id: int) -> None:
+        """Drop a row this process just deleted."""
+        self._set(id, None)
+
+    async def refresh(self, id: int) -> None:
+        """Re-read one row from the database."""
+        async with AsyncSessionLocal() as db:
+            row = await db.get(Model, id)
+            self._set(id, CatalogModel.from_row(row) if row is not None else None)
+
+    def _set(self, id: int, model: Optional[CatalogModel]) -> None:
+        if self._changed_during_load is not None:
+            self._changed_during_load.add(id)
+        if self._snapshot is None:
+            return
+        if model is None:
+            self._snapshot.remove(id)
+        else:
+            self._snapshot.put(model)
+
+    async def load(self) -> None:
+        """Reload the whole table, replacing the snapshot."""
+        async with self._load_lock:
+            await self._load()
+
+    async def _load(self) -> None:
+        self._changed_during_load = set()
+        try:
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(select(Model))).scalars().all()
+                snapshot = _Snapshot([CatalogModel.from_row(row) for row in rows])
+            changed = self._changed_during_load
+            self._snapshot, self._loaded_at = snapshot, time.monotonic()
+        finally:
+            self._changed_during_load = None
+        self._loads.inc()
+        # Events that arrived mid-load may describe rows newer than the loaded copies.
+        for id in changed:
+            await self.refresh(id)
+
+    async def _current(self) -> _Snapshot:
+        if self._snapshot is None:
+            async with self._load_lock:
+                if self._snapshot is None:
+                    await self._load()
+        elif time.monotonic() - self._loaded_at >= self.ttl:
+            # Stale: keep serving the current snapshot while it reloads.
+            self._schedule_reload()
+        return self._snapshot
+
+    def _schedule_reload(self, follow_up: bool = False) -> None:
+        """Reload in the background; with ``follow_up``, once more after a reload already running."""
+        if self._reload is None or self._reload.done():
+            self._reload = asyncio.create_task(self._reload_quietly())
+        elif follow_up:
+            self._reload_again = True
+
+    async def _reload_quietly(self) -> None:
+        while True:
+            self._reload_again = False
+            try:
+                await self.load()
+            except Exception as e:
+                self._errors.inc()
+                self._logger.warning(f"[Catalog] Reload failed: {e}")
+            if not self._reload_again:
+                return
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        delay = 1.0
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except Exception as e:
+                self._errors.inc()
+                self._logger.warning(f"[Catalog] Could not connect the change listener: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_RECONNECT_SECONDS)
+                continue
+            lost = asyncio.Event()
+            try:
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(MODEL_CHANGES_CHANNEL, self._on_notify)
+                # Changes made while not listening are only picked up by a full load.
+                await self.load()
+                delay = 1.0
+                await lost.wait()
+                self._logger.warning("[Catalog] Change listener disconnected, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._errors.inc()
+                self._logger.warning(f"[Catalog] Change listener failed: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_RECONNECT_SECONDS)
+            finally:
+                if not connection.is_closed():
+                    await connection.close()
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+            id = None if event["op"] == "reload" else int(event["id"])
+        except (ValueError, KeyError, TypeError):
+            self._logger.warning(f"[Catalog] Ignoring malformed change event: {payload!r}")
+            return
+        self._events.inc()
+        if id is None:
+            # Bulk changes are announced once for the whole table.
+            self._schedule_reload(follow_up=True)
+            return
+        task = asyncio.create_task(self._apply(id))
+        self._updates.add(task)
+        task.add_done_callback(self._updates.discard)
+
+    async def _apply(self, id: int) -> None:
+        try:
+            await self.refresh(id)
+        except Exception as e:
+            # The row stays as it was until the next full load.
+            self._errors.inc()
+            self._logger.warning(f"[Catalog] Could not refresh model {id}: {e}")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "models": len(self._snapshot.by_id) if self._snapshot is not None else None,
+            "age_seconds": time.monotonic() - self._loaded_at if self._snapshot is not None else None,
+            "listening": self._listener is not None and not self._listener.done(),
+            "loads": self._loads.value,
+            "events": self._events.value,
+            "errors": self._errors.value,
+        }
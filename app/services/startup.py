@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import time
+
+from app.database import SessionLocal
+from app.repositories import ModelRepository
+from app.services.ai import EmbeddingModel
+
+logger = logging.getLogger(__name__)
+
+
+def _active_embedding_model_ids() -> list[str]:
+    db = SessionLocal()
+    try:
+        models = ModelRepository(db).get_all(
+            limit=10_000, model_type="embedding", is_active=True
+        )
+        return [model.model_id for model in models]
+    finally:
+        db.close()
+
+
+async def preload_embedding_models(
+    embedding_model: EmbeddingModel,
+    status: dict[str, str],
+    batch_size: int = 8,
+    max_backoff: float = 30.0,
+) -> None:
+    """Load and warm up every active embedding model registered in the models table.
+
+    Reading the models table and warming up a model are both retried with
+    exponential backoff, so a database that is still starting or a model that
+    failed once does not leave the service unready for good. Returns once
+    every model is ready.
+
+    Args:
+        embedding_model: Embedding model whose registry receives the models
+        status: Filled in place with the status per model ID: "loading",
+            "ready" or the error of the last warm-up attempt
+        batch_size: Size of the synthetic warm-up batch
+        max_backoff: Upper bound in seconds on the delay between attempts
+    """
+    delay = 1.0
+    while True:
+        try:
+            model_ids = await asyncio.to_thread(_active_embedding_model_ids)
+            break
+        except Exception as e:
+            logger.warning(f"[Startup] Could not read active embedding models, retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_backoff)
+
+    for model_id in model_ids:
+        status[model_id] = "loading"
+
+    delay = 1.0
+    while True:
+        for model_id in [model_id for model_id in model_ids if status[model_id] != "ready"]:
+            start = time.perf_counter()
+            try:
+                await embedding_model.warm_up(model_id, batch_size=batch_size)
+                status[model_id] = "ready"
+                logger.info(f"[Startup] Warmed up {model_id} in {time.perf_counter() - start:.2f}s")
+            except Exception as e:
+                status[model_id] = f"error: {e}"
+                logger.error(f"[Startup] Failed to warm up {model_id}, retrying in {delay:.0f}s: {e}")
+
+        if all(status[model_id] == "ready" for model_id in model_ids):
+            return
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_backoff)
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from app.core.metrics import metrics
+from app.database import SessionLocal
+from app.repositories import UsageRepository
+
+
+@dataclass
+class UsageEvent:
+    """Tokens, cost and latency of one served request."""
+
+    request_type: str
+    model: str
+    provider: str
+    model_id: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    cost: Optional[float] = None
+    latency_ms: Optional[float] = None
+    cached: bool = False
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def usage_cost(
+    usage: dict[str, Any],
+    input_cost_per_token: Optional[float],
+    output_cost_per_token: Optional[float],
+) -> Optional[float]:
+    """Cost of a completion from the registered prices, else as reported by the provider."""
+    if input_cost_per_token is not None or output_cost_per_token is not None:
+        return (
+            (usage.get("prompt_tokens") or 0) * (input_cost_per_token or 0.0)
+            + (usage.get("completion_tokens") or 0) * (output_cost_per_token or 0.0)
+        )
+    cost = usage.get("cost")
+    return float(cost) if isinstance(cost, (int, float)) else None
+
+
+class UsageSniffer:
+    """Pick the ``usage`` object out of the raw SSE bytes of a streamed completion.
+
+    Only complete lines mentioning ``"usage"`` are decoded, so content chunks
+    are passed over without being parsed.
+    """
+
+    def __init__(self):
+        self._buffer = b""
+        self.usage: Optional[dict[str, Any]] = None
+
+    def feed(self, chunk: bytes) -> None:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        if b"\n" not in chunk:
+            self._buffer += chunk
+            return
+        lines = (self._buffer + chunk).split(b"\n")
+        self._buffer = lines.pop()
+        for line in lines:
+            self._feed_line(line)
+
+    def _feed_line(self, line: bytes) -> None:
+        if b'"usage"' not in line or not line.startswith(b"data:"):
+            return
+        try:
+            event = json.loads(line[len(b"data:"):])
+        except ValueError:
+            return
+        if isinstance(event, dict) and event.get("usage"):
+            self.usage = event["usage"]
+
+
+class UsageLedger:
+    """Record per-request usage off the request path and write it in batches.
+
+    ``record`` only puts the event on a bounded in-memory queue; a background
+    task drains it into multi-row inserts of ``usage_records`` every
+    ``batch_size`` events or ``flush_interval`` seconds, whichever comes first.
+    When the queue is full, or a batch cannot be written, events are dropped
+    and counted rather than slowing down or failing requests.
+    """
+
+    def __init__(self, max_queue_size: int = 10_000, batch_size: int = 500, flush_interval: float = 1.0):
+        """Initialize the ledger.
+
+        Args:
+            max_queue_size: Events buffered before new ones are dropped
+            batch_size: Maximum events written per insert
+            flush_interval: Seconds a partial batch waits before being written
+        """
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue[UsageEvent] = asyncio.Queue(maxsize=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self._pending: list[UsageEvent] = []
+        self._recorded = metrics.counter("usage.ledger.recorded")
+        self._written = metrics.counter("usage.ledger.written")
+        self._dropped = metrics.counter("usage.ledger.dropped")
+        self._flush_seconds = metrics.histogram("usage.ledger.flush_seconds")
+        self._logger = logging.getLogger(__name__)
+
+    def record(self, event: UsageEvent) -> None:
+        """Queue an event for the next batch without waiting."""
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._dropped.inc()
+            return
+        self._recorded.inc()
+
+    def start(self) -> None:
+        """Start the background flusher."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the flusher and write whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        pending, self._pending = self._pending, []
+        await self._flush(pending)
+        while not self._queue.empty():
+            await self._flush(self._drain(self.batch_size))
+
+    async def _run(self) -> None:
+        batch: list[UsageEvent] = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    batch.extend(self._drain(self.batch_size - len(batch)))
+                    remaining = deadline - time.monotonic()
+                    if len(batch) >= self.batch_size or remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                # The shielded write finishes even if cancelled, so it is not handed over twice.
+                batch, ready = [], batch
+                await self._flush(ready)
+        except asyncio.CancelledError:
+            # Stopped while collecting: hand the partial batch to ``close``.
+            self._pending = batch
+            raise
+
+    def _drain(self, limit: int) -> list[UsageEvent]:
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return events
+
+    async def _flush(self, batch: list[UsageEvent]) -> None:
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            # Shielded so a shutdown mid-write does not lose the batch being written.
+            await asyncio.shield(asyncio.to_thread(self._write, [asdict(event) for event in batch]))
+        except Exception as e:
+            self._dropped.inc(len(batch))
+            self._logger.warning(f"[Usage] Dropped {len(batch)} usage records: {e}")
+            return
+        self._flush_seconds.observe(time.perf_counter() - start)
+        self._written.inc(len(batch))
+
+    @staticmethod
+    def _write(rows: list[dict[str, Any]]) -> None:
+        db = SessionLocal()
+        try:
+            UsageRepository(db).bulk_insert(rows)
+        finally:
+            db.close()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "recorded": self._recorded.value,
+            "written": self._written.value,
+            "dropped": self._dropped.value,
+        }
@@ -0,0 +1,343 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Literal, Optional, Sequence
+
+from sqlalchemy.exc import IntegrityError
+
+from app.core.metrics import metrics
+from app.database import SessionLocal
+from app.database.models.vector import VectorCollection
+from app.repositories import VectorRepository
+from app.services.admission import AdmissionController, estimate_tokens
+from app.services.ai.embedded import EmbeddingModel
+from app.services.catalog import ModelCatalog
+
+
+class VectorInputError(Exception):
+    """Raised for a collection, document or query that cannot be accepted."""
+
+
+class CollectionNotFoundError(Exception):
+    """Raised when a collection does not exist."""
+
+
+class CollectionExistsError(Exception):
+    """Raised when creating a collection under a name already in use."""
+
+
+class VectorStore:
+    """Collections of documents embedded with a local model and searched in pgvector.
+
+    A collection is bound to one embedding model registered in the models
+    table and takes its dimension from there. Documents are embedded on
+    ingest and COPYed into ``vector_documents`` in batches; every collection
+    has its own partial HNSW or IVFFlat index over the vectors of its
+    dimension, with the operator class of its metric. Searches embed the
+    query text (or take a vector), filter on metadata containment and report
+    the time spent embedding and searching.
+    """
+
+    def __init__(
+        self,
+        embedding_model: EmbeddingModel,
+        catalog: ModelCatalog,
+        ef_search: int = 100,
+        probes: int = 10,
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 64,
+        ingest_batch_size: int = 256,
+        admission: Optional[AdmissionController] = None,
+    ):
+        """Initialize the store.
+
+        Args:
+            embedding_model: Local embedding model documents and queries are embedded with
+            catalog: Model catalog the embedding models of collections are looked up in
+            ef_search: Default HNSW candidate list size of searches
+            probes: Default IVFFlat lists scanned by searches
+            hnsw_m: Links per node of new HNSW indexes
+            hnsw_ef_construction: Candidate list size while building HNSW indexes
+            ingest_batch_size: Documents embedded and written per transaction
+            admission: Rate limits the embedding of documents and queries is admitted against
+        """
+        self.embedding_model = embedding_model
+        self.catalog = catalog
+        self.ef_search = ef_search
+        self.probes = probes
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.ingest_batch_size = ingest_batch_size
+        self.admission = admission
+        self._written = metrics.counter("vectors.documents_written")
+        self._searches = metrics.counter("vectors.searches")
+        self._embed_time = metrics.histogram("vectors.embed_seconds")
+        self._write_time = metrics.histogram("vectors.write_seconds")
+        self._search_time = metrics.histogram("vectors.search_seconds")
+        self._logger = logging.getLogger(__name__)
+
+    async def create_collection(
+        self,
+        name: str,
+        embedding_model: str,
+        metric: Literal["cosine", "inner_product"] = "cosine",
+        index_type: Literal["hnsw", "ivfflat"] = "hnsw",
+        lists: Optional[int] = None,
+        description: Optional[str] = None,
+    ) -> VectorCollection:
+        """Create a collection of the embedding model registered as ``embedding_model``.
+
+        Raises:
+            VectorInputError: If the model is not an active embedding model with a dimension
+            CollectionExistsError: If the name is taken
+        """
+        models = await self.catalog.find_active(embedding_model, model_type="embedding")
+        if not models:
+            raise VectorInputError(f"Embedding model '{embedding_model}' is not registered or not active")
+        dimensions = {model.dimension for model in models}
+        if len(dimensions) != 1 or None in dimensions:
+            raise VectorInputError(f"Embedding model '{embedding_model}' has no single registered dimension")
+        values = dict(
+            name=name,
+            description=description,
+            embedding_model_id=models[0].model_id,
+            dimension=dimensions.pop(),
+            metric=metric,
+            index_type=index_type,
+        )
+        if index_type == "ivfflat":
+            # Lists are trained on the rows present at build time: rebuild once loaded.
+            values["ivfflat_lists"] = lists or 100
+        else:
+            values["hnsw_m"] = self.hnsw_m
+            values["hnsw_ef_construction"] = self.hnsw_ef_construction
+        return await asyncio.to_thread(self._create_collection, values)
+
+    async def get_collection(self, name: str) -> VectorCollection:
+        collection = await asyncio.to_thread(self._get_collection, name)
+        if collection is None:
+            raise CollectionNotFoundError(f"Collection '{name}' not found")
+        return collection
+
+    async def list_collections(self) -> list[VectorCollection]:
+        return await asyncio.to_thread(self._list_collections)
+
+    async def delete_collection(self, name: str) -> None:
+        await asyncio.to_thread(self._delete_collection, name)
+
+    async def rebuild_index(self, name: str, lists: Optional[int] = None) -> VectorCollection:
+        """Rebuild the vector index of a collection; IVFFlat lists default to sqrt(documents)."""
+        return await asyncio.to_thread(self._rebuild_index, name, lists)
+
+    async def upsert(
+        self, name: str, documents: Sequence[tuple[str, str, dict[str, Any]]], client_key: str
+    ) -> dict[str, Any]:
+        """Embed and insert or replace ``(id, content, metadata)`` documents of a collection.
+
+        A document given twice keeps its last version. Every batch of
+        ``ingest_batch_size`` documents is admitted for ``client_key`` and
+        committed on its own.
+        """
+        collection = await self.get_collection(name)
+        unique = list({document[0]: document for document in documents}.values())
+        summary = {"created": 0, "updated": 0, "embedding_ms": 0.0, "write_ms": 0.0}
+        for start in range(0, len(unique), self.ingest_batch_size):
+            batch = unique[start:start + self.ingest_batch_size]
+            started = time.perf_counter()
+            embeddings = await self._embed(collection, [content for _, content, _ in batch], client_key)
+            embedded = time.perf_counter()
+            rows = [(*document, embedding) for document, embedding in zip(batch, embeddings)]
+            created, updated = await asyncio.to_thread(self._write, collection.id, rows)
+            written = time.perf_counter()
+            self._embed_time.observe(embedded - started)
+            self._write_time.observe(written - embedded)
+            self._written.inc(len(batch))
+            summary["created"] += created
+            summary["updated"] += updated
+            summary["embedding_ms"] += (embedded - started) * 1000
+            summary["write_ms"] += (written - embedded) * 1000
+        return summary
+
+    async def delete_documents(self, name: str, ids: list[str]) -> int:
+        collection = await self.get_collection(name)
+        return await asyncio.to_thread(self._delete_documents, collection.id, ids)
+
+    async def search(
+        self,
+        name: str,
+        client_key: str,
+        query: Optional[str] = None,
+        vector: Optional[list[float]] = None,
+        top_k: int = 10,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ) -> dict[str, Any]:
+        """Return the ``top_k`` documents nearest to the query text or vector.
+
+        Scores are the cosine similarity or the inner product, per the
+        collection's metric; higher is closer. Embedding the query text is
+        admitted for ``client_key``.
+        """
+        collection = await self.get_collection(name)
+        started = time.perf_counter()
+        if vector is None:
+            vector = (await self._embed(collection, [query], client_key))[0]
+        elif len(vector) != collection.dimension:
+            raise VectorInputError(
+                f"Query vector has {len(vector)} dimensions, collection '{name}' has {collection.dimension}"
+            )
+        embedded = time.perf_counter()
+        ef_search = ef_search or self.ef_search
+        probes = probes or self.probes
+        rows = await asyncio.to_thread(
+            self._search, collection, vector, top_k, metadata_filter, ef_search, probes
+        )
+        searched = time.perf_counter()
+        self._searches.inc()
+        self._search_time.observe(searched - embedded)
+
+        results = [
+            {
+                "id": external_id,
+                "content": content,
+                "metadata": metadata,
+                # <=> is the cosine distance, <#> the negative inner product.
+                "score": 1.0 - distance if collection.metric == "cosine" else -distance,
+            }
+            for external_id, content, metadata, distance in rows
+        ]
+        return {
+            "collection": collection.name,
+            "metric": collection.metric,
+            "index_type": collection.index_type,
+            "ef_search": ef_search if collection.index_type == "hnsw" else None,
+            "probes": probes if collection.index_type == "ivfflat" else None,
+            "results": results,
+            "latency_ms": {
+                "embedding": (embedded - started) * 1000,
+                "search": (searched - embedded) * 1000,
+                "total": (searched - started) * 1000,
+            },
+        }
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "documents_written": self._written.value,
+            "searches": self._searches.value,
+            "ef_search": self.ef_search,
+            "probes": self.probes,
+        }
+
+    async def _embed(self, collection: VectorCollection, texts: list[str], client_key: str) -> list[list[float]]:
+        permit = None
+        if self.admission is not None:
+            permit = await self.admission.acquire(collection.embedding_model_id, client_key, estimate_tokens(texts))
+        try:
+            result = await self.embedding_model.infer(texts, model_id=collection.embedding_model_id)
+            if permit is not None:
+                permit.settle(result.prompt_tokens)
+        finally:
+            if permit is not None:
+                permit.release()
+        if result.embeddings.shape[1] != collection.dimension:
+            raise VectorInputError(
+                f"Model '{collection.embedding_model_id}' produced {result.embeddings.shape[1]} dimensions, "
+                f"collection '{collection.name}' has {collection.dimension}"
+            )
+        return result.embeddings.tolist()
+
+    @staticmethod
+    def _create_collection(values: dict[str, Any]) -> VectorCollection:
+        db = SessionLocal()
+        try:
+            repository = VectorRepository(db)
+            if repository.get_collection(values["name"]) is not None:
+                raise CollectionExistsError(f"Collection '{values['name']}' already exists")
+            try:
+                return repository.create_collection(**values)
+            except IntegrityError:
+                # Created concurrently since the check above.
+                raise CollectionExistsError(f"Collection '{values['name']}' already exists")
+        finally:
+            db.close()
+
+    @staticmethod
+    def _get_collection(name: str) -> Optional[VectorCollection]:
+        db = SessionLocal()
+        try:
+            return VectorRepository(db).get_collection(name)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _list_collections() -> list[VectorCollection]:
+        db = SessionLocal()
+        try:
+            return VectorRepository(db).get_collections()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _delete_collection(name: str) -> None:
+        db = SessionLocal()
+        try:
+            repository = VectorRepository(db)
+            collection = repository.get_collection(name)
+            if collection is None:
+                raise CollectionNotFoundError(f"Collection '{name}' not found")
+            repository.delete_collection(collection)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _rebuild_index(name: str, lists: Optional[int]) -> VectorCollection:
+        db = SessionLocal()
+        try:
+            repository = VectorRepository(db)
+            collection = repository.get_collection(name)
+            if collection is None:
+                raise CollectionNotFoundError(f"Collection '{name}' not found")
+            if collection.index_type == "ivfflat":
+                collection.ivfflat_lists = lists or max(1, int(math.sqrt(repository.count_documents(collection.id))))
+            repository.rebuild_index(collection)
+            db.refresh(collection)
+            return collection
+        finally:
+            db.close()
+
+    @staticmethod
+    def _write(
+        collection_id: int, documents: list[tuple[str, str, dict[str, Any], list[float]]]
+    ) -> tuple[int, int]:
+        db = SessionLocal()
+        try:
+            return VectorRepository(db).upsert_documents(collection_id, documents)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _delete_documents(collection_id: int, ids: list[str]) -> int:
+        db = SessionLocal()
+        try:
+            return VectorRepository(db).delete_documents(collection_id, ids)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _search(
+        collection: VectorCollection,
+        vector: list[float],
+        top_k: int,
+        metadata_filter: Optional[dict[str, Any]],
+        ef_search: int,
+        probes: int,
+    ) -> list[tuple[str, str, dict[str, Any], float]]:
+        db = SessionLocal()
+        try:
+            return VectorRepository(db).search(
+                collection, vector, top_k=top_k, metadata_filter=metadata_filter, ef_search=ef_search, probes=probes
+            )
+        finally:
+            db.close()
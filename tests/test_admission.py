@@ -0,0 +1,146 @@
+import asyncio
+import json
+import time
+
+import numpy as np
+import pytest
+
+from app.api.v1.embed import _embed_chunks, _ndjson_lines
+from app.core.config import RateLimitConfig
+from app.services.ai.embedded import EmbeddingResult
+from app.services.admission import AdmissionController, RateLimitExceeded, TokenBucket
+
+
+def _controller(registered=None, **kwargs) -> AdmissionController:
+    registered = registered or {}
+
+    async def resolve_limits(model):
+        return registered.get(model)
+
+    options = {
+        "default_model": RateLimitConfig(),
+        "models": {},
+        "default_key": RateLimitConfig(),
+        "keys": {},
+    }
+    options.update(kwargs)
+    return AdmissionController(resolve_limits, **options)
+
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(rate=2.0, capacity=4.0)
+    now = bucket.updated
+    bucket.take(4, now)
+    assert bucket.wait_time(1, now) == pytest.approx(0.5)
+    assert bucket.wait_time(1, now + 0.5) == 0.0
+    # Requests above capacity only wait for a full bucket.
+    assert bucket.wait_time(10, now + 0.5) == pytest.approx(1.5)
+
+
+def test_token_bucket_overdraw_delays_the_next_request():
+    bucket = TokenBucket(rate=1.0, capacity=2.0)
+    now = bucket.updated
+    bucket.take(5, now)
+    assert bucket.tokens == -3
+    assert bucket.wait_time(1, now) == pytest.approx(4.0)
+
+
+def test_reject_mode_reports_retry_after():
+    async def run():
+        controller = _controller(models={"m": RateLimitConfig(requests_per_second=1, burst=1)})
+        (await controller.acquire("m", "client")).release()
+        with pytest.raises(RateLimitExceeded) as error:
+            await controller.acquire("m", "client")
+        assert 0 < error.value.retry_after <= 1.0
+
+    asyncio.run(run())
+
+
+def test_queue_mode_waits_for_tokens():
+    async def run():
+        controller = _controller(
+            models={"m": RateLimitConfig(requests_per_second=20, burst=1)}, mode="queue", queue_timeout=1.0
+        )
+        (await controller.acquire("m", "client")).release()
+        start = time.monotonic()
+        (await controller.acquire("m", "client")).release()
+        assert time.monotonic() - start >= 0.03
+
+    asyncio.run(run())
+
+
+def test_settle_returns_overestimated_tokens():
+    async def run():
+        controller = _controller(models={"m": RateLimitConfig(tokens_per_minute=100)})
+        permit = await controller.acquire("m", "client", tokens=90)
+        permit.settle(10)
+        permit.release()
+        # 90 tokens are left only because the estimate was corrected.
+        (await controller.acquire("m", "client", tokens=80)).release()
+        with pytest.raises(RateLimitExceeded):
+            await controller.acquire("m", "client", tokens=80)
+
+    asyncio.run(run())
+
+
+def test_concurrency_limit_rejects_while_slots_are_taken():
+    async def run():
+        controller = _controller(models={"m": RateLimitConfig(max_concurrency=1)})
+        permit = await controller.acquire("m", "client")
+        with pytest.raises(RateLimitExceeded):
+            await controller.acquire("m", "client")
+        permit.release()
+        (await controller.acquire("m", "client")).release()
+
+    asyncio.run(run())
+
+
+def test_unregistered_models_share_one_limiter():
+    async def run():
+        controller = _controller(
+            registered={"known": RateLimitConfig(requests_per_second=100)},
+            default_model=RateLimitConfig(requests_per_second=1000),
+        )
+        for index in range(200):
+            (await controller.acquire(f"fake-{index}", "client")).release()
+        (await controller.acquire("known", "client")).release()
+
+        assert len(controller._model_limiters) == 2
+        assert controller._model_limiters["known"].config.requests_per_second == 100
+        assert list(controller._catalog) == ["known"]
+
+    asyncio.run(run())
+
+
+def test_per_key_limits_apply_across_models():
+    async def run():
+        controller = _controller(keys={"client": RateLimitConfig(requests_per_second=1, burst=1)})
+        (await controller.acquire("a", "client")).release()
+        with pytest.raises(RateLimitExceeded, match="API key"):
+            await controller.acquire("b", "client")
+        (await controller.acquire("b", "other")).release()
+
+    asyncio.run(run())
+
+
+def test_bulk_embedding_admits_every_chunk():
+    class FakeModel:
+        async def infer(self, inputs, model_id):
+            return EmbeddingResult(
+                embeddings=np.ones((len(inputs), 2), dtype=np.float32), prompt_tokens=len(inputs), cache_hits=0
+            )
+
+    async def records():
+        for text in ["a", "b", "c", "d"]:
+            yield text
+
+    async def run():
+        controller = _controller(models={"m": RateLimitConfig(requests_per_second=0.001, burst=1)})
+        chunks = _embed_chunks(records(), FakeModel(), "m", 2, 0, None, controller, "client")
+        lines = [json.loads(line) async for chunk in _ndjson_lines(chunks, "float", 0) for line in chunk.splitlines()]
+        assert [line.get("index") for line in lines[:2]] == [0, 1]
+        assert lines[2]["object"] == "error"
+        assert lines[2]["resume_offset"] == 2
+        assert lines[2]["retry_after"] > 0
+
+    asyncio.run(run())
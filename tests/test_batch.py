@@ -0,0 +1,130 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.ndjson import dumps_line
+from app.services import batch
+from app.services.batch import BatchRunner
+
+
+class FakeRepository:
+    def __init__(self, accept: bool = True):
+        self.accept = accept
+        self.updates: list[dict] = []
+
+    def update(self, job_id, values, statuses=None, owner=None):
+        self.updates.append(values)
+        return self.accept
+
+
+class FakeLLM:
+    """Answers every request at once, except those whose index is in ``hold`` until released."""
+
+    def __init__(self, hold=()):
+        self.hold = set(hold)
+        self.released = asyncio.Event()
+        self.started: list[int] = []
+
+    async def infer(self, body):
+        index = body["messages"][0]["content"]
+        self.started.append(index)
+        if index in self.hold:
+            await self.released.wait()
+        return {"answer": index}
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    repository = FakeRepository()
+
+    async def db(operation):
+        return operation(repository)
+
+    monkeypatch.setattr(BatchRunner, "_db", staticmethod(db))
+    return repository
+
+
+def _job(tmp_path, total, concurrency=2, checkpoint=0, output_offset=0):
+    input_path = tmp_path / "input.jsonl"
+    input_path.write_bytes(b"".join(
+        dumps_line({"custom_id": f"item-{index}", "body": {"model": "m", "messages": [{"content": index}]}})
+        for index in range(total)
+    ))
+    return SimpleNamespace(
+        id="batch_test",
+        input_path=str(input_path),
+        output_path=str(tmp_path / "output.jsonl"),
+        concurrency=concurrency,
+        max_retries=0,
+        requests_per_second=None,
+        total_items=total,
+        checkpoint=checkpoint,
+        output_offset=output_offset,
+        succeeded_items=checkpoint,
+        failed_items=0,
+    )
+
+
+def _runner(tmp_path, llm, **kwargs) -> BatchRunner:
+    return BatchRunner(lambda _: llm, jobs_dir=str(tmp_path), **kwargs)
+
+
+def _results(job) -> list[dict]:
+    with open(job.output_path, "rb") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_results_are_written_in_input_order(tmp_path, repository):
+    llm = FakeLLM(hold={0})
+    job = _job(tmp_path, total=10, concurrency=3)
+
+    async def run():
+        process = asyncio.create_task(_runner(tmp_path, llm, checkpoint_items=4)._process(job))
+        await asyncio.sleep(0.05)
+        # Item 0 holds back every later result: the window stops new items at 2 * concurrency.
+        assert len(llm.started) == 2 * job.concurrency
+        llm.released.set()
+        await process
+
+    asyncio.run(run())
+
+    results = _results(job)
+    assert [result["index"] for result in results] == list(range(10))
+    assert [result["custom_id"] for result in results] == [f"item-{index}" for index in range(10)]
+    assert [result["response"] for result in results] == [{"answer": index} for index in range(10)]
+
+
+def test_checkpoints_record_durable_progress(tmp_path, repository):
+    job = _job(tmp_path, total=10, concurrency=1)
+    asyncio.run(_runner(tmp_path, FakeLLM(), checkpoint_items=4)._process(job))
+
+    checkpoints = [update["checkpoint"] for update in repository.updates]
+    assert checkpoints == [4, 8, 10]
+    last = repository.updates[-1]
+    assert last["succeeded_items"] == 10 and last["failed_items"] == 0
+    with open(job.output_path, "rb") as file:
+        assert last["output_offset"] == len(file.read())
+
+
+def test_resume_drops_unrecorded_output_and_skips_done_items(tmp_path, repository):
+    first = _job(tmp_path, total=6, concurrency=2)
+    asyncio.run(_runner(tmp_path, FakeLLM(), checkpoint_items=2)._process(first))
+    offset = repository.updates[0]["output_offset"]
+    with open(first.output_path, "ab") as file:
+        file.write(b'{"index": 99, "partial')
+
+    llm = FakeLLM()
+    job = _job(tmp_path, total=6, concurrency=2, checkpoint=2, output_offset=offset)
+    asyncio.run(_runner(tmp_path, llm, checkpoint_items=2)._process(job))
+
+    assert sorted(llm.started) == [2, 3, 4, 5]
+    assert [result["index"] for result in _results(job)] == list(range(6))
+
+
+def test_lost_lease_stops_the_job(tmp_path, repository):
+    repository.accept = False
+    job = _job(tmp_path, total=4, concurrency=1)
+    with pytest.raises(batch._LeaseLost):
+        asyncio.run(_runner(tmp_path, FakeLLM(), checkpoint_items=2)._process(job))
@@ -0,0 +1,215 @@
+import asyncio
+import time
+from dataclasses import replace
+from datetime import datetime, timezone
+
+from app.services.catalog import CatalogModel, ModelCatalog, _Snapshot
+
+_NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _model(id: int, name: str = "gpt", provider: str = "openrouter", model_id: str = "", **values) -> CatalogModel:
+    fields = {
+        "description": None,
+        "max_tokens": None,
+        "input_cost_per_token": None,
+        "output_cost_per_token": None,
+        "context_window": None,
+        "dimension": None,
+        "requests_per_second": None,
+        "tokens_per_minute": None,
+        "max_concurrency": None,
+        "model_type": "llm",
+        "is_active": True,
+        "created_at": _NOW,
+        "updated_at": _NOW,
+    }
+    fields.update(values)
+    return CatalogModel(id=id, name=name, provider=provider, model_id=model_id or f"{name}-{id}", **fields)
+
+
+def _catalog(*models: CatalogModel) -> ModelCatalog:
+    catalog = ModelCatalog()
+    catalog._snapshot = _Snapshot(list(models))
+    catalog._loaded_at = time.monotonic()
+    return catalog
+
+
+def test_snapshot_indexes_by_id_key_and_name():
+    first = _model(2, name="gpt", model_id="openai/gpt-4o")
+    second = _model(1, name="gpt", provider="azure", model_id="gpt-4o")
+    snapshot = _Snapshot([first, second])
+
+    assert snapshot.ids == [1, 2]
+    assert snapshot.by_id[2] is first
+    assert snapshot.by_key[("azure", "gpt-4o")] is second
+    # A logical name lists its endpoints in id order; each model_id is a name of its own.
+    assert snapshot.by_name["gpt"] == [second, first]
+    assert snapshot.by_name["openai/gpt-4o"] == [first]
+
+
+def test_snapshot_put_replaces_a_renamed_model():
+    model = _model(1, name="old", model_id="m")
+    snapshot = _Snapshot([model, _model(2, name="other")])
+    snapshot.put(replace(model, name="new"))
+
+    assert "old" not in snapshot.by_name
+    assert [entry.id for entry in snapshot.by_name["new"]] == [1]
+    assert [entry.id for entry in snapshot.by_name["m"]] == [1]
+    assert snapshot.ids == [1, 2]
+
+
+def test_snapshot_remove_drops_every_index():
+    model = _model(5, name="gpt", provider="p", model_id="x")
+    snapshot = _Snapshot([model, _model(3, name="gpt")])
+    snapshot.remove(5)
+    snapshot.remove(42)
+
+    assert 5 not in snapshot.by_id
+    assert ("p", "x") not in snapshot.by_key
+    assert "x" not in snapshot.by_name
+    assert [entry.id for entry in snapshot.by_name["gpt"]] == [3]
+    assert snapshot.ids == [3]
+
+
+def test_find_active_filters_inactive_models_and_type():
+    catalog = _catalog(
+        _model(1, name="gpt"),
+        _model(2, name="gpt", is_active=False),
+        _model(3, name="gpt", model_type="embedding"),
+    )
+
+    async def run():
+        assert [model.id for model in await catalog.find_active("gpt")] == [1, 3]
+        assert [model.id for model in await catalog.find_active("gpt", "llm")] == [1]
+        assert await catalog.find_active("missing") == []
+
+    asyncio.run(run())
+
+
+def test_changes_apply_to_the_snapshot_and_are_noted_during_a_load():
+    catalog = _catalog(_model(1))
+    catalog._set(2, _model(2, name="new"))
+    catalog._set(1, None)
+
+    async def run():
+        assert await catalog.get(1) is None
+        assert (await catalog.get(2)).name == "new"
+
+    asyncio.run(run())
+
+    catalog._changed_during_load = set()
+    catalog._set(3, _model(3))
+    assert catalog._changed_during_load == {3}
+
+
+def test_get_all_pages_by_keyset():
+    catalog = _catalog(*(_model(id, provider="a" if id % 2 else "b") for id in (7, 3, 9, 1, 5, 4)))
+
+    async def run():
+        assert [model.id for model in await catalog.get_all(limit=2)] == [1, 3]
+        assert [model.id for model in await catalog.get_all(after_id=3, limit=2)] == [4, 5]
+        assert [model.id for model in await catalog.get_all(after_id=6)] == [7, 9]
+        assert await catalog.get_all(after_id=9) == []
+        # Filters apply before the limit, so a page is always full when enough models match.
+        assert [model.id for model in await catalog.get_all(provider="a", after_id=1, limit=2)] == [3, 5]
+        assert await catalog.count() == 6
+        assert await catalog.count(provider="b") == 1
+
+    asyncio.run(run())
+
+
+def test_keyset_pages_see_models_added_between_requests():
+    catalog = _catalog(_model(1), _model(2), _model(4))
+
+    async def run():
+        first = await catalog.get_all(limit=2)
+        catalog._set(3, _model(3))
+        catalog._set(1, None)
+        second = await catalog.get_all(after_id=first[-1].id, limit=2)
+        assert [model.id for model in second] == [3, 4]
+
+    asyncio.run(run())
+
+
+def test_list_models_returns_next_cursor():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api.deps import get_model_catalog
+    from app.api.v1 import model
+
+    app = FastAPI()
+    app.include_router(model.router)
+    app.dependency_overrides[get_model_catalog] = lambda: _catalog(*(_model(id) for id in range(1, 6)))
+    client = TestClient(app)
+
+    first = client.get("/models/", params={"cursor": 0, "size": 2, "include_total": False}).json()
+    assert [item["id"] for item in first["items"]] == [1, 2]
+    assert first["next_cursor"] == 2
+    assert first["total"] is None and first["page"] is None
+
+    last = client.get("/models/", params={"cursor": 4, "size": 2}).json()
+    assert [item["id"] for item in last["items"]] == [5]
+    assert last["next_cursor"] is None
+    assert last["total"] == 5
+
+    paged = client.get("/models/", params={"page": 2, "size": 2}).json()
+    assert [item["id"] for item in paged["items"]] == [3, 4]
+    assert paged["next_cursor"] == 4 and paged["pages"] == 3
+
+
+def test_reload_event_during_a_reload_schedules_another():
+    catalog = _catalog()
+    loads = []
+
+    async def load():
+        loads.append(time.monotonic())
+        await asyncio.sleep(0.01)
+
+    catalog.load = load
+
+    async def run():
+        catalog._schedule_reload()
+        await asyncio.sleep(0)
+        # A stale read does not queue another reload, an announced bulk change does.
+        catalog._schedule_reload()
+        assert len(loads) == 1
+        catalog._on_notify(None, 0, "model_changes", '{"op": "reload"}')
+        await catalog._reload
+        assert len(loads) == 2
+
+    asyncio.run(run())
+
+
+def test_update_to_a_taken_model_id_and_provider_is_a_400():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy.exc import IntegrityError
+
+    from app.api.deps import get_model_catalog
+    from app.api.v1 import model
+
+    class TakenSession:
+        rolled_back = False
+
+        async def rollback(self):
+            self.rolled_back = True
+
+    class TakenRepository:
+        db = TakenSession()
+
+        async def update(self, model_id, model_update):
+            raise IntegrityError("UPDATE models", {}, Exception("uq_models_model_id_provider"))
+
+    repository = TakenRepository()
+    app = FastAPI()
+    app.include_router(model.router)
+    app.dependency_overrides[get_model_catalog] = lambda: _catalog()
+    app.dependency_overrides[model.get_model_repository] = lambda: repository
+    client = TestClient(app)
+
+    response = client.put("/models/1", json={"model_id": "taken"})
+    assert response.status_code == 400
+    assert repository.db.rolled_back
+    assert client.post("/models/1/activate").status_code == 400
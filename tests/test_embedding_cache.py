@@ -0,0 +1,87 @@
+import asyncio
+import sqlite3
+
+import numpy as np
+
+from app.services.ai.cache import EmbeddingCache
+
+
+def _vectors(*values: float) -> np.ndarray:
+    return np.array([[value, value] for value in values], dtype=np.float32)
+
+
+def test_entries_are_keyed_by_backend():
+    async def run():
+        cache = EmbeddingCache()
+        await cache.put_many("minilm", "torch", True, ["a"], _vectors(1.0), np.array([3]))
+
+        assert (await cache.get_many("minilm", "onnx", True, ["a"])) == [None]
+        assert (await cache.get_many("minilm", "torch", False, ["a"])) == [None]
+        assert (await cache.get_many("other", "torch", True, ["a"])) == [None]
+
+        [entry] = await cache.get_many("minilm", "torch", True, ["a"])
+        vector, tokens = entry
+        assert vector.tolist() == [1.0, 1.0]
+        assert tokens == 3
+
+    asyncio.run(run())
+
+
+def test_disk_tier_keeps_backends_apart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+
+    async def run():
+        writer = EmbeddingCache(path=path)
+        await writer.put_many("minilm", "torch", True, ["a"], _vectors(1.0), np.array([3]))
+        await writer.put_many("minilm", "onnx", True, ["a"], _vectors(2.0), np.array([3]))
+
+        reader = EmbeddingCache(path=path)
+        torch_entry, = await reader.get_many("minilm", "torch", True, ["a"])
+        onnx_entry, = await reader.get_many("minilm", "onnx", True, ["a"])
+        assert torch_entry[0].tolist() == [1.0, 1.0]
+        assert onnx_entry[0].tolist() == [2.0, 2.0]
+        assert reader.stats()["entries"] == 2
+
+        assert await reader.invalidate("minilm") == 2
+        assert (await reader.get_many("minilm", "torch", True, ["a"])) == [None]
+
+    asyncio.run(run())
+
+
+def test_lru_evicts_least_recently_used():
+    async def run():
+        cache = EmbeddingCache(max_entries=2)
+        await cache.put_many("m", "torch", True, ["a", "b"], _vectors(1.0, 2.0), np.array([1, 1]))
+        await cache.get_many("m", "torch", True, ["a"])
+        await cache.put_many("m", "torch", True, ["c"], _vectors(3.0), np.array([1]))
+
+        a, b, c = await cache.get_many("m", "torch", True, ["a", "b", "c"])
+        assert a is not None and c is not None
+        assert b is None
+
+    asyncio.run(run())
+
+
+def test_disk_tier_without_backend_column_starts_over(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE embeddings (model_id TEXT, normalized INTEGER, text_hash BLOB,"
+        " vector BLOB, tokens INTEGER DEFAULT 0,"
+        " PRIMARY KEY (model_id, normalized, text_hash))"
+    )
+    conn.execute(
+        "INSERT INTO embeddings VALUES (?, ?, ?, ?, ?)",
+        ("m", 1, b"digest", _vectors(1.0)[0].tobytes(), 0),
+    )
+    conn.commit()
+    conn.close()
+
+    async def run():
+        cache = EmbeddingCache(path=path)
+        assert (await cache.get_many("m", "torch", True, ["a"])) == [None]
+        await cache.put_many("m", "torch", True, ["a"], _vectors(1.0), np.array([2]))
+        [entry] = await EmbeddingCache(path=path).get_many("m", "torch", True, ["a"])
+        assert entry[1] == 2
+
+    asyncio.run(run())
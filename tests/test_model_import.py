@@ -0,0 +1,103 @@
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.dml import Insert
+
+from app.api.schemas.model import ModelCreate
+from app.repositories.model import AsyncModelRepository
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+
+class FakeSession:
+    """Records executed statements; each INSERT returns the next list of ``xmax = 0`` flags."""
+
+    def __init__(self, *returned: list[bool], deactivated: int = 0):
+        self.returned = list(returned)
+        self.deactivated = deactivated
+        self.inserts: list[str] = []
+        self.values: list[dict] = []
+        self.notifications = 0
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        if isinstance(statement, Insert):
+            compiled = statement.compile(dialect=postgresql.dialect())
+            self.inserts.append(str(compiled))
+            self.values.append(compiled.params)
+            return _Result(self.returned.pop(0))
+        if params is not None:
+            return _Result([(1,)] * self.deactivated)
+        self.notifications += 1
+        return _Result([])
+
+    async def commit(self):
+        self.commits += 1
+
+
+def _model(model_id: str, provider: str = "openrouter", **values) -> ModelCreate:
+    return ModelCreate(name=model_id, provider=provider, model_id=model_id, model_type="llm", **values)
+
+
+def test_counts_created_updated_and_unchanged_rows():
+    # Three rows in, two returned: one inserted (xmax = 0), one updated, one left alone.
+    session = FakeSession([True, False])
+    summary = asyncio.run(AsyncModelRepository(session).bulk_upsert([_model("a"), _model("b"), _model("c")]))
+
+    assert summary == {"created": 1, "updated": 1, "unchanged": 1, "deactivated": 0}
+    assert session.notifications == 1
+
+
+def test_unchanged_chunks_send_no_reload():
+    session = FakeSession([], [True])
+    summary = asyncio.run(AsyncModelRepository(session).bulk_upsert(
+        [_model("a"), _model("b"), _model("c")], chunk_size=2
+    ))
+
+    assert summary == {"created": 1, "updated": 0, "unchanged": 2, "deactivated": 0}
+    assert len(session.inserts) == 2
+    assert session.notifications == 1
+    assert session.commits == 2
+
+
+def test_duplicate_keys_keep_the_last_entry():
+    session = FakeSession([True], [True])
+    summary = asyncio.run(AsyncModelRepository(session).bulk_upsert([
+        _model("a", description="first"), _model("a", provider="other"), _model("a", description="last"),
+    ]))
+
+    assert summary["created"] == 2
+    descriptions = [value for params in session.values for key, value in params.items() if key.startswith("description")]
+    assert "last" in descriptions and "first" not in descriptions
+
+
+def test_only_fields_set_by_an_entry_are_updated():
+    session = FakeSession([False], [False])
+    asyncio.run(AsyncModelRepository(session).bulk_upsert([
+        _model("a"), _model("b", requests_per_second=5.0, is_active=False),
+    ]))
+
+    defaults_only, with_limits = session.inserts
+    assert "requests_per_second = excluded.requests_per_second" not in defaults_only
+    assert "is_active = excluded.is_active" not in defaults_only
+    assert "name = excluded.name" in defaults_only
+    assert "requests_per_second = excluded.requests_per_second" in with_limits
+    assert "is_active = excluded.is_active" in with_limits
+    assert "tokens_per_minute = excluded.tokens_per_minute" not in with_limits
+
+
+def test_deactivated_models_are_counted():
+    session = FakeSession([False], deactivated=3)
+    summary = asyncio.run(AsyncModelRepository(session).bulk_upsert([_model("a")], deactivate_missing=True))
+
+    assert summary == {"created": 0, "updated": 1, "unchanged": 0, "deactivated": 3}
+    assert session.notifications == 2
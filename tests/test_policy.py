@@ -0,0 +1,52 @@
+import asyncio
+
+import httpx
+
+from app.core.config import LLMPolicyConfig
+from app.services.ai.policy import LLMPolicyEngine
+
+
+class _StreamingLLM:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.closed = 0
+        self.calls = 0
+
+    def infer(self, payload):
+        self.calls += 1
+        fail = self.calls <= self.failures
+
+        async def stream():
+            try:
+                if fail:
+                    raise httpx.ConnectError("refused")
+                for chunk in (b"a", b"b", b"c"):
+                    yield chunk
+            finally:
+                self.closed += 1
+
+        return stream()
+
+
+def test_closing_after_the_first_chunk_closes_the_upstream_stream():
+    async def run():
+        llm = _StreamingLLM()
+        engine = LLMPolicyEngine(llm)
+        stream = engine.infer({"model": "m", "stream": True})
+        assert await stream.__anext__() == b"a"
+        await stream.aclose()
+        assert llm.closed == 1
+
+    asyncio.run(run())
+
+
+def test_failed_attempts_are_closed_before_retrying():
+    async def run():
+        llm = _StreamingLLM(failures=1)
+        engine = LLMPolicyEngine(llm, default_policy=LLMPolicyConfig(backoff_base=0.0))
+        chunks = [chunk async for chunk in engine.infer({"model": "m", "stream": True})]
+        assert chunks == [b"a", b"b", b"c"]
+        assert llm.calls == 2
+        assert llm.closed == 2
+
+    asyncio.run(run())
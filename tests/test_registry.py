@@ -0,0 +1,59 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.ai.registry import ModelRegistry
+
+
+class _SlowRegistry(ModelRegistry):
+    def __init__(self, error: Exception | None = None):
+        super().__init__(models_dir="/nonexistent")
+        self.error = error
+        self.release = threading.Event()
+        self.calls = 0
+
+    def _load(self, key):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return object()
+
+    def _size(self, key, model):
+        return 1
+
+
+def test_cancelled_caller_does_not_cancel_the_load():
+    async def run():
+        registry = _SlowRegistry()
+        first = asyncio.create_task(registry.get("minilm"))
+        second = asyncio.create_task(registry.get("minilm"))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.sleep(0)
+        registry.release.set()
+
+        model = await second
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert registry.is_loaded("minilm")
+        assert await registry.get("minilm") is model
+        assert registry.calls == 1
+
+    asyncio.run(run())
+
+
+def test_load_errors_reach_every_caller():
+    async def run():
+        registry = _SlowRegistry(error=FileNotFoundError("missing"))
+        callers = [asyncio.create_task(registry.get("minilm")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        registry.release.set()
+
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert all(isinstance(result, FileNotFoundError) for result in results)
+        assert not registry.is_loaded("minilm")
+        assert not registry._loading
+
+    asyncio.run(run())